@@ -1,3 +1,9 @@
-from .meal_plan import plan_meals
+__all__ = ["plan_meals"]
 
-__all__ = ["plan_meals"]
\ No newline at end of file
+
+def __getattr__(name):
+    # Imported on first use so `import mealie_meal_planner` stays cheap and needs no configuration.
+    if name == "plan_meals":
+        from .meal_plan import plan_meals
+        return plan_meals
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
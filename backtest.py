@@ -0,0 +1,271 @@
+"""
+Replay the planner over past weeks to compare rule configurations.
+
+Every configuration in a parameter grid plans every one of the last N weeks,
+seeing only the history that existed before that week. Weeks run in parallel
+across a process pool. The same week uses the same random seed under every
+configuration, so differences come from the configuration and not from luck.
+
+    mealplan backtest --weeks 26 --grid max_chicken=1,2,3 --grid min_weight=0.05,0.1,0.3
+
+History comes from the local HistoryStore (HISTORY_DB), or from a synthetic
+library with --synthetic for trying the command out.
+"""
+import bisect
+import datetime
+import itertools
+import json
+import logging
+import os
+import random
+import statistics
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from . import config, metrics
+from .history_store import HistoryStore
+from .meal_plan import (build_post_selection_rules, build_query_filter, build_rules, generate_meal_plan, iter_pages,
+                        stream_recipes)
+from .selections import NeglectSelection, NeglectStats
+from .selections.neglect_stats import decay_weight
+from .slots import SlotCalendar
+
+logger = logging.getLogger(__name__)
+
+# Settings a configuration may vary, and how to parse them. The first four go to build_rules.
+PARAMETERS = {
+    "no_duplicate_days": int,
+    "recently_made_days": int,
+    "max_chicken": int,
+    "max_indian": int,
+    "min_weight": float,
+    "half_life_weeks": float,
+}
+RULE_PARAMETERS = ("no_duplicate_days", "recently_made_days", "max_chicken", "max_indian")
+
+
+def parse_grid(specs):
+    """
+    Expand ["max_chicken=1,2", "min_weight=0.1,0.3"] into every combination, as a list of dicts.
+    No specs gives one empty configuration: the current defaults.
+    """
+    axes = []
+    for spec in specs or []:
+        name, _, values = spec.partition("=")
+        name = name.strip()
+        if name not in PARAMETERS or not values:
+            raise ValueError(f"Invalid grid {spec!r}, expected NAME=V1,V2,... "
+                             f"with NAME one of {', '.join(PARAMETERS)}")
+        axes.append([(name, PARAMETERS[name](v)) for v in values.split(",")])
+    return [dict(combination) for combination in itertools.product(*axes)]
+
+
+class History:
+    """
+    Planned dates and made timestamps per recipe id, sorted, so the state at any past moment is a bisect away.
+    """
+
+    def __init__(self, planned_dates, made_timestamps):
+        self.planned_dates = {k: sorted(v) for k, v in planned_dates.items()}
+        self.made_timestamps = {k: sorted(v) for k, v in made_timestamps.items()}
+
+    @classmethod
+    def from_events(cls, meal_plans, timeline_events):
+        """From raw Mealie meal plan items and made events."""
+        planned, made = {}, {}
+        for item in meal_plans:
+            if item.get("recipeId"):
+                planned.setdefault(item["recipeId"], []).append(item["date"])
+        for event in timeline_events:
+            made.setdefault(event["recipeId"], []).append(event.get("timestamp") or event["createdAt"])
+        return cls(planned, made)
+
+    def as_of(self, recipes, when, half_life_weeks=None):
+        """
+        What the planner would have known at `when` (an aware datetime).
+
+        :return: (stats_by_recipe, last_made) like meal_plan.load_history
+        """
+        plan_cutoff = when.date().isoformat()
+        made_cutoff = when.isoformat()
+        stats_by_recipe = {}
+        last_made = {}
+        for recipe in recipes:
+            dates = self.planned_dates.get(recipe["id"], [])
+            dates = dates[:bisect.bisect_left(dates, plan_cutoff)]
+            times = self.made_timestamps.get(recipe["id"], [])
+            times = times[:bisect.bisect_left(times, made_cutoff)]
+            if half_life_weeks:
+                planned = sum(decay_weight(d, half_life_weeks, when) for d in dates)
+                made = sum(decay_weight(t, half_life_weeks, when) for t in times)
+            else:
+                planned, made = len(dates), len(times)
+            stats_by_recipe[recipe["name"]] = NeglectStats(planned, made, dates[-1] if dates else None,
+                                                           times[-1] if times else None)
+            if times:
+                last_made[recipe["id"]] = times[-1]
+        return stats_by_recipe, last_made
+
+
+# Set in each worker process by _init_worker, so the library and history are sent once per process, not per task.
+_worker_data = None
+
+
+def _init_worker(recipes, history):
+    global _worker_data
+    _worker_data = (recipes, history)
+    # Thousands of "picked ..." lines would drown the summary.
+    logging.getLogger(__package__ or None).setLevel(logging.WARNING)
+
+
+def backtest_week(recipes, history, configuration, week_start, seed=0):
+    """Plan one week under one configuration. Returns a dict of measurements."""
+    when = datetime.datetime.combine(week_start, datetime.time(), datetime.timezone.utc)
+    stats_by_recipe, last_made = history.as_of(recipes, when, configuration.get("half_life_weeks"))
+    rules = build_rules(last_made, as_of=datetime.datetime.combine(week_start, datetime.time()),
+                        **{k: v for k, v in configuration.items() if k in RULE_PARAMETERS})
+    strategy = NeglectSelection(stats_by_recipe=stats_by_recipe, min_weight=configuration.get("min_weight", 0.1))
+    calendar = SlotCalendar(week_start, 7, ["dinner"])
+
+    random.seed(f"{seed}:{week_start.isoformat()}")
+    started = time.perf_counter()
+    try:
+        generate_meal_plan(recipes, build_post_selection_rules(), rules=rules, selection_strategy=strategy,
+                           calendar=calendar)
+    except ValueError:
+        return {"week": week_start.isoformat(), "failed": True, "seconds": time.perf_counter() - started}
+    seconds = time.perf_counter() - started
+
+    filled = [slot for slot in calendar.slots if slot.entry]
+    tags = {t["name"].casefold() for slot in filled for t in slot.entry.get("tags", [])}
+    return {
+        "week": week_start.isoformat(),
+        "failed": False,
+        "seconds": seconds,
+        "slots": len(filled),
+        "relaxed_slots": sum(1 for slot in filled if slot.relaxed),
+        "relaxed_rules": [name for slot in filled for name in slot.relaxed],
+        "distinct_recipes": len({slot.entry["recipeId"] for slot in filled}),
+        "distinct_tags": len(tags),
+    }
+
+
+def _run_task(task):
+    recipes, history = _worker_data
+    index, configuration, week_start, seed = task
+    return index, backtest_week(recipes, history, configuration, week_start, seed)
+
+
+def summarize(configuration, weeks):
+    """Aggregate the per-week results of one configuration."""
+    planned = [w for w in weeks if not w["failed"]]
+    slots = sum(w["slots"] for w in planned)
+    seconds = sorted(w["seconds"] for w in weeks)
+    relaxed_by_rule = {}
+    for w in planned:
+        for name in w["relaxed_rules"]:
+            relaxed_by_rule[name] = relaxed_by_rule.get(name, 0) + 1
+    return {
+        "config": configuration,
+        "weeks": len(weeks),
+        "hard_failures": len(weeks) - len(planned),
+        "relaxed_slot_rate": sum(w["relaxed_slots"] for w in planned) / slots if slots else None,
+        "relaxed_by_rule": relaxed_by_rule,
+        "distinct_recipe_rate": sum(w["distinct_recipes"] for w in planned) / slots if slots else None,
+        "distinct_tags_per_week": statistics.mean(w["distinct_tags"] for w in planned) if planned else None,
+        "ms_per_plan": statistics.mean(seconds) * 1000 if seconds else None,
+        "p95_ms_per_plan": seconds[int(0.95 * (len(seconds) - 1))] * 1000 if seconds else None,
+    }
+
+
+def run_backtest(recipes, history, configurations, week_starts, workers=None, seed=0):
+    """
+    Plan every week under every configuration across a process pool.
+
+    :param workers: Processes to use; None for one per CPU, 1 to run in this process
+    :return: One summary per configuration, in the order given
+    """
+    tasks = [(i, configuration, week, seed) for i, configuration in enumerate(configurations) for week in week_starts]
+    results = [[] for _ in configurations]
+    if workers == 1:
+        package_logger = logging.getLogger(__package__ or None)
+        level = package_logger.level
+        _init_worker(recipes, history)
+        try:
+            for index, outcome in map(_run_task, tasks):
+                results[index].append(outcome)
+        finally:
+            package_logger.setLevel(level)
+    else:
+        workers = workers or os.cpu_count()
+        chunksize = max(1, len(tasks) // (workers * 4))
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(recipes, history)) as pool:
+            for index, outcome in pool.map(_run_task, tasks, chunksize=chunksize):
+                results[index].append(outcome)
+    return [summarize(configuration, weeks) for configuration, weeks in zip(configurations, results)]
+
+
+def past_week_starts(weeks, before=None):
+    """The Mondays of the `weeks` full weeks before `before` (default: this week), oldest first."""
+    before = before or datetime.date.today()
+    this_monday = before - datetime.timedelta(days=before.weekday())
+    return [this_monday - datetime.timedelta(weeks=n) for n in range(weeks, 0, -1)]
+
+
+def load_data(synthetic=None, seed=0):
+    """
+    Recipes (without lastMade, which would leak the present into past weeks) and History.
+
+    :param synthetic: Generate a library of this many recipes with a year of history instead of using Mealie
+    :return: (recipes, history, week the data ends)
+    """
+    if synthetic:
+        from .benchmarks.synthetic import ANCHOR_DATE, generate_history, generate_library
+        recipes = generate_library(synthetic, seed=seed)
+        meal_plans, timeline_events = generate_history(recipes, seed=seed)
+        history, end = History.from_events(meal_plans, timeline_events), ANCHOR_DATE
+    else:
+        store = HistoryStore(config.require("HISTORY_DB"))
+        try:
+            with metrics.stage("sync_history"):
+                store.sync(iter_pages, config.mealie_api_url())
+            history = History(store.planned_dates(), store.made_timestamps())
+        finally:
+            store.close()
+        with metrics.stage("fetch_recipes"):
+            recipes = list(stream_recipes(query_filter=build_query_filter(build_rules())))
+        end = None
+    return [dict(r, lastMade=None) for r in recipes], history, end
+
+
+def format_table(summaries):
+    names = [", ".join(f"{k}={v}" for k, v in s["config"].items()) or "defaults" for s in summaries]
+    width = max(len("config"), *map(len, names))
+    header = f"{'config':<{width}} {'fail':>4} {'relaxed':>8} {'distinct':>8} {'tags/wk':>7} {'ms/plan':>8}"
+    lines = [header, "-" * len(header)]
+
+    def pct(value):
+        return f"{value:.0%}" if value is not None else "-"
+
+    for name, s in zip(names, summaries):
+        lines.append(f"{name:<{width}} {s['hard_failures']:>4} {pct(s['relaxed_slot_rate']):>8} "
+                     f"{pct(s['distinct_recipe_rate']):>8} {s['distinct_tags_per_week'] or 0:>7.1f} "
+                     f"{s['ms_per_plan'] or 0:>8.2f}")
+    return "\n".join(lines)
+
+
+def backtest(grid=None, weeks=26, workers=None, seed=0, synthetic=None, output=None):
+    """Run the backtest command: load data, replay, print a table and optionally write JSON."""
+    configurations = parse_grid(grid)
+    recipes, history, end = load_data(synthetic, seed)
+    week_starts = past_week_starts(weeks, end)
+    logger.info(f"Backtesting {len(configurations)} configurations over {len(week_starts)} weeks "
+                f"({week_starts[0]} to {week_starts[-1]}) with {len(recipes)} recipes")
+
+    with metrics.stage("backtest"):
+        summaries = run_backtest(recipes, history, configurations, week_starts, workers, seed)
+    print(format_table(summaries))
+    if output:
+        with open(output, "w") as f:
+            json.dump(summaries, f, indent=2)
+    return summaries
@@ -0,0 +1,3 @@
+from .synthetic import generate_library, iter_library, generate_history, history_by_recipe
+
+__all__ = ["generate_library", "iter_library", "generate_history", "history_by_recipe"]
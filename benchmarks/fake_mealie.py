@@ -0,0 +1,364 @@
+"""
+A local stand-in for the parts of the Mealie API the planner and tagger use.
+
+    with FakeMealie(recipes, meal_plans, timeline_events, latency=0.02) as server:
+        os.environ["MEALIE_SERVER"] = server.url
+        ...
+        print(server.stats())
+
+Run standalone against a synthetic library:
+
+    python -m mealie_meal_planner.benchmarks.fake_mealie --recipes 10000 --port 9925
+"""
+import argparse
+import collections
+import datetime
+import functools
+import html
+import json
+import logging
+import random
+import re
+import threading
+import time
+import unicodedata
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qs
+
+from .query_filter import compile_filter, QueryFilterError
+
+logger = logging.getLogger(__name__)
+
+
+# Recipe fields Mealie only returns from /api/recipes/{slug}, not in the paginated list.
+FULL_RECIPE_ONLY = ("recipeIngredient", "recipeInstructions")
+
+
+def _slugify(name):
+    """Like python-slugify, which Mealie uses: transliterated to ASCII, apostrophes dropped, other runs -> '-'."""
+    text = unicodedata.normalize("NFKD", html.unescape(name)).encode("ascii", "ignore").decode()
+    return re.sub(r"[^a-z0-9]+", "-", text.casefold().replace("'", "")).strip("-")
+
+
+class FakeMealie:
+    """
+    In-memory Mealie serving /api/recipes (summaries) and /api/recipes/{slug}, /api/households/mealplans,
+    /api/recipes/timeline/events, /api/organizers/tags and /api/recipes/bulk-actions/tag.
+
+    :param latency: Seconds added to every response
+    :param jitter: Extra random latency, uniformly 0..jitter seconds
+    :param error_rate: Fraction of requests answered with `error_status` instead
+    :param seed: Seed for jitter and error injection
+    """
+
+    def __init__(self, recipes=None, meal_plans=None, timeline_events=None, tags=None,
+                 host="127.0.0.1", port=0, latency=0.0, jitter=0.0, error_rate=0.0, error_status=503, seed=0):
+        self.recipes = list(recipes or [])
+        self.meal_plans = list(meal_plans or [])
+        self.timeline_events = list(timeline_events or [])
+        self.tags = {}
+        for tag in tags or self._tags_from_recipes():
+            self.tags[tag["name"].lower()] = tag
+
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.error_status = error_status
+
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._requests = collections.Counter()
+        self._bytes_sent = 0
+        self._bytes_received = 0
+        self._errors = 0
+
+        self._httpd = ThreadingHTTPServer((host, port), self._handler_class())
+        self._httpd.daemon_threads = True
+        self._thread = None
+
+    # ----- lifecycle -----
+
+    @property
+    def url(self):
+        """Base URL to use as MEALIE_SERVER."""
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self._thread = threading.Thread(target=self._httpd.serve_forever, name="fake-mealie", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+        if self._thread:
+            self._thread.join()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    # ----- counters -----
+
+    def stats(self):
+        """Request counts per 'METHOD path', bytes in/out and injected errors since the last reset."""
+        with self._lock:
+            return {
+                "requests": dict(self._requests),
+                "total_requests": sum(self._requests.values()),
+                "bytes_sent": self._bytes_sent,
+                "bytes_received": self._bytes_received,
+                "errors": self._errors,
+            }
+
+    def reset_stats(self):
+        with self._lock:
+            self._requests.clear()
+            self._bytes_sent = 0
+            self._bytes_received = 0
+            self._errors = 0
+
+    # ----- data helpers -----
+
+    def _tags_from_recipes(self):
+        seen = {}
+        for recipe in self.recipes:
+            for tag in recipe.get("tags", []):
+                seen.setdefault(tag["name"].lower(), tag)
+        return list(seen.values())
+
+    def _recipe_by_slug(self, slug):
+        for recipe in self.recipes:
+            if recipe.get("slug") == slug:
+                return recipe
+        return None
+
+    @staticmethod
+    def _paginate(items, query):
+        page = int(query.get("page", 1))
+        per_page = int(query.get("perPage", 50))
+
+        order_by = query.get("orderBy")
+        if order_by:
+            reverse = query.get("orderDirection", "asc") == "desc"
+            items = sorted(items, key=lambda i: (i.get(order_by) is None, str(i.get(order_by))), reverse=reverse)
+        elif query.get("orderDirection") == "desc":
+            items = list(reversed(items))
+
+        total = len(items)
+        if per_page == -1:
+            per_page = max(total, 1)
+            page = 1
+        total_pages = (total + per_page - 1) // per_page
+        start = (page - 1) * per_page
+        return {
+            "page": page,
+            "per_page": per_page,
+            "total": total,
+            "total_pages": total_pages,
+            "items": items[start:start + per_page],
+            "next": None if page >= total_pages else f"?page={page + 1}&perPage={per_page}",
+            "previous": None if page <= 1 else f"?page={page - 1}&perPage={per_page}",
+        }
+
+    # ----- routes -----
+
+    def _get_recipes(self, query, body):
+        predicate = compile_filter(query.get("queryFilter"))
+        # Like Mealie, the list holds summaries: no ingredients or instructions.
+        summaries = [{k: v for k, v in r.items() if k not in FULL_RECIPE_ONLY} for r in self.recipes if predicate(r)]
+        return 200, self._paginate(summaries, query)
+
+    def _get_recipe(self, query, body, item_id):
+        recipe = self._recipe_by_slug(item_id) or next((r for r in self.recipes if r["id"] == item_id), None)
+        if recipe is None:
+            return 404, {"detail": f"Recipe {item_id} not found"}
+        return 200, recipe
+
+    def _get_meal_plans(self, query, body):
+        predicate = compile_filter(query.get("queryFilter"))
+        start = query.get("start_date")
+        end = query.get("end_date")
+        items = [
+            m for m in self.meal_plans
+            if (not start or m["date"] >= start) and (not end or m["date"] <= end) and predicate(m)
+        ]
+        return 200, self._paginate(items, query)
+
+    def _post_meal_plan(self, query, body):
+        with self._lock:
+            entry = {
+                "id": max((m["id"] for m in self.meal_plans), default=0) + 1,
+                "date": body["date"],
+                "entryType": body.get("entryType", "dinner"),
+                "title": body.get("title", ""),
+                "text": body.get("text", ""),
+                "recipeId": body.get("recipeId"),
+                "recipe": None,
+                "createdAt": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+            }
+            entry["updatedAt"] = entry["createdAt"]
+            recipe = next((r for r in self.recipes if r["id"] == entry["recipeId"]), None)
+            if recipe:
+                entry["recipe"] = {k: recipe.get(k) for k in ("id", "name", "slug", "tags")}
+            self.meal_plans.append(entry)
+        return 201, entry
+
+    def _delete_meal_plan(self, query, body, item_id):
+        with self._lock:
+            for i, entry in enumerate(self.meal_plans):
+                if str(entry["id"]) == item_id:
+                    return 200, self.meal_plans.pop(i)
+        return 404, {"detail": f"Meal plan {item_id} not found"}
+
+    def _get_timeline_events(self, query, body):
+        predicate = compile_filter(query.get("queryFilter"))
+        names_by_id = {r["id"]: r for r in self.recipes}
+
+        def with_recipe(event):
+            # Lets filters like recipe.name="..." resolve, as they do in Mealie.
+            recipe = names_by_id.get(event.get("recipeId"))
+            return dict(event, recipe={"id": recipe["id"], "name": recipe["name"]} if recipe else None)
+
+        items = [e for e in self.timeline_events if predicate(with_recipe(e))]
+        return 200, self._paginate(items, query)
+
+    def _get_tags(self, query, body):
+        return 200, self._paginate(list(self.tags.values()), query)
+
+    def _post_tag(self, query, body):
+        name = body["name"]
+        with self._lock:
+            if name.lower() in self.tags:
+                return 409, {"detail": "Tag already exists"}
+            tag = {"id": str(uuid.uuid4()), "name": name, "slug": _slugify(name)}
+            self.tags[name.lower()] = tag
+        return 201, tag
+
+    def _bulk_tag(self, query, body):
+        with self._lock:
+            for slug in body.get("recipes", []):
+                recipe = self._recipe_by_slug(slug)
+                if recipe is None:
+                    continue
+                existing = {t["name"].lower() for t in recipe.get("tags", [])}
+                recipe["tags"] = list(recipe.get("tags", [])) + [
+                    t for t in body.get("tags", []) if t["name"].lower() not in existing
+                ]
+        return 200, {"message": "Recipes updated"}
+
+    def _routes(self):
+        return {
+            ("GET", "/api/recipes"): self._get_recipes,
+            ("GET", "/api/recipes/{id}"): self._get_recipe,
+            ("GET", "/api/households/mealplans"): self._get_meal_plans,
+            ("POST", "/api/households/mealplans"): self._post_meal_plan,
+            ("DELETE", "/api/households/mealplans/{id}"): self._delete_meal_plan,
+            ("GET", "/api/recipes/timeline/events"): self._get_timeline_events,
+            ("GET", "/api/organizers/tags"): self._get_tags,
+            ("POST", "/api/organizers/tags"): self._post_tag,
+            ("POST", "/api/recipes/bulk-actions/tag"): self._bulk_tag,
+        }
+
+    # ----- HTTP plumbing -----
+
+    def _handle(self, method, raw_path, raw_body):
+        """Return (status, payload) for a request, after latency and error injection."""
+        path = urlsplit(raw_path).path.rstrip("/")
+        query = {k: v[-1] for k, v in parse_qs(urlsplit(raw_path).query).items()}
+
+        with self._lock:
+            self._requests[f"{method} {path}"] += 1
+            self._bytes_received += len(raw_body)
+            delay = self.latency + (self._rng.uniform(0, self.jitter) if self.jitter else 0.0)
+            fail = self.error_rate and self._rng.random() < self.error_rate
+            if fail:
+                self._errors += 1
+        if delay:
+            time.sleep(delay)
+        if fail:
+            return self.error_status, {"detail": "Injected error"}
+
+        routes = self._routes()
+        route = routes.get((method, path))
+        if route is None:
+            base, _, item_id = path.rpartition("/")
+            item_route = routes.get((method, f"{base}/{{id}}"))
+            if item_route is None:
+                return 404, {"detail": f"Not found: {method} {path}"}
+            route = functools.partial(item_route, item_id=item_id)
+        try:
+            body = json.loads(raw_body) if raw_body else {}
+            return route(query, body)
+        except (QueryFilterError, ValueError, KeyError) as e:
+            return 400, {"detail": str(e)}
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def _respond(self, method):
+                length = int(self.headers.get("Content-Length") or 0)
+                raw_body = self.rfile.read(length) if length else b""
+                status, payload = server._handle(method, self.path, raw_body)
+                data = json.dumps(payload).encode()
+                with server._lock:
+                    server._bytes_sent += len(data)
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_GET(self):
+                self._respond("GET")
+
+            def do_POST(self):
+                self._respond("POST")
+
+            def do_DELETE(self):
+                self._respond("DELETE")
+
+            def log_message(self, format, *args):
+                logger.debug(format % args)
+
+        return Handler
+
+
+def main(argv=None):
+    from .synthetic import generate_library, generate_history
+
+    parser = argparse.ArgumentParser(description="Serve a synthetic library through a fake Mealie API.")
+    parser.add_argument("--recipes", type=int, default=1000)
+    parser.add_argument("--history-weeks", type=int, default=52)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9925)
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--jitter", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    recipes = generate_library(args.recipes, seed=args.seed)
+    meal_plans, timeline_events = generate_history(recipes, weeks=args.history_weeks, seed=args.seed)
+    server = FakeMealie(recipes, meal_plans, timeline_events, host=args.host, port=args.port,
+                        latency=args.latency, jitter=args.jitter, error_rate=args.error_rate, seed=args.seed)
+    logger.info(f"Serving {len(recipes)} recipes on {server.url} (MEALIE_SERVER={server.url})")
+    try:
+        server._httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server._httpd.server_close()
+        logger.info(json.dumps(server.stats(), indent=2))
+
+
+if __name__ == "__main__":
+    main()
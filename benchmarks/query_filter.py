@@ -0,0 +1,233 @@
+"""
+A small evaluator for the subset of Mealie's `queryFilter` syntax the planner uses.
+
+Supported:
+    field = "value"       field <> "value"       field != "value"
+    field > "value"       field >= / < / <=      field LIKE "%value%"
+    field IN ["a", "b"]   field NOT IN [...]     field CONTAINS ALL [...]
+    field IS NULL         field IS NOT NULL
+    AND / OR and parentheses
+
+Dotted fields walk nested dicts (`recipe.name`). When a step hits a list
+(`tags.name`) the comparison matches if any element matches, except NOT IN
+(no element may match) and CONTAINS ALL (every value must be present).
+Values that look like dates or datetimes are compared as datetimes.
+"""
+import datetime
+import re
+
+_TOKEN = re.compile(r'''
+    \s*(?:
+        (?P<string>"(?:[^"\\]|\\.)*")
+      | (?P<op><>|!=|>=|<=|=|>|<)
+      | (?P<punct>[()\[\],])
+      | (?P<word>[^\s()\[\],"=<>!]+)
+    )''', re.VERBOSE)
+
+_KEYWORDS = {"AND", "OR", "IN", "NOT", "CONTAINS", "ALL", "LIKE", "IS", "NULL"}
+
+
+class QueryFilterError(ValueError):
+    pass
+
+
+def _tokenize(text):
+    tokens = []
+    pos = 0
+    text = text.strip()
+    while pos < len(text):
+        m = _TOKEN.match(text, pos)
+        if not m or m.end() == pos:
+            raise QueryFilterError(f"Unexpected input at {pos}: {text[pos:pos + 20]!r}")
+        pos = m.end()
+        if m.group("string") is not None:
+            tokens.append(("value", m.group("string")[1:-1].replace('\\"', '"')))
+        elif m.group("op") is not None:
+            tokens.append(("op", m.group("op")))
+        elif m.group("punct") is not None:
+            tokens.append(("punct", m.group("punct")))
+        else:
+            word = m.group("word")
+            if word.upper() in _KEYWORDS:
+                tokens.append(("kw", word.upper()))
+            else:
+                tokens.append(("word", word))
+    return tokens
+
+
+class _Parser:
+    def __init__(self, tokens):
+        self.tokens = tokens
+        self.pos = 0
+
+    def peek(self, kind=None, value=None):
+        if self.pos >= len(self.tokens):
+            return None
+        token = self.tokens[self.pos]
+        if kind and token[0] != kind:
+            return None
+        if value and token[1] != value:
+            return None
+        return token
+
+    def take(self, kind=None, value=None):
+        token = self.peek(kind, value)
+        if token is None:
+            found = self.tokens[self.pos] if self.pos < len(self.tokens) else "end of filter"
+            raise QueryFilterError(f"Expected {value or kind}, found {found}")
+        self.pos += 1
+        return token
+
+    def parse(self):
+        node = self.expression()
+        if self.pos != len(self.tokens):
+            raise QueryFilterError(f"Unexpected {self.tokens[self.pos]}")
+        return node
+
+    def expression(self):
+        node = self.term()
+        while self.peek("kw", "AND") or self.peek("kw", "OR"):
+            joiner = self.take()[1]
+            node = (joiner, node, self.term())
+        return node
+
+    def term(self):
+        if self.peek("punct", "("):
+            self.take()
+            node = self.expression()
+            self.take("punct", ")")
+            return node
+
+        field = self.take("word")[1]
+        if self.peek("op"):
+            return ("cmp", field, self.take()[1], self.scalar())
+        keyword = self.take("kw")[1]
+        if keyword == "IN":
+            return ("in", field, self.list())
+        if keyword == "NOT":
+            self.take("kw", "IN")
+            return ("not in", field, self.list())
+        if keyword == "CONTAINS":
+            self.take("kw", "ALL")
+            return ("contains all", field, self.list())
+        if keyword == "LIKE":
+            return ("like", field, self.scalar())
+        if keyword == "IS":
+            negate = bool(self.peek("kw", "NOT") and self.take())
+            self.take("kw", "NULL")
+            return ("not null" if negate else "null", field)
+        raise QueryFilterError(f"Unsupported operator {keyword}")
+
+    def scalar(self):
+        kind, value = self.take()
+        if kind not in ("value", "word"):
+            raise QueryFilterError(f"Expected a value, found {value}")
+        return value
+
+    def list(self):
+        self.take("punct", "[")
+        values = []
+        while not self.peek("punct", "]"):
+            values.append(self.scalar())
+            if self.peek("punct", ","):
+                self.take()
+        self.take("punct", "]")
+        return values
+
+
+def parse(text):
+    """Parse a queryFilter string into a nested tuple tree."""
+    return _Parser(_tokenize(text)).parse()
+
+
+def _resolve(item, field):
+    """Return every value found at a dotted path, flattening lists along the way."""
+    values = [item]
+    for part in field.split("."):
+        next_values = []
+        for v in values:
+            if isinstance(v, list):
+                next_values.extend(x.get(part) for x in v if isinstance(x, dict))
+            elif isinstance(v, dict):
+                next_values.append(v.get(part))
+        values = next_values
+    flat = []
+    for v in values:
+        if isinstance(v, list):
+            flat.extend(v)
+        else:
+            flat.append(v)
+    return flat
+
+
+def _as_comparable(value):
+    if isinstance(value, (int, float)):
+        return value
+    if isinstance(value, str):
+        try:
+            parsed = datetime.datetime.fromisoformat(value.replace("Z", "+00:00"))
+        except ValueError:
+            return value
+        if parsed.tzinfo is None:
+            parsed = parsed.replace(tzinfo=datetime.timezone.utc)
+        return parsed
+    return str(value)
+
+
+def _compare(actual, op, expected):
+    if actual is None:
+        return op in ("<>", "!=")
+    a, e = _as_comparable(actual), _as_comparable(expected)
+    if type(a) is not type(e):
+        a, e = str(actual), str(expected)
+    if op == "=":
+        return a == e
+    if op in ("<>", "!="):
+        return a != e
+    if op == ">":
+        return a > e
+    if op == ">=":
+        return a >= e
+    if op == "<":
+        return a < e
+    if op == "<=":
+        return a <= e
+    raise QueryFilterError(f"Unsupported operator {op}")
+
+
+def _like(actual, pattern):
+    regex = "^" + ".*".join(re.escape(p) for p in pattern.split("%")) + "$"
+    return actual is not None and re.match(regex, str(actual), re.IGNORECASE) is not None
+
+
+def evaluate(node, item):
+    kind = node[0]
+    if kind == "AND":
+        return evaluate(node[1], item) and evaluate(node[2], item)
+    if kind == "OR":
+        return evaluate(node[1], item) or evaluate(node[2], item)
+
+    values = _resolve(item, node[1])
+    if kind == "cmp":
+        return any(_compare(v, node[2], node[3]) for v in values) if values else False
+    if kind == "in":
+        return any(v in node[2] for v in values)
+    if kind == "not in":
+        return not any(v in node[2] for v in values)
+    if kind == "contains all":
+        return all(e in values for e in node[2])
+    if kind == "like":
+        return any(_like(v, node[2]) for v in values)
+    if kind == "null":
+        return all(v is None for v in values)
+    if kind == "not null":
+        return any(v is not None for v in values)
+    raise QueryFilterError(f"Unknown node {kind}")
+
+
+def compile_filter(text):
+    """Return a predicate item -> bool for a queryFilter string (or always-true for an empty one)."""
+    if not text:
+        return lambda item: True
+    tree = parse(text)
+    return lambda item: evaluate(tree, item)
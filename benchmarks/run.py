@@ -0,0 +1,115 @@
+"""
+Run the benchmark scenarios and compare them against a saved baseline.
+
+    python -m mealie_meal_planner.benchmarks.run --sizes 100,1000,10000
+    python -m mealie_meal_planner.benchmarks.run --save-baseline
+"""
+import argparse
+import json
+import logging
+import os
+import statistics
+import sys
+import time
+
+from .scenarios import SCENARIOS, Fixture
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(__file__), "baseline.json")
+DEFAULT_SIZES = "100,1000,10000"
+
+
+def time_scenario(fn, repeat):
+    """Run fn once to warm up, then `repeat` times. Returns the timings in seconds."""
+    fn()
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def run(sizes, scenario_names, repeat=5, seed=0):
+    """Return {"<scenario>@<size>": {"min": s, "median": s, "repeat": n}}."""
+    results = {}
+    for size in sizes:
+        build_start = time.perf_counter()
+        fixture = Fixture(size, seed=seed)
+        logger.info(f"Built fixture of {size} recipes in {time.perf_counter() - build_start:.2f}s")
+        try:
+            for name in scenario_names:
+                timings = time_scenario(SCENARIOS[name](fixture), repeat)
+                key = f"{name}@{size}"
+                results[key] = {"min": min(timings), "median": statistics.median(timings), "repeat": repeat}
+                logger.info(f"{key}: median {results[key]['median'] * 1000:.2f}ms "
+                            f"min {results[key]['min'] * 1000:.2f}ms")
+        finally:
+            fixture.close()
+    return results
+
+
+def compare(results, baseline, tolerance):
+    """Return the keys whose median is more than `tolerance` slower than the baseline."""
+    regressions = []
+    for key, result in results.items():
+        if key not in baseline:
+            continue
+        allowed = baseline[key]["median"] * (1 + tolerance)
+        if result["median"] > allowed:
+            regressions.append(key)
+            logger.warning(f"REGRESSION {key}: {result['median'] * 1000:.2f}ms vs baseline "
+                           f"{baseline[key]['median'] * 1000:.2f}ms (+{tolerance:.0%} allowed)")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the meal planning hot path on synthetic libraries.")
+    parser.add_argument("--sizes", default=DEFAULT_SIZES,
+                        help="Comma separated library sizes, e.g. 100,1000,1000000")
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS),
+                        help=f"Comma separated scenarios from: {', '.join(SCENARIOS)}")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--save-baseline", action="store_true", help="Overwrite the baseline with this run")
+    parser.add_argument("--tolerance", type=float, default=0.25,
+                        help="Allowed slowdown over baseline before failing (0.25 = 25%%)")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    # The planner logs every pick at INFO; that is noise here.
+    logging.getLogger(__package__.rsplit(".", 1)[0]).setLevel(logging.WARNING)
+    logger.setLevel(logging.INFO)
+
+    sizes = [int(s) for s in args.sizes.split(",") if s]
+    scenario_names = [s for s in args.scenarios.split(",") if s]
+    unknown = set(scenario_names) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"Unknown scenarios: {', '.join(sorted(unknown))}")
+
+    results = run(sizes, scenario_names, repeat=args.repeat, seed=args.seed)
+
+    if args.save_baseline:
+        baseline = {}
+        if os.path.exists(args.baseline):
+            with open(args.baseline) as f:
+                baseline = json.load(f)
+        baseline.update(results)
+        with open(args.baseline, "w") as f:
+            json.dump(baseline, f, indent=2, sort_keys=True)
+        logger.info(f"Saved baseline to {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        logger.info(f"No baseline at {args.baseline}; run with --save-baseline to create one")
+        return 0
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    return 1 if compare(results, baseline, args.tolerance) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
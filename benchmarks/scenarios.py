@@ -0,0 +1,155 @@
+"""
+Timed scenarios over the planning hot path.
+
+Each scenario takes a prepared Fixture and returns a zero-argument callable;
+only the callable is timed, so setup cost does not leak into the numbers.
+"""
+import datetime
+import random
+
+from .. import config, meal_plan
+from ..meal_plan import (apply_rules_with_backoff, generate_meal_plan, iter_meal_plan, build_rules,
+                         build_post_selection_rules)
+from ..rules import ExcludeTag, MaxTagPerWeek, NoDuplicatesWithinDays
+from ..selections import NeglectSelection
+from .fake_mealie import FakeMealie
+from .synthetic import ANCHOR_DATE, generate_library, generate_history, history_by_recipe
+
+# Per-recipe history fetches are one request each, so the I/O scenarios use a sample.
+HISTORY_SAMPLE = 200
+
+
+class Fixture:
+    """A synthetic library plus its history, built once per library size."""
+
+    def __init__(self, size, seed=0, history_weeks=52):
+        self.size = size
+        self.seed = seed
+        self.recipes = generate_library(size, seed=seed)
+        self.meal_plans, self.timeline_events = generate_history(self.recipes, weeks=history_weeks, seed=seed)
+        self.meal_plans_by_recipe, self.timeline_events_by_recipe = history_by_recipe(
+            self.recipes, self.meal_plans, self.timeline_events)
+        self._server = None
+
+    def neglect_selection(self):
+        return NeglectSelection(
+            meal_plans_by_recipe=self.meal_plans_by_recipe,
+            timeline_events_by_recipe=self.timeline_events_by_recipe,
+            lookback_weeks=1000,
+        )
+
+    def server(self):
+        """A FakeMealie serving this fixture, started on first use and pointed at by meal_plan."""
+        if self._server is None:
+            self._server = FakeMealie(self.recipes, self.meal_plans, self.timeline_events).start()
+            config.override(MEALIE_SERVER=self._server.url)
+        return self._server
+
+    def close(self):
+        if self._server is not None:
+            self._server.stop()
+            self._server = None
+
+    def partial_plan(self, days=6):
+        """A plan a few days into the week, so rolling rules have something to look at."""
+        rng = random.Random(self.seed)
+        plan = []
+        for i, recipe in enumerate(rng.sample(self.recipes, k=min(days, len(self.recipes)))):
+            plan.append({
+                "date": (ANCHOR_DATE + datetime.timedelta(days=i)).isoformat(),
+                "entryType": "dinner",
+                "recipeId": recipe["id"],
+                "tags": recipe.get("tags", []),
+                "name": recipe["name"],
+            })
+        return plan
+
+
+def apply_rules(fixture):
+    rules = build_rules()
+    plan = fixture.partial_plan()
+    return lambda: apply_rules_with_backoff(rules, plan, fixture.recipes, ANCHOR_DATE, "dinner")
+
+
+def neglect_select(fixture):
+    strategy = fixture.neglect_selection()
+    random.seed(fixture.seed)
+    return lambda: strategy.select(fixture.recipes)
+
+
+def generate_week(fixture):
+    def run():
+        random.seed(fixture.seed)
+        return generate_meal_plan(fixture.recipes, build_post_selection_rules(), start_date=ANCHOR_DATE, days=7,
+                                  rules=build_rules(), meal_types=["dinner"],
+                                  selection_strategy=fixture.neglect_selection())
+    return run
+
+
+def three_meal_rules():
+    """build_rules for dinners, a lighter set for breakfast and lunch."""
+    light = [
+        ExcludeTag("allergen-nuts", hard=True, name="No Nuts"),
+        NoDuplicatesWithinDays(3, hard=False, priority=1, name="No Duplicates (3d)"),
+    ]
+    return {
+        "breakfast": light,
+        "lunch": light + [MaxTagPerWeek("chicken", max_count=3, hard=False, priority=3, name="Max 3 Chicken/Week")],
+        "dinner": build_rules(),
+    }
+
+
+def generate_three_meals(fixture):
+    def run():
+        random.seed(fixture.seed)
+        return generate_meal_plan(fixture.recipes, build_post_selection_rules(), start_date=ANCHOR_DATE, days=7,
+                                  meal_types=["breakfast", "lunch", "dinner"], rules_by_meal_type=three_meal_rules(),
+                                  selection_strategy=fixture.neglect_selection())
+    return run
+
+
+def iter_quarter(fixture):
+    def run():
+        random.seed(fixture.seed)
+        for _ in iter_meal_plan(fixture.recipes, build_post_selection_rules(), start_date=ANCHOR_DATE, days=91,
+                                rules=build_rules(), meal_types=["dinner"],
+                                selection_strategy=fixture.neglect_selection()):
+            pass
+    return run
+
+
+def fetch_recipes(fixture):
+    fixture.server()
+    return meal_plan.fetch_recipes
+
+
+def fetch_history(fixture):
+    fixture.server()
+    sample = fixture.recipes[:HISTORY_SAMPLE]
+
+    def run():
+        meal_plan.fetch_meal_plans_for_recipes(sample, lookback_weeks=1000)
+        meal_plan.fetch_timeline_events_for_recipes(sample, lookback_weeks=1000)
+    return run
+
+
+def push_week(fixture):
+    server = fixture.server()
+    plan = fixture.partial_plan(days=7)
+
+    def run():
+        meal_plan.push_meal_plan(plan)
+        del server.meal_plans[-len(plan):]
+    return run
+
+
+SCENARIOS = {
+    "apply_rules_with_backoff": apply_rules,
+    "neglect_selection.select": neglect_select,
+    "generate_meal_plan.week": generate_week,
+    "generate_meal_plan.three_meals": generate_three_meals,
+    "iter_meal_plan.quarter": iter_quarter,
+    "fetch_recipes": fetch_recipes,
+    "fetch_history": fetch_history,
+    "push_meal_plan.week": push_week,
+}
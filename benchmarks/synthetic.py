@@ -0,0 +1,185 @@
+"""
+Seeded generator of synthetic Mealie-shaped recipe libraries and histories.
+
+Everything here is deterministic for a given seed, so benchmark numbers are
+comparable between runs and between machines.
+"""
+import datetime
+import random
+import uuid
+
+# Fixed anchor so generated histories do not drift with the calendar.
+ANCHOR_DATE = datetime.date(2025, 1, 6)
+
+# Relative frequencies, roughly what a home library tagged by organise_tags looks like.
+CUISINE_WEIGHTS = {
+    "Italian": 18, "Indian": 14, "British": 12, "American": 11, "Chinese": 10, "Mexican": 9,
+    "French": 6, "Japanese": 6, "Middle Eastern": 5, "Greek": 4, "Spanish": 3, "Filipino": 2,
+}
+MEALTIME_WEIGHTS = {"Dinner": 55, "Lunch": 18, "Breakfast": 10, "Dessert": 7, "Side": 6, "Snack": 4}
+PROTEIN_WEIGHTS = {
+    "Chicken": 28, "Beef": 16, "Pork": 10, "Fish": 10, "Lamb": 5, "Tofu": 4,
+    "Lentils": 6, "Beans": 6, "None": 15,
+}
+CARB_WEIGHTS = {
+    "Rice": 22, "Pasta": 20, "Potatoes": 15, "Bread": 12, "Chips / Fries": 5,
+    "Couscous": 3, "Quinoa": 3, "None": 20,
+}
+# Free-form tags that sit alongside the taxonomy, with the chance of each appearing.
+EXTRA_TAG_RATES = {"allergen-nuts": 0.06, "vegetarian": 0.15, "quick": 0.2, "batch-cook": 0.08}
+TOOL_RATES = {"slow_cooker": 0.07, "instant_pot": 0.05, "oven": 0.45, "wok": 0.1}
+
+DISHES = ["Curry", "Pie", "Stew", "Salad", "Bake", "Stir Fry", "Soup", "Tacos", "Risotto",
+          "Burger", "Roast", "Noodles", "Pasta", "Wrap", "Omelette", "Traybake", "Kebab"]
+ADJECTIVES = ["Spicy", "Creamy", "Smoky", "Lemon", "Garlic", "Herby", "Sticky", "Crispy",
+              "Quick", "Slow-Cooked", "Classic", "Zesty", "Honey", "Pepper", "Sesame"]
+
+
+def _slugify(name):
+    return name.casefold().replace(" / ", "-").replace(" ", "-")
+
+
+def _organizer(rng, name):
+    return {"id": str(uuid.UUID(int=rng.getrandbits(128), version=4)), "name": name, "slug": _slugify(name)}
+
+
+class _Vocabulary:
+    """Shared tag/tool objects so a large library does not hold millions of identical dicts."""
+
+    def __init__(self, rng):
+        names = (list(CUISINE_WEIGHTS) + list(MEALTIME_WEIGHTS) + list(PROTEIN_WEIGHTS)
+                 + list(CARB_WEIGHTS) + list(EXTRA_TAG_RATES))
+        self.tags = {n: _organizer(rng, n) for n in names if n != "None"}
+        self.tools = {n: _organizer(rng, n) for n in TOOL_RATES}
+        self.steps = [f"Step {i + 1}" for i in range(15)]
+
+
+def _weighted(rng, weights):
+    return rng.choices(list(weights), weights=list(weights.values()), k=1)[0]
+
+
+def iter_library(count, seed=0):
+    """
+    Yield `count` Mealie-shaped recipe dicts.
+
+    :param count: Number of recipes to generate
+    :param seed: Seed for the random generator; the same seed gives the same library
+    """
+    rng = random.Random(seed)
+    vocab = _Vocabulary(rng)
+    anchor = datetime.datetime.combine(ANCHOR_DATE, datetime.time(), datetime.timezone.utc)
+
+    for i in range(count):
+        name = f"{rng.choice(ADJECTIVES)} {_weighted(rng, CUISINE_WEIGHTS)} {rng.choice(DISHES)} #{i}"
+        tag_names = {
+            _weighted(rng, CUISINE_WEIGHTS),
+            _weighted(rng, MEALTIME_WEIGHTS),
+            _weighted(rng, CARB_WEIGHTS),
+            _weighted(rng, PROTEIN_WEIGHTS),
+        }
+        if rng.random() < 0.25:
+            tag_names.add(_weighted(rng, PROTEIN_WEIGHTS))
+        tag_names.update(t for t, rate in EXTRA_TAG_RATES.items() if rng.random() < rate)
+        tag_names.discard("None")
+
+        created = anchor - datetime.timedelta(days=rng.randint(0, 5 * 365))
+        last_made = None
+        if rng.random() < 0.6:
+            last_made = (anchor - datetime.timedelta(days=rng.randint(0, 365))).isoformat()
+
+        prep = rng.choice([5, 10, 15, 20, 30, 45, 60])
+        cook = rng.choice([0, 10, 20, 30, 45, 60, 90, 120, 240])
+        yield {
+            "id": str(uuid.UUID(int=rng.getrandbits(128), version=4)),
+            "slug": _slugify(name).replace("#", ""),
+            "name": name,
+            "description": f"A {name.lower()} recipe.",
+            "image": "".join(rng.choices("abcdef0123456789", k=4)),
+            "recipeYield": f"{rng.randint(1, 8)} servings",
+            "prepTime": f"{prep} minutes",
+            "totalTime": f"{prep + cook} minutes",
+            "prep_time_minutes": prep,
+            "cook_time_minutes": cook,
+            "steps": vocab.steps[:rng.randint(2, 12)],
+            "tags": [vocab.tags[t] for t in sorted(tag_names)],
+            "tools": [vocab.tools[t] for t, rate in TOOL_RATES.items() if rng.random() < rate],
+            "recipeCategory": [],
+            "rating": rng.choice([None, 3, 4, 5]),
+            "lastMade": last_made,
+            "dateAdded": created.date().isoformat(),
+            "createdAt": created.isoformat(),
+            "updatedAt": created.isoformat(),
+        }
+
+
+def generate_library(count, seed=0):
+    """Return a list of `count` synthetic recipes. See iter_library."""
+    return list(iter_library(count, seed))
+
+
+def generate_history(recipes, weeks=52, seed=0, meals_per_week=7, made_ratio=0.7):
+    """
+    Generate meal plan entries and "made" timeline events for the weeks before ANCHOR_DATE.
+
+    Popular recipes are planned more often than others, and only `made_ratio`
+    of plans turn into a timeline event, so NeglectSelection has something to work with.
+
+    :return: (meal_plans, timeline_events) in the shape Mealie returns them
+    """
+    rng = random.Random(seed)
+    meal_plans = []
+    timeline_events = []
+    if not recipes:
+        return meal_plans, timeline_events
+
+    # A small, stable "favourites" pool gets most of the plans.
+    favourites = rng.sample(recipes, k=min(len(recipes), max(10, len(recipes) // 20)))
+
+    for week in range(weeks, 0, -1):
+        week_start = ANCHOR_DATE - datetime.timedelta(weeks=week)
+        for day in range(meals_per_week):
+            recipe = rng.choice(favourites) if rng.random() < 0.7 else rng.choice(recipes)
+            date = week_start + datetime.timedelta(days=day % 7)
+            created = datetime.datetime.combine(date - datetime.timedelta(days=2), datetime.time(18),
+                                                datetime.timezone.utc)
+            meal_plans.append({
+                "id": len(meal_plans) + 1,
+                "date": date.isoformat(),
+                "entryType": "dinner",
+                "title": "",
+                "text": "",
+                "recipeId": recipe["id"],
+                "recipe": {"id": recipe["id"], "name": recipe["name"], "slug": recipe["slug"],
+                           "tags": recipe["tags"]},
+                "createdAt": created.isoformat(),
+                "updatedAt": created.isoformat(),
+            })
+            if rng.random() < made_ratio:
+                made_at = datetime.datetime.combine(date, datetime.time(20), datetime.timezone.utc)
+                timeline_events.append({
+                    "id": str(uuid.UUID(int=rng.getrandbits(128), version=4)),
+                    "recipeId": recipe["id"],
+                    "subject": f"Made {recipe['name']}",
+                    "eventType": "comment",
+                    "timestamp": made_at.isoformat(),
+                    "createdAt": made_at.isoformat(),
+                })
+
+    return meal_plans, timeline_events
+
+
+def history_by_recipe(recipes, meal_plans, timeline_events):
+    """
+    Group a generated history the way fetch_meal_plans_for_recipes and
+    fetch_timeline_events_for_recipes do: recipe name -> list of events.
+    """
+    names_by_id = {r["id"]: r["name"] for r in recipes}
+    meal_plans_by_recipe = {r["name"]: [] for r in recipes}
+    timeline_events_by_recipe = {r["name"]: [] for r in recipes}
+
+    for entry in meal_plans:
+        meal_plans_by_recipe[entry["recipe"]["name"]].append(entry)
+    for event in timeline_events:
+        timeline_events_by_recipe[names_by_id[event["recipeId"]]].append(event)
+
+    return meal_plans_by_recipe, timeline_events_by_recipe
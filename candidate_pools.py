@@ -0,0 +1,61 @@
+"""
+Per-meal-type candidate pools.
+
+The library is split once by meal time tag, and each meal type's hard,
+plan-independent rules run over its pool once. After that a slot only runs
+the remaining rules over its own meal type's recipes. A breakfast slot never
+scans the dinners, and a week of three meals a day costs about what a week of
+dinners does.
+"""
+
+
+class CandidatePools:
+    """
+    A recipe tagged with one or more meal times (e.g. "Breakfast", "Dinner") is a candidate only for those
+    meal types. A recipe with no meal time tag is a candidate for every meal type, as is every recipe for a
+    meal type that isn't a meal time.
+
+    :param rules: Rule set for meal types not in rules_by_meal_type
+    :param rules_by_meal_type: Meal type -> rule set for slots of that type
+    :param meal_times: The meal time tag names, e.g. Classifications.MEALTIME
+    """
+
+    def __init__(self, recipes, rules=None, rules_by_meal_type=None, meal_times=()):
+        self.recipes = recipes
+        self.rules = rules or []
+        self.rules_by_meal_type = rules_by_meal_type or {}
+        self.meal_times = {m.casefold() for m in meal_times if m and m != "None"}
+        self._pools = {}
+        self._recipe_meal_times = None
+
+    def rules_for(self, meal_type):
+        return self.rules_by_meal_type.get(meal_type, self.rules)
+
+    def slot_rules(self, meal_type):
+        """The rules that still run per slot: all but the hard, plan-independent ones already applied to the pool."""
+        return [r for r in self.rules_for(meal_type) if not (r.hard and r.plan_independent)]
+
+    def _meal_times_of(self):
+        if self._recipe_meal_times is None:
+            self._recipe_meal_times = [
+                {t["name"].casefold() for t in recipe.get("tags") or []} & self.meal_times for recipe in self.recipes
+            ]
+        return self._recipe_meal_times
+
+    def candidates(self, meal_type):
+        """The recipes slots of this meal type choose from, built on first use."""
+        pool = self._pools.get(meal_type)
+        if pool is None:
+            key = meal_type.casefold()
+            if key in self.meal_times:
+                pool = [r for r, tagged in zip(self.recipes, self._meal_times_of()) if not tagged or key in tagged]
+            else:
+                pool = list(self.recipes)
+            for rule in self.rules_for(meal_type):
+                if rule.hard and rule.plan_independent:
+                    pool = rule.apply([], pool)
+            self._pools[meal_type] = pool
+        return pool
+
+    def sizes(self):
+        return {meal_type: len(pool) for meal_type, pool in self._pools.items()}
@@ -0,0 +1,63 @@
+"""
+Append-only progress log for batch jobs that must survive being interrupted.
+
+Each processed item is written as one JSON line and flushed straight away, so
+after a crash, a rate limit or Ctrl-C the next run with the same file skips
+everything already done and carries on from there.
+"""
+import collections
+import json
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+# Items recorded with this status are skipped on resume; anything else (e.g. "failed") is retried.
+DONE = "done"
+
+
+class Checkpoint:
+    def __init__(self, path):
+        """
+        :param path: JSON lines file; created along with its directory if missing
+        """
+        self.path = path
+        self.statuses = {}
+        complete = True
+        if os.path.exists(path):
+            with open(path) as f:
+                for line_number, line in enumerate(f, 1):
+                    complete = line.endswith("\n")
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        # A line cut short by a crash; everything before it is still good.
+                        logger.warning(f"Ignoring unreadable line {line_number} of {path}")
+                        continue
+                    self.statuses[entry["key"]] = entry["status"]
+        else:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._file = open(path, "a")
+        if not complete:
+            self._file.write("\n")
+
+    def is_done(self, key):
+        return self.statuses.get(key) == DONE
+
+    def record(self, key, status=DONE, **details):
+        """Log the outcome for one item. Extra keyword arguments are stored alongside for reference."""
+        self.statuses[key] = status
+        self._file.write(json.dumps({"key": key, "status": status, **details}) + "\n")
+        self._file.flush()
+
+    def counts(self):
+        return dict(collections.Counter(self.statuses.values()))
+
+    def close(self):
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
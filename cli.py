@@ -0,0 +1,188 @@
+"""
+Command line entry point.
+
+    mealplan                    # plan next week (same as `mealplan plan`)
+    mealplan plan --push --metrics-file /var/lib/node_exporter/mealplan.prom
+    mealplan plan --days 91 --push --stream   # plan a quarter, pushing each entry as it is planned
+    mealplan tag                # classify and tag this month's recipes (keywords first, then OpenAI)
+    mealplan tag --all --untagged --checkpoint tag.log --push   # resumable backfill
+    mealplan create-tags        # create the Classifications tags in Mealie
+    mealplan daemon --schedule "sun 18:00"   # keep data warm and plan weekly / on demand
+    mealplan replan --slot 2025-09-03 --push # swap Wednesday's dinner in the stored plan
+    mealplan backtest --grid max_chicken=1,2,3   # compare rule settings over the last 26 weeks
+
+Each command imports what it needs when it runs, so `mealplan --help` is fast
+and does not need Mealie or OpenAI credentials.
+"""
+import argparse
+import datetime
+import sys
+
+from . import config, metrics
+
+
+def _use_history_db(args):
+    if args.history_db:
+        config.override(HISTORY_DB=args.history_db)
+
+
+def _plan(args):
+    _use_history_db(args)
+    from .meal_plan import plan_meals
+    plan_meals(dry_run=args.dry_run, metrics_file=args.metrics_file, metrics_format=args.metrics_format,
+               profile_file=args.profile_file, days=args.days, stream=args.stream)
+
+
+def _tag(args):
+    from .organise_tags import FIRST_OF_MONTH, tag_recipes
+    since = None if args.all else args.since or FIRST_OF_MONTH
+    metrics.instrumented_run(lambda: tag_recipes(dry_run=args.dry_run, min_confidence=args.min_confidence,
+                                                 since=since, untagged=args.untagged,
+                                                 checkpoint_file=args.checkpoint))
+
+
+def _create_tags(args):
+    from .create_tags import main as create_tags
+    create_tags()
+
+
+def _daemon(args):
+    from .daemon import PlannerDaemon, WarmCache, parse_schedule
+    from .meal_plan import build_rules
+    schedule = parse_schedule(args.schedule) if args.schedule else None
+    cache = WarmCache(rules=build_rules(), full_refresh_every=args.full_refresh_every)
+    daemon = PlannerDaemon(cache,
+                           refresh_interval=args.refresh_minutes * 60, schedule=schedule,
+                           host=args.host, port=None if args.no_http else args.port, dry_run=args.dry_run,
+                           metrics_file=args.metrics_file, metrics_format=args.metrics_format)
+    try:
+        daemon.serve_forever()
+    except KeyboardInterrupt:
+        daemon.stop()
+
+
+def _replan(args):
+    _use_history_db(args)
+    from .replan import PushError, replan
+    try:
+        metrics.instrumented_run(lambda: replan(args.slot, dry_run=args.dry_run))
+    except PushError as e:
+        sys.exit(f"mealplan: {e}")
+
+
+def _backtest(args):
+    _use_history_db(args)
+    from .backtest import backtest
+    metrics.instrumented_run(lambda: backtest(grid=args.grid, weeks=args.weeks, workers=args.workers, seed=args.seed,
+                                              synthetic=args.synthetic, output=args.output))
+
+
+def _slot(text):
+    """Parse DATE or DATE:MEAL_TYPE into (datetime.date, meal_type)."""
+    date, _, meal_type = text.partition(":")
+    try:
+        return datetime.date.fromisoformat(date), meal_type or "dinner"
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected YYYY-MM-DD or YYYY-MM-DD:meal_type, got {text!r}")
+
+
+def _add_dry_run(parser):
+    group = parser.add_mutually_exclusive_group()
+    group.add_argument("--dry-run", dest="dry_run", action="store_const", const=True,
+                       help="Don't write anything to Mealie (the default unless DRY_RUN=False)")
+    group.add_argument("--push", dest="dry_run", action="store_const", const=False,
+                       help="Write the result to Mealie")
+    parser.set_defaults(dry_run=None)
+
+
+def _add_history_db(parser):
+    parser.add_argument("--history-db", help="Keep meal plan/timeline history in this SQLite file and sync it "
+                                             "incrementally instead of re-fetching it (default: HISTORY_DB)")
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="mealplan", description="Rule based meal planning for Mealie.")
+    commands = parser.add_subparsers(dest="command")
+
+    plan = commands.add_parser("plan", help="Generate next week's meal plan (default)")
+    _add_dry_run(plan)
+    plan.add_argument("--metrics-file", help="Write run metrics here (.prom for Prometheus textfile, else JSON)")
+    plan.add_argument("--metrics-format", choices=["json", "prometheus"])
+    plan.add_argument("--profile-file", help="Dump cProfile stats for the run here")
+    plan.add_argument("--days", type=int, default=7, help="How many days to plan from next Monday (default 7)")
+    plan.add_argument("--stream", action="store_true",
+                      help="Push each entry as soon as it is planned instead of the whole plan at the end")
+    _add_history_db(plan)
+    plan.set_defaults(handler=_plan)
+
+    tag = commands.add_parser("tag", help="Classify recipes and tag them in Mealie")
+    _add_dry_run(tag)
+    tag.add_argument("--min-confidence", type=float,
+                     help="Keyword classifier confidence (0-1) needed to skip OpenAI; 1 always asks OpenAI "
+                          "(default: CLASSIFIER_MIN_CONFIDENCE or 0.65)")
+    window = tag.add_mutually_exclusive_group()
+    window.add_argument("--since", type=datetime.date.fromisoformat,
+                        help="Tag recipes created on or after YYYY-MM-DD (default: the first of this month)")
+    window.add_argument("--all", action="store_true", help="Tag recipes regardless of when they were created")
+    tag.add_argument("--untagged", action="store_true", help="Only recipes without a cuisine tag yet")
+    tag.add_argument("--checkpoint", help="Record progress here and resume from it when run again "
+                                          "(default: TAG_CHECKPOINT)")
+    tag.set_defaults(handler=_tag)
+
+    create_tags = commands.add_parser("create-tags", help="Create the Classifications tags in Mealie")
+    create_tags.set_defaults(handler=_create_tags)
+
+    daemon = commands.add_parser("daemon", help="Keep recipes and history warm and plan on a schedule or trigger")
+    _add_dry_run(daemon)
+    daemon.add_argument("--schedule", help="Plan automatically every week, e.g. 'sun 18:00'")
+    daemon.add_argument("--refresh-minutes", type=float, default=15, help="Minutes between incremental refreshes")
+    daemon.add_argument("--full-refresh-every", type=int, default=96,
+                        help="Re-download everything after this many incremental refreshes")
+    daemon.add_argument("--host", default="127.0.0.1")
+    daemon.add_argument("--port", type=int, default=8765, help="Port for POST /plan and GET /status")
+    daemon.add_argument("--no-http", action="store_true", help="Don't listen for HTTP triggers")
+    daemon.add_argument("--metrics-file", help="Write metrics for each plan here")
+    daemon.add_argument("--metrics-format", choices=["json", "prometheus"])
+    daemon.set_defaults(handler=_daemon)
+
+    replan = commands.add_parser("replan", help="Reselect individual slots of the plan stored in Mealie")
+    _add_dry_run(replan)
+    replan.add_argument("--slot", type=_slot, action="append", required=True,
+                        help="Slot to reselect, YYYY-MM-DD[:meal_type] (meal type defaults to dinner). Repeatable.")
+    _add_history_db(replan)
+    replan.set_defaults(handler=_replan)
+
+    backtest = commands.add_parser("backtest", help="Replay past weeks under different rule settings")
+    backtest.add_argument("--grid", action="append",
+                          help="Setting to vary, e.g. max_chicken=1,2,3. Repeatable; every combination is tried. "
+                               "One of no_duplicate_days, recently_made_days, max_chicken, max_indian, min_weight, "
+                               "half_life_weeks")
+    backtest.add_argument("--weeks", type=int, default=26, help="How many past weeks to replan")
+    backtest.add_argument("--workers", type=int, help="Processes to use (default: one per CPU)")
+    backtest.add_argument("--seed", type=int, default=0)
+    backtest.add_argument("--synthetic", type=int, metavar="RECIPES",
+                          help="Use a generated library of this size instead of Mealie and HISTORY_DB")
+    backtest.add_argument("--output", help="Also write the results here as JSON")
+    _add_history_db(backtest)
+    backtest.set_defaults(handler=_backtest)
+
+    return parser
+
+
+def main(argv=None):
+    parser = build_parser()
+    argv = sys.argv[1:] if argv is None else argv
+    if not argv or argv[0].startswith("-") and argv[0] not in ("-h", "--help"):
+        argv = ["plan", *argv]
+    args = parser.parse_args(argv)
+
+    config.configure_logging()
+    try:
+        args.handler(args)
+    except config.ConfigError as e:
+        parser.exit(2, f"mealplan: {e}\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
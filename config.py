@@ -0,0 +1,101 @@
+"""
+Lazily loaded configuration.
+
+Nothing is read at import time: the .env file is loaded the first time a
+setting is asked for, and missing settings only fail when something actually
+needs them, so tests and `--help` run without credentials.
+"""
+import logging
+import os
+
+_loaded = False
+_overrides = {}
+
+
+class ConfigError(RuntimeError):
+    pass
+
+
+def load():
+    """Load the .env file once. Later calls are free."""
+    global _loaded
+    if not _loaded:
+        from dotenv import load_dotenv
+        load_dotenv()
+        _loaded = True
+
+
+def get(name, default=None):
+    """Return a setting, preferring values passed to override() over the environment."""
+    if name in _overrides:
+        return _overrides[name]
+    load()
+    return os.getenv(name, default)
+
+
+def override(**values):
+    """Set settings for this process without touching os.environ, e.g. override(MEALIE_SERVER=url)."""
+    _overrides.update(values)
+
+
+def require(name):
+    value = get(name)
+    if not value:
+        raise ConfigError(f"{name} is not set. Add it to the environment or your .env file.")
+    return value
+
+
+def mealie_api_url():
+    return require("MEALIE_SERVER").rstrip("/") + "/api"
+
+
+def mealie_headers():
+    return {
+        "Authorization": f"Bearer {get('MEALIE_TOKEN')}",
+        "Content-Type": "application/json"
+    }
+
+
+_TRUE = {"true", "1", "yes", "on"}
+_FALSE = {"false", "0", "no", "off"}
+
+
+def parse_bool(value, name="value"):
+    """A bool from a bool or a string like "True", "false", "1" or "no"."""
+    if isinstance(value, bool):
+        return value
+    text = str(value).strip().casefold()
+    if text in _TRUE:
+        return True
+    if text in _FALSE:
+        return False
+    raise ConfigError(f"{name} must be true or false, got {value!r}")
+
+
+def dry_run(value=None):
+    """
+    Whether to leave Mealie untouched, as a bool: `value` if given (a bool or a string like "False"),
+    otherwise DRY_RUN, and True when neither is set.
+    """
+    if value is None:
+        value = get("DRY_RUN")
+    if value is None or value == "":
+        return True
+    return parse_bool(value, "DRY_RUN")
+
+
+def neglect_half_life_weeks():
+    """NEGLECT_HALF_LIFE_WEEKS as a number, or None to weigh all history in the lookback window equally."""
+    value = get("NEGLECT_HALF_LIFE_WEEKS")
+    return float(value) if value else None
+
+
+def configure_logging():
+    """Set up logging for command line use. Library imports leave logging alone."""
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+    prefix = f"{__package__}." if __package__ else ""
+    logging.getLogger(f"{prefix}rules").setLevel(get("LOG_LEVEL", "INFO"))
+    logging.getLogger(f"{prefix}selections").setLevel(get("LOG_LEVEL", "INFO"))
@@ -1,25 +1,14 @@
 # Create a default set of tags that we can use with organise_tags.py
 # Really the organise tags should automatically try and create the tag first and then push it in, but that sounds hard.
 
-import os
 import requests
-from classifications import Classifications
-from dotenv import load_dotenv
-
-load_dotenv()
-
-# ==============================
-# CONFIGURATION
-# ==============================
-MEALIE_URL = os.getenv("MEALIE_SERVER") + "/api"
-MEALIE_TOKEN = os.getenv("MEALIE_TOKEN")  # create this in Mealie settings
-
-headers = {"Authorization": f"Bearer {MEALIE_TOKEN}"}
+from . import config
+from .classifications import Classifications
 
 def create_tag(name: str):
-    url = f"{MEALIE_URL}/organizers/tags"
+    url = f"{config.mealie_api_url()}/organizers/tags"
     payload = {"name": name}
-    response = requests.post(url, headers=headers, json=payload)
+    response = requests.post(url, headers=config.mealie_headers(), json=payload)
     if response.status_code == 201:
         print(f"✅ Created tag: {name}")
     elif response.status_code == 409:
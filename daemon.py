@@ -0,0 +1,378 @@
+"""
+Long-running planner with a warm in-memory cache.
+
+The cron workflow re-downloads the whole library and its history every week.
+The daemon downloads it once, then keeps it current with small incremental
+fetches (recipes updated, meal plans and "made" events created since the last
+refresh), so producing a plan only costs rule filtering and selection. History
+is kept as one NeglectStats per recipe, which new events are folded into, not
+as the raw event lists.
+
+Plans are made on a weekly schedule and/or on demand:
+
+    curl -X POST localhost:8765/plan
+    curl -X POST localhost:8765/plan -d '{"dry_run": false}'
+    curl localhost:8765/status
+"""
+import datetime
+import json
+import logging
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from . import config, metrics
+from .meal_plan import (LOOKBACK_WEEKS, build_rules, build_query_filter, stream_recipes,
+                        fetch_meal_plans_for_recipes, fetch_timeline_events_for_recipes, fetch_meal_plans_since,
+                        fetch_timeline_events_since, plan_from_data)
+from .rules import ExcludeTag, IncludeTag
+from .selections import NeglectStats
+from .selections.neglect_stats import decay_weight
+
+logger = logging.getLogger(__name__)
+
+# Incremental fetches overlap the previous window by this much so clock skew between us and Mealie loses nothing.
+REFRESH_OVERLAP = datetime.timedelta(minutes=5)
+
+WEEKDAYS = ["mon", "tue", "wed", "thu", "fri", "sat", "sun"]
+
+
+def parse_schedule(text):
+    """Parse "sun 18:00" into (weekday index, datetime.time)."""
+    try:
+        day, clock = text.split()
+        weekday = WEEKDAYS.index(day.strip().lower()[:3])
+        hour, minute = (int(p) for p in clock.split(":"))
+        return weekday, datetime.time(hour, minute)
+    except ValueError:
+        raise ValueError(f"Invalid schedule {text!r}, expected e.g. 'sun 18:00'")
+
+
+def next_scheduled(schedule, now):
+    """The first datetime after `now` matching the (weekday, time) schedule."""
+    weekday, at = schedule
+    candidate = datetime.datetime.combine(now.date(), at) + datetime.timedelta(days=(weekday - now.weekday()) % 7)
+    if candidate <= now:
+        candidate += datetime.timedelta(days=7)
+    return candidate
+
+
+def _decayed(stats, factor):
+    return NeglectStats(stats.planned * factor, stats.made * factor, stats.last_planned, stats.last_made)
+
+
+class WarmCache:
+    """
+    Recipes, meal plan / timeline history and a tag index, kept in memory between plans.
+
+    :param rules: Only cache recipes that pass the hard, plan-independent ones of these rules. They are sent to
+        Mealie as a queryFilter on full downloads, and re-checked here for recipes changed since the last refresh,
+        so a recipe that gains an excluded tag is dropped straight away.
+    :param full_refresh_every: Re-download everything every N refreshes, to pick up deleted recipes
+    :param half_life_weeks: Decay history with this half-life; defaults to NEGLECT_HALF_LIFE_WEEKS
+    """
+
+    def __init__(self, rules=None, lookback_weeks=LOOKBACK_WEEKS, full_refresh_every=96, half_life_weeks=None):
+        self.prefilters = [r for r in rules or [] if r.hard and r.plan_independent]
+        self.query_filter = build_query_filter(self.prefilters)
+        self.lookback_weeks = lookback_weeks
+        self.full_refresh_every = full_refresh_every
+        self.half_life_weeks = half_life_weeks
+        self.lock = threading.RLock()
+        self.recipes_by_id = {}
+        # Recipe name -> NeglectStats, decayed to stats_as_of when a half-life is used.
+        self.stats_by_recipe = {}
+        self.stats_as_of = None
+        # Ids already counted, since refreshes overlap and fetch some events twice.
+        self.meal_plan_ids = set()
+        self.timeline_event_ids = set()
+        self.recipe_ids_by_tag = {}
+        self.last_refresh = None
+        self.refreshes = 0
+        self._candidates = {}
+
+    @property
+    def warm(self):
+        return self.last_refresh is not None
+
+    def _index_tags(self):
+        index = {}
+        for recipe_id, recipe in self.recipes_by_id.items():
+            for tag in recipe.get("tags", []):
+                index.setdefault(tag["name"].casefold(), set()).add(recipe_id)
+        self.recipe_ids_by_tag = index
+        self._candidates = {}
+
+    def warm_up(self):
+        """Download the library and all history. Slow; done once at startup."""
+        started = datetime.datetime.now(datetime.timezone.utc)
+        with metrics.stage("fetch_recipes"):
+            recipes = list(stream_recipes(query_filter=self.query_filter))
+        with metrics.stage("fetch_meal_plans"):
+            meal_plans_by_recipe = fetch_meal_plans_for_recipes(recipes, self.lookback_weeks)
+        with metrics.stage("fetch_timeline_events"):
+            timeline_events_by_recipe = fetch_timeline_events_for_recipes(recipes, self.lookback_weeks)
+
+        with self.lock:
+            self.recipes_by_id = {r["id"]: r for r in recipes}
+            if self.half_life_weeks is None:
+                self.half_life_weeks = config.neglect_half_life_weeks()
+            self.stats_by_recipe = {}
+            self.stats_as_of = started
+            self.meal_plan_ids = set()
+            self.timeline_event_ids = set()
+            self._fold(meal_plans_by_recipe, timeline_events_by_recipe, started)
+            self._index_tags()
+            self.last_refresh = started
+            self.refreshes = 0
+        logger.info(f"Cache warmed with {len(recipes)} recipes")
+
+    def refresh(self):
+        """Fetch only what changed since the last refresh."""
+        if not self.warm or (self.full_refresh_every and self.refreshes >= self.full_refresh_every):
+            return self.warm_up()
+
+        started = datetime.datetime.now(datetime.timezone.utc)
+        since = self.last_refresh - REFRESH_OVERLAP
+
+        with metrics.stage("refresh_recipes"):
+            # Not combined with query_filter: a cached recipe that stopped matching it must be seen to be evicted.
+            changed = list(stream_recipes(query_filter=f'updatedAt > "{since.isoformat()}"'))
+            keep = changed
+            for rule in self.prefilters:
+                keep = rule.apply([], keep)
+            keep_ids = {r["id"] for r in keep}
+        with self.lock:
+            for recipe in changed:
+                if recipe["id"] in keep_ids:
+                    self.recipes_by_id[recipe["id"]] = recipe
+                else:
+                    self.recipes_by_id.pop(recipe["id"], None)
+            if changed:
+                self._index_tags()
+            names_by_id = {recipe_id: r["name"] for recipe_id, r in self.recipes_by_id.items()}
+
+        with metrics.stage("refresh_meal_plans"):
+            new_plans = fetch_meal_plans_since(since)
+        with metrics.stage("refresh_timeline_events"):
+            new_events = fetch_timeline_events_since(since, names_by_id)
+
+        with self.lock:
+            added_plans, added_events = self._fold(new_plans, new_events, started)
+            self.last_refresh = started
+            self.refreshes += 1
+        logger.info(f"Cache refreshed: {len(changed)} recipes changed, {added_plans} meal plans and "
+                    f"{added_events} timeline events added")
+
+    def _age_factor(self, now):
+        """How much stats as of stats_as_of are worth at `now`: decay is exponential, so one factor ages every sum."""
+        if not self.half_life_weeks or not self.stats_as_of or now <= self.stats_as_of:
+            return 1.0
+        return 0.5 ** ((now - self.stats_as_of).total_seconds() / (7 * 24 * 3600) / self.half_life_weeks)
+
+    def _fold(self, meal_plans_by_recipe, timeline_events_by_recipe, now):
+        """
+        Add meal plans and made events not seen before to stats_by_recipe, weighed as of `now`.
+        Call with the lock held. Returns (meal plans added, timeline events added).
+        """
+        factor = self._age_factor(now)
+        if factor != 1.0:
+            self.stats_by_recipe = {name: _decayed(stats, factor) for name, stats in self.stats_by_recipe.items()}
+        self.stats_as_of = max(now, self.stats_as_of)
+
+        added = []
+        for events_by_recipe, seen, kind, time_field in (
+            (meal_plans_by_recipe, self.meal_plan_ids, "planned", "date"),
+            (timeline_events_by_recipe, self.timeline_event_ids, "made", "timestamp"),
+        ):
+            count = 0
+            for name, events in events_by_recipe.items():
+                for event in events:
+                    if event.get("id") is not None and event["id"] in seen:
+                        continue
+                    seen.add(event.get("id"))
+                    when = event.get(time_field) or event.get("createdAt")
+                    stats = self.stats_by_recipe.setdefault(name, NeglectStats())
+                    weight = decay_weight(when, self.half_life_weeks, now) if self.half_life_weeks else 1
+                    setattr(stats, kind, getattr(stats, kind) + weight)
+                    if when and (getattr(stats, f"last_{kind}") or "") < when:
+                        setattr(stats, f"last_{kind}", when)
+                    count += 1
+            added.append(count)
+        return tuple(added)
+
+    def neglect_stats(self, now=None):
+        """A copy of stats_by_recipe weighed as of `now` (default: the last refresh), for NeglectSelection."""
+        with self.lock:
+            factor = self._age_factor(now) if now else 1.0
+            return {name: _decayed(stats, factor) for name, stats in self.stats_by_recipe.items()}
+
+    def candidates(self, rules):
+        """
+        The recipes that can pass the hard tag rules, looked up in the tag index.
+        Other rules still run in the planner; this only shrinks the pool they run over.
+        """
+        include = sorted(r.tag for r in rules if r.hard and isinstance(r, IncludeTag))
+        exclude = sorted(r.tag for r in rules if r.hard and isinstance(r, ExcludeTag))
+        key = (tuple(include), tuple(exclude))
+
+        with self.lock:
+            cached = self._candidates.get(key)
+            metrics.record_cache("candidates", cached is not None)
+            if cached is not None:
+                return cached
+
+            ids = set(self.recipes_by_id)
+            for tag in include:
+                ids &= self.recipe_ids_by_tag.get(tag, set())
+            for tag in exclude:
+                ids -= self.recipe_ids_by_tag.get(tag, set())
+            pool = [r for recipe_id, r in self.recipes_by_id.items() if recipe_id in ids]
+            self._candidates[key] = pool
+            return pool
+
+    def status(self):
+        with self.lock:
+            return {
+                "recipes": len(self.recipes_by_id),
+                "meal_plans": len(self.meal_plan_ids),
+                "timeline_events": len(self.timeline_event_ids),
+                "tags": len(self.recipe_ids_by_tag),
+                "last_refresh": self.last_refresh.isoformat() if self.last_refresh else None,
+                "refreshes_since_full": self.refreshes,
+            }
+
+
+class PlannerDaemon:
+    """
+    :param refresh_interval: Seconds between incremental cache refreshes
+    :param schedule: Optional (weekday, time) from parse_schedule to plan automatically
+    :param port: Port for the local HTTP trigger; None to disable it
+    """
+
+    def __init__(self, cache=None, refresh_interval=900, schedule=None, host="127.0.0.1", port=8765,
+                 dry_run=None, metrics_file=None, metrics_format=None):
+        self.cache = cache or WarmCache(rules=build_rules())
+        self.refresh_interval = refresh_interval
+        self.schedule = schedule
+        self.dry_run = config.dry_run(dry_run)
+        self.metrics_file = metrics_file
+        self.metrics_format = metrics_format
+        self._stop = threading.Event()
+        self._plan_lock = threading.Lock()
+        self._httpd = ThreadingHTTPServer((host, port), self._handler_class()) if port is not None else None
+
+    def plan(self, dry_run=None):
+        """Produce a plan from the warm cache."""
+        dry_run = self.dry_run if dry_run is None else config.dry_run(dry_run)
+
+        def run():
+            # Take a consistent copy and let go of the lock, so refreshes aren't blocked while we plan and push.
+            with self.cache.lock:
+                metrics.record_cache("recipes", self.cache.warm)
+                recipes = list(self.cache.candidates(build_rules()))
+                stats_by_recipe = self.cache.neglect_stats(datetime.datetime.now(datetime.timezone.utc))
+            return plan_from_data(recipes, None, None, dry_run, stats_by_recipe=stats_by_recipe)
+
+        with self._plan_lock:
+            return metrics.instrumented_run(run, self.metrics_file, self.metrics_format)
+
+    def stop(self):
+        self._stop.set()
+        if self._httpd:
+            self._httpd.shutdown()
+
+    def start_http(self):
+        """Serve POST /plan and GET /status in a background thread. Returns the (host, port) listened on."""
+        threading.Thread(target=self._httpd.serve_forever, name="planner-http", daemon=True).start()
+        host, port = self._httpd.server_address[:2]
+        logger.info(f"Listening for plan triggers on http://{host}:{port}/plan")
+        return host, port
+
+    def serve_forever(self):
+        metrics.instrumented_run(self.cache.warm_up, self.metrics_file, self.metrics_format)
+
+        if self._httpd:
+            self.start_http()
+
+        next_refresh = time.monotonic() + self.refresh_interval
+        next_plan = next_scheduled(self.schedule, datetime.datetime.now()) if self.schedule else None
+        if next_plan:
+            logger.info(f"Next scheduled plan at {next_plan}")
+
+        while not self._stop.is_set():
+            waits = [next_refresh - time.monotonic()]
+            if next_plan:
+                waits.append((next_plan - datetime.datetime.now()).total_seconds())
+            if self._stop.wait(max(0.0, min(waits))):
+                break
+
+            if time.monotonic() >= next_refresh:
+                try:
+                    # Counted on their own, so a refresh never shows up in the metrics of a plan running meanwhile.
+                    with metrics.recording(metrics.RunMetrics()) as run:
+                        self.cache.refresh()
+                    logger.debug(f"Refresh metrics: {run.summary()}")
+                except Exception:
+                    logger.exception("Cache refresh failed; serving the previous data")
+                next_refresh = time.monotonic() + self.refresh_interval
+
+            if next_plan and datetime.datetime.now() >= next_plan:
+                try:
+                    self.plan()
+                except Exception:
+                    logger.exception("Scheduled plan failed")
+                next_plan = next_scheduled(self.schedule, datetime.datetime.now())
+                logger.info(f"Next scheduled plan at {next_plan}")
+
+        if self._httpd:
+            self._httpd.server_close()
+
+    def _handler_class(self):
+        daemon = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def _send(self, status, payload):
+                data = json.dumps(payload, default=str).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_GET(self):
+                if self.path.rstrip("/") == "/status":
+                    self._send(200, daemon.cache.status())
+                else:
+                    self._send(404, {"detail": "Not found"})
+
+            def do_POST(self):
+                if self.path.rstrip("/") != "/plan":
+                    self._send(404, {"detail": "Not found"})
+                    return
+                length = int(self.headers.get("Content-Length") or 0)
+                try:
+                    body = json.loads(self.rfile.read(length)) if length else {}
+                    dry_run = body.get("dry_run")
+                    if dry_run is not None:
+                        dry_run = config.dry_run(dry_run)
+                except (ValueError, AttributeError, config.ConfigError) as e:
+                    self._send(400, {"detail": f"Body must be a JSON object like {{\"dry_run\": true}}: {e}"})
+                    return
+                started = time.perf_counter()
+                try:
+                    plan = daemon.plan(dry_run=dry_run)
+                except ValueError as e:
+                    # No candidates left for a slot: the rules can't be satisfied with the current library.
+                    self._send(409, {"detail": str(e)})
+                    return
+                except Exception as e:
+                    logger.exception("Plan triggered over HTTP failed")
+                    self._send(500, {"detail": f"{type(e).__name__}: {e}"})
+                    return
+                self._send(200, {"plan": plan, "seconds": time.perf_counter() - started})
+
+            def log_message(self, format, *args):
+                logger.debug(format % args)
+
+        return Handler
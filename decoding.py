@@ -0,0 +1,57 @@
+"""
+Decoding of Mealie API responses.
+
+Responses are parsed with orjson when it is installed (pip install ".[fast]")
+and with the standard json module otherwise. Paginated responses can be
+projected down to the fields we actually read as each page is decoded, so
+descriptions, images, nutrition and the like are dropped with the page instead
+of staying alive in every item for the rest of the run.
+
+A projection is a tuple of field names, or a dict of field name -> projection
+for the fields whose value should be projected too (None keeps the value as
+is). A projection wrapped in a list applies to each element of a list field:
+
+    {"id": None, "name": None, "tags": [("id", "name", "slug")]}
+"""
+import json
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def loads(data):
+    """Parse JSON bytes or text with the fastest parser available."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def project(item, fields):
+    """A copy of a decoded object holding only the given fields (see the module docstring)."""
+    if isinstance(fields, tuple):
+        return {k: item[k] for k in fields if k in item}
+    projected = {}
+    for key, nested in fields.items():
+        if key not in item:
+            continue
+        value = item[key]
+        if isinstance(nested, list):
+            value = [project(element, nested[0]) for element in value or []]
+        elif nested is not None and value is not None:
+            value = project(value, nested)
+        projected[key] = value
+    return projected
+
+
+def decode_items(content, fields=None):
+    """
+    The "items" of a paginated Mealie response body, each projected to `fields` if given.
+
+    :param content: Response body (bytes), e.g. resp.content
+    """
+    items = loads(content).get("items", [])
+    if fields is None:
+        return items
+    return [project(item, fields) for item in items]
@@ -0,0 +1,283 @@
+"""
+Local SQLite copy of Mealie's meal plan and timeline history.
+
+The first sync downloads the whole history once, paging through all entries
+rather than querying per recipe. Later syncs only ask for what changed since
+the newest timestamp already stored, so the history cost of a run is
+proportional to new events. Deleted meal plans leave nothing to pull, so each
+sync also lists the meal plans of the last RECONCILE_WEEKS weeks and the future
+(Mealie has no way to ask for ids only, so these come in full) and drops stored
+ones that are gone; deletions further back are not noticed. NeglectSelection
+and RecentlyMadeRule are then fed from indexed, aggregated queries instead of
+fresh downloads.
+"""
+import datetime
+import logging
+import os
+import sqlite3
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meal_plans (
+    id TEXT PRIMARY KEY,
+    date TEXT NOT NULL,
+    entry_type TEXT,
+    recipe_id TEXT,
+    title TEXT,
+    updated_at TEXT
+);
+CREATE INDEX IF NOT EXISTS meal_plans_recipe ON meal_plans (recipe_id, date);
+
+CREATE TABLE IF NOT EXISTS timeline_events (
+    id TEXT PRIMARY KEY,
+    recipe_id TEXT,
+    event_type TEXT,
+    subject TEXT,
+    timestamp TEXT,
+    created_at TEXT
+);
+CREATE INDEX IF NOT EXISTS timeline_events_recipe ON timeline_events (event_type, recipe_id, timestamp);
+
+CREATE TABLE IF NOT EXISTS sync_state (
+    name TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+# Meal plans dated this many weeks back, and all future ones, are checked for deletions on every sync. Plans are
+# mostly removed or swapped around the weeks being planned, and listing the whole history would cost every run
+# as much as the first sync.
+RECONCILE_WEEKS = 4
+
+# Timeline events of this type count as "made"; same as fetch_timeline_events_for_recipes.
+MADE_EVENT_TYPE = "comment"
+
+
+class HistoryStore:
+    def __init__(self, path):
+        """
+        :param path: SQLite file; created along with its directory if missing. ":memory:" works for tests.
+        """
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.path = path
+        self.db = sqlite3.connect(path)
+        self.db.row_factory = sqlite3.Row
+        self.db.executescript(SCHEMA)
+
+    def close(self):
+        self.db.close()
+
+    # ----- sync state -----
+
+    def get_state(self, name):
+        row = self.db.execute("SELECT value FROM sync_state WHERE name = ?", (name,)).fetchone()
+        return row["value"] if row else None
+
+    def set_state(self, name, value):
+        self.db.execute("INSERT OR REPLACE INTO sync_state (name, value) VALUES (?, ?)", (name, value))
+
+    # ----- ingestion -----
+
+    def add_meal_plans(self, items):
+        """Insert or update Mealie meal plan items. Returns the newest updatedAt seen."""
+        newest = None
+        rows = []
+        for item in items:
+            updated = item.get("updatedAt") or item.get("createdAt")
+            newest = max(newest, updated) if newest and updated else (updated or newest)
+            rows.append((str(item["id"]), item["date"], item.get("entryType"), item.get("recipeId"),
+                         item.get("title"), updated))
+        self.db.executemany("INSERT OR REPLACE INTO meal_plans VALUES (?, ?, ?, ?, ?, ?)", rows)
+        return newest
+
+    def add_timeline_events(self, items):
+        """Insert or update Mealie timeline events. Returns the newest createdAt seen."""
+        newest = None
+        rows = []
+        for item in items:
+            created = item.get("createdAt") or item.get("timestamp")
+            newest = max(newest, created) if newest and created else (created or newest)
+            rows.append((str(item["id"]), item.get("recipeId"), item.get("eventType"), item.get("subject"),
+                         item.get("timestamp") or created, created))
+        self.db.executemany("INSERT OR REPLACE INTO timeline_events VALUES (?, ?, ?, ?, ?, ?)", rows)
+        return newest
+
+    def sync(self, iter_pages, api_url, reconcile_since=None):
+        """
+        Pull meal plans and timeline events changed since the last sync.
+
+        The high-water mark is inclusive: several entries can share a timestamp and a page may have ended
+        between them, so the entries at the mark are fetched again and deduplicated by id.
+
+        Deleting a meal plan in Mealie leaves nothing to pull, so the meal plans dated from `reconcile_since` on
+        are listed as well, and stored ones Mealie no longer has are dropped (see reconcile_meal_plans).
+
+        :param iter_pages: meal_plan.iter_pages, or anything with the same signature
+        :param api_url: Mealie API base URL
+        :param reconcile_since: First date (datetime.date) of the meal plans to reconcile; defaults to
+            RECONCILE_WEEKS weeks ago
+        :return: (meal plans added or updated, timeline events added)
+        """
+        counts = []
+        for name, endpoint, field, column, add in (
+            ("meal_plans", "/households/mealplans", "updatedAt", "updated_at", self.add_meal_plans),
+            ("timeline_events", "/recipes/timeline/events", "createdAt", "created_at", self.add_timeline_events),
+        ):
+            since = self.get_state(f"{name}.{field}")
+            params = {"orderBy": field, "orderDirection": "asc"}
+            if since:
+                params["queryFilter"] = f'{field} >= "{since}"'
+            count = 0
+            for items in iter_pages(f"{api_url}{endpoint}", params):
+                # Entries at the mark were stored last time unless they changed or are new.
+                count += len(items) - len(self._unchanged(name, column, items, field, since))
+                newest = add(items)
+                # Committing per page makes an interrupted first sync resumable.
+                if newest:
+                    self.set_state(f"{name}.{field}", newest)
+                self.db.commit()
+            counts.append(count)
+
+        if reconcile_since is None:
+            reconcile_since = datetime.date.today() - datetime.timedelta(weeks=RECONCILE_WEEKS)
+        removed = self.reconcile_meal_plans(iter_pages, api_url, reconcile_since)
+        logger.info(f"History synced: {counts[0]} meal plans and {counts[1]} timeline events new or changed, "
+                    f"{removed} deleted meal plans removed")
+        return tuple(counts)
+
+    def _unchanged(self, table, column, items, field, since):
+        """Ids of the items stored already with the same timestamp, among those stamped exactly `since`."""
+        if not since:
+            return set()
+        at_mark = {str(i["id"]) for i in items if i.get(field) == since}
+        if not at_mark:
+            return set()
+        placeholders = ", ".join("?" for _ in at_mark)
+        rows = self.db.execute(f"SELECT id FROM {table} WHERE {column} = ? AND id IN ({placeholders})",
+                               (since, *at_mark))
+        return {row["id"] for row in rows}
+
+    def reconcile_meal_plans(self, iter_pages, api_url, since):
+        """
+        Drop stored meal plans dated `since` or later that Mealie no longer returns. Costs a full listing of
+        those meal plans, so keep `since` recent.
+
+        :return: How many were dropped
+        """
+        present = set()
+        for items in iter_pages(f"{api_url}/households/mealplans", {"start_date": since.isoformat()},
+                                fields=("id",)):
+            present.update(str(item["id"]) for item in items)
+        stored = {row["id"] for row in self.db.execute("SELECT id FROM meal_plans WHERE date >= ?",
+                                                       (since.isoformat(),))}
+        gone = stored - present
+        self.db.executemany("DELETE FROM meal_plans WHERE id = ?", [(i,) for i in gone])
+        self.db.commit()
+        return len(gone)
+
+    # ----- queries -----
+
+    # Up to this many recipes are looked up through the recipe_id index; beyond that one scan is cheaper.
+    INDEXED_LOOKUP_LIMIT = 500
+
+    def _for_recipes(self, query, params, names_by_id):
+        if len(names_by_id) > self.INDEXED_LOOKUP_LIMIT:
+            return query, params
+        placeholders = ", ".join("?" for _ in names_by_id)
+        return f"{query} AND recipe_id IN ({placeholders})", params + tuple(names_by_id)
+
+    def meal_plans_by_recipe(self, recipes, since=None):
+        """Recipe name -> meal plan entries ({"id", "date", "entryType"}) for the given recipes."""
+        names_by_id = {r["id"]: r["name"] for r in recipes}
+        result = {name: [] for name in names_by_id.values()}
+        query = "SELECT id, recipe_id, date, entry_type FROM meal_plans WHERE recipe_id IS NOT NULL"
+        params = ()
+        query, params = self._for_recipes(query, params, names_by_id)
+        if since:
+            query += " AND date >= ?"
+            params += (since.isoformat(),)
+        for row in self.db.execute(query, params):
+            name = names_by_id.get(row["recipe_id"])
+            if name is not None:
+                result[name].append({"id": row["id"], "date": row["date"], "entryType": row["entry_type"]})
+        return result
+
+    def timeline_events_by_recipe(self, recipes, since=None, event_type=MADE_EVENT_TYPE):
+        """Recipe name -> timeline events ({"id", "timestamp"}) of one type for the given recipes."""
+        names_by_id = {r["id"]: r["name"] for r in recipes}
+        result = {name: [] for name in names_by_id.values()}
+        query = "SELECT id, recipe_id, timestamp FROM timeline_events WHERE event_type = ?"
+        params = (event_type,)
+        query, params = self._for_recipes(query, params, names_by_id)
+        if since:
+            query += " AND timestamp >= ?"
+            params += (since.isoformat(),)
+        for row in self.db.execute(query, params):
+            name = names_by_id.get(row["recipe_id"])
+            if name is not None:
+                result[name].append({"id": row["id"], "timestamp": row["timestamp"]})
+        return result
+
+    def neglect_stats(self, recipes, since=None, weight=None, event_type=MADE_EVENT_TYPE):
+        """
+        Recipe name -> (planned, made, last planned, last made) for the given recipes, aggregated in SQL.
+
+        :param since: Only count meal plans and events from this date/datetime on
+        :param weight: Optional timestamp -> float used to sum events instead of counting them (e.g. time decay)
+        """
+        names_by_id = {r["id"]: r["name"] for r in recipes}
+        amount = "SUM(event_weight({}))" if weight else "COUNT(*)"
+        if weight:
+            self.db.create_function("event_weight", 1, weight, deterministic=True)
+
+        query = f"SELECT recipe_id, {amount.format('date')} AS n, MAX(date) AS last FROM meal_plans " \
+                f"WHERE recipe_id IS NOT NULL"
+        query, params = self._for_recipes(query, (), names_by_id)
+        if since:
+            query += " AND date >= ?"
+            params += (since.isoformat()[:10],)
+        planned = self._grouped(query, params)
+
+        query = f"SELECT recipe_id, {amount.format('timestamp')} AS n, MAX(timestamp) AS last FROM timeline_events " \
+                f"WHERE event_type = ?"
+        query, params = self._for_recipes(query, (event_type,), names_by_id)
+        if since:
+            query += " AND timestamp >= ?"
+            params += (since.isoformat(),)
+        made = self._grouped(query, params)
+
+        result = {}
+        for recipe_id, name in names_by_id.items():
+            planned_count, last_planned = planned.get(recipe_id, (0, None))
+            made_count, last_made = made.get(recipe_id, (0, None))
+            result[name] = (planned_count, made_count, last_planned, last_made)
+        return result
+
+    def _grouped(self, query, params):
+        rows = self.db.execute(f"{query} GROUP BY recipe_id", params)
+        return {row["recipe_id"]: (row["n"], row["last"]) for row in rows}
+
+    def planned_dates(self):
+        """Recipe id -> sorted dates it was planned for, across the whole store."""
+        return self._sorted_by_recipe("SELECT recipe_id, date FROM meal_plans WHERE recipe_id IS NOT NULL "
+                                      "ORDER BY recipe_id, date", ())
+
+    def made_timestamps(self, event_type=MADE_EVENT_TYPE):
+        """Recipe id -> sorted timestamps of its "made" events, across the whole store."""
+        return self._sorted_by_recipe("SELECT recipe_id, timestamp FROM timeline_events WHERE event_type = ? "
+                                      "ORDER BY recipe_id, timestamp", (event_type,))
+
+    def _sorted_by_recipe(self, query, params):
+        result = {}
+        for recipe_id, value in self.db.execute(query, params):
+            result.setdefault(recipe_id, []).append(value)
+        return result
+
+    def last_made(self, event_type=MADE_EVENT_TYPE):
+        """Recipe id -> ISO timestamp of the most recent "made" event."""
+        rows = self.db.execute(
+            "SELECT recipe_id, MAX(timestamp) AS last FROM timeline_events WHERE event_type = ? GROUP BY recipe_id",
+            (event_type,))
+        return {row["recipe_id"]: row["last"] for row in rows}
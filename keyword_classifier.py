@@ -0,0 +1,182 @@
+"""
+Offline first pass for recipe classification.
+
+Scores each label of the Classifications taxonomy by keyword hits in a
+recipe's name, description, tags, ingredients and instructions. Each field
+gets a confidence; organise_tags only sends a recipe to the LLM when the
+weakest field is below its threshold, so obvious recipes ("Chicken Tikka
+Masala") are tagged without an API call.
+"""
+import re
+
+# Where a keyword is found changes how much it says about the recipe.
+SOURCE_WEIGHTS = {"name": 3.0, "tags": 3.0, "description": 1.0, "ingredients": 1.0, "instructions": 0.5}
+
+# Added to the total when turning scores into a confidence, so one weak hit is never "certain".
+SMOOTHING = 0.5
+
+# Confidence for the fallback label when nothing matched but we did see the ingredient list. It is a guess, so it
+# stays below organise_tags.DEFAULT_MIN_CONFIDENCE and a recipe with a guessed field still goes to the LLM.
+FALLBACK_CONFIDENCE = 0.5
+
+KEYWORDS = {
+    "cuisine": {
+        "Indian": ["curry", "tikka", "masala", "tandoori", "korma", "biryani", "dal", "dhal", "paneer", "naan",
+                   "vindaloo", "saag", "garam masala", "chana", "bhaji", "pakora", "samosa", "jalfrezi", "rogan josh"],
+        "Italian": ["pasta", "risotto", "lasagne", "lasagna", "pizza", "parmesan", "parmigiana", "carbonara",
+                    "bolognese", "gnocchi", "pesto", "mozzarella", "ragu", "focaccia", "arrabbiata", "cacciatore"],
+        "Chinese": ["stir fry", "stir-fry", "kung pao", "chow mein", "sweet and sour", "hoisin", "szechuan",
+                    "sichuan", "char siu", "dumpling", "fried rice", "five spice", "bok choy", "lo mein"],
+        "Mexican": ["taco", "burrito", "enchilada", "quesadilla", "fajita", "salsa", "guacamole", "chipotle",
+                    "tortilla", "nachos", "chilli con carne", "chili con carne", "jalapeno", "mole"],
+        "French": ["bourguignon", "coq au vin", "gratin", "ratatouille", "confit", "cassoulet", "quiche",
+                   "bearnaise", "provencal", "nicoise", "crepe", "dijon"],
+        "Japanese": ["teriyaki", "katsu", "ramen", "sushi", "miso", "udon", "soba", "tempura", "yakitori",
+                     "donburi", "gyoza", "mirin", "dashi"],
+        "Greek": ["souvlaki", "moussaka", "tzatziki", "gyro", "feta", "spanakopita", "kleftiko", "halloumi",
+                  "greek"],
+        "American": ["burger", "mac and cheese", "bbq", "barbecue", "pulled pork", "meatloaf", "buffalo",
+                     "cornbread", "sloppy joe", "cajun", "jambalaya", "hot dog"],
+        "Middle Eastern": ["shawarma", "falafel", "hummus", "tagine", "za'atar", "zaatar", "harissa", "kofta",
+                           "tabbouleh", "shakshuka", "sumac", "pomegranate molasses"],
+        "Filipino": ["adobo", "sinigang", "pancit", "lumpia", "sisig", "kare-kare", "lechon", "tinola"],
+        "British": ["shepherd's pie", "cottage pie", "toad in the hole", "fish and chips", "bangers", "pie and mash",
+                    "yorkshire", "sunday roast", "bubble and squeak", "ploughman", "scotch egg", "full english"],
+        "Spanish": ["paella", "chorizo", "tapas", "gazpacho", "patatas bravas", "tortilla espanola", "romesco",
+                    "albondigas", "manchego", "smoked paprika"],
+    },
+    "main_carb": {
+        "Rice": ["rice", "risotto", "biryani", "paella", "pilaf", "pilau", "arborio", "basmati", "jasmine rice",
+                 "donburi", "sushi"],
+        "Pasta": ["pasta", "spaghetti", "penne", "linguine", "fettuccine", "tagliatelle", "lasagne", "lasagna",
+                  "macaroni", "rigatoni", "orzo", "gnocchi", "ravioli", "tortellini", "noodle", "ramen", "udon",
+                  "soba", "chow mein", "lo mein", "pancit"],
+        "Bread": ["bread", "naan", "pitta", "pita", "flatbread", "toast", "bun", "wrap", "tortilla", "sourdough",
+                  "baguette", "ciabatta", "focaccia", "burger", "sandwich", "roti", "chapati", "pizza"],
+        "Potatoes": ["potato", "mash", "mashed", "jacket potato", "gratin", "hash brown", "roast potatoes",
+                     "shepherd's pie", "cottage pie", "patatas bravas"],
+        "Couscous": ["couscous"],
+        "Quinoa": ["quinoa"],
+        "Chips / Fries": ["chips", "fries", "wedges", "fish and chips"],
+    },
+    "main_protein": {
+        "Chicken": ["chicken", "poultry", "coq au vin", "tikka", "katsu"],
+        "Beef": ["beef", "steak", "mince", "bolognese", "brisket", "burger", "meatball", "bourguignon",
+                 "chilli con carne", "chili con carne", "cottage pie"],
+        "Pork": ["pork", "bacon", "ham", "sausage", "chorizo", "pancetta", "prosciutto", "pulled pork", "char siu",
+                 "lechon", "bangers"],
+        "Lamb": ["lamb", "mutton", "kleftiko", "rogan josh", "shepherd's pie"],
+        "Fish": ["fish", "salmon", "cod", "tuna", "haddock", "prawn", "shrimp", "mackerel", "sea bass", "trout",
+                 "sushi", "seafood", "mussels", "squid"],
+        "Tofu": ["tofu", "tempeh"],
+        "Lentils": ["lentil", "dal", "dhal"],
+        "Beans": ["bean", "chickpea", "chana", "falafel", "hummus", "edamame"],
+    },
+    "meal_time": {
+        "Breakfast": ["breakfast", "pancake", "porridge", "oats", "granola", "omelette", "omelet", "scrambled egg",
+                      "french toast", "waffle", "full english", "shakshuka", "muesli"],
+        "Lunch": ["lunch", "sandwich", "wrap", "soup", "salad bowl"],
+        "Dinner": ["dinner", "supper", "curry", "stew", "casserole", "roast", "lasagne", "lasagna", "pie",
+                   "risotto", "stir fry", "stir-fry", "bake", "traybake"],
+        "Side": ["side", "slaw", "coleslaw", "side salad", "garlic bread", "dip"],
+        "Dessert": ["dessert", "cake", "brownie", "cookie", "pudding", "tart", "cheesecake", "ice cream",
+                    "mousse", "crumble", "trifle", "tiramisu", "sorbet", "pavlova"],
+        "Snack": ["snack", "energy ball", "flapjack", "popcorn", "crisps", "bar"],
+    },
+}
+
+# What a field falls back to when no keyword matched, if the taxonomy has it.
+FALLBACK_LABELS = {"main_carb": "None", "main_protein": "None", "meal_time": "Dinner"}
+
+
+def recipe_texts(recipe):
+    """The text of each part of a Mealie recipe (summary or full), keyed like SOURCE_WEIGHTS."""
+    ingredients = []
+    for item in recipe.get("recipeIngredient") or recipe.get("ingredients") or []:
+        if isinstance(item, dict):
+            food = item.get("food") or {}
+            ingredients.append(" ".join(filter(None, (food.get("name"), item.get("note"), item.get("display")))))
+        else:
+            ingredients.append(str(item))
+
+    instructions = recipe.get("recipeInstructions") or recipe.get("instructions") or []
+    if isinstance(instructions, list):
+        instructions = " ".join(s.get("text", "") if isinstance(s, dict) else str(s) for s in instructions)
+
+    return {
+        "name": recipe.get("name") or "",
+        "tags": " ".join(t.get("name", "") for t in recipe.get("tags") or []),
+        "description": recipe.get("description") or "",
+        "ingredients": "\n".join(ingredients),
+        "instructions": instructions or "",
+    }, bool(ingredients)
+
+
+def _pattern(keywords):
+    alternatives = "|".join(re.escape(k) for k in sorted(keywords, key=len, reverse=True))
+    return re.compile(rf"\b(?:{alternatives})(?:e?s)?\b", re.IGNORECASE)
+
+
+class KeywordClassifier:
+    """
+    :param taxonomy: The Classifications class (or anything with CUISINES, CARBS, PROTEINS, MEALTIME)
+    :param keywords: Field -> label -> keywords, in addition to the label itself; labels not in the taxonomy
+        are ignored
+    """
+
+    def __init__(self, taxonomy, keywords=None):
+        allowed = {
+            "cuisine": taxonomy.CUISINES,
+            "main_carb": taxonomy.CARBS,
+            "main_protein": taxonomy.PROTEINS,
+            "meal_time": taxonomy.MEALTIME,
+        }
+        self.fallbacks = {field: label for field, label in FALLBACK_LABELS.items() if label in allowed[field]}
+        keywords = keywords or KEYWORDS
+        # Every label also matches its own name ("Mexican", "Rice"), which covers tags like the ones we apply.
+        self.patterns = {
+            field: {
+                label: _pattern([label, *keywords.get(field, {}).get(label, [])])
+                for label in labels if label != "None"
+            }
+            for field, labels in allowed.items()
+        }
+
+    def _scores(self, field, texts):
+        scores = {}
+        for label, pattern in self.patterns.get(field, {}).items():
+            score = sum(SOURCE_WEIGHTS[source] * len(pattern.findall(text)) for source, text in texts.items())
+            if score:
+                scores[label] = score
+        return scores
+
+    def classify(self, recipe):
+        """
+        :return: (classification, confidence) where classification has the same shape as the LLM answer
+            ({"cuisine", "main_carb", "main_protein": [...], "meal_time"}) and confidence (0..1) is that of the
+            least certain field
+        """
+        texts, saw_ingredients = recipe_texts(recipe)
+        classification = {}
+        confidences = {}
+
+        for field in ("cuisine", "main_carb", "main_protein", "meal_time"):
+            scores = self._scores(field, texts)
+            total = sum(scores.values())
+            if not scores:
+                label = self.fallbacks.get(field)
+                classification[field] = [label] if field == "main_protein" else label
+                confidences[field] = FALLBACK_CONFIDENCE if label and saw_ingredients else 0.0
+                continue
+
+            ranked = sorted(scores, key=scores.get, reverse=True)
+            if field == "main_protein":
+                # Several proteins are allowed; keep any that score at least half of the strongest.
+                chosen = [label for label in ranked if scores[label] * 2 >= scores[ranked[0]]]
+                classification[field] = chosen
+                confidences[field] = sum(scores[label] for label in chosen) / (total + SMOOTHING)
+            else:
+                classification[field] = ranked[0]
+                confidences[field] = scores[ranked[0]] / (total + SMOOTHING)
+
+        return classification, min(confidences.values())
@@ -1,33 +1,26 @@
-import os
 import requests
+import collections
 import datetime
 import logging
+from concurrent.futures import ThreadPoolExecutor
 from datetime import timezone, timedelta
 
-from dotenv import load_dotenv
+from . import config, metrics
 from .rules import ExcludeTag, MaxTagPerWeek, NoDuplicatesWithinDays, RecentlyMadeRule, WeekdayEasyRule, IncludeTag
-from .selections import RandomSelection, NeglectSelection, SelectionStrategy
+from .rules.base import max_lookback
+from .selections import RandomSelection, NeglectSelection, NeglectStats, SelectionStrategy, neglect_stats_by_recipe
+from .selections.neglect_stats import decay_weight
+from .candidate_pools import CandidatePools
+from .classifications import Classifications
 from .postselections import SkipDay
-
-load_dotenv()
+from .slots import SlotCalendar, iter_slots
+from .history_store import HistoryStore
+from .decoding import decode_items, project
 
 logger = logging.getLogger(__name__)
 
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
-
-logging.getLogger("rules").setLevel(os.getenv("LOG_LEVEL", "INFO"))
-logging.getLogger("selections").setLevel(os.getenv("LOG_LEVEL", "INFO"))
-
-API_URL = os.getenv("MEALIE_SERVER") + "/api"
-API_TOKEN =  os.getenv("MEALIE_TOKEN")
-
-headers = {
-    "Authorization": f"Bearer {API_TOKEN}",
-    "Content-Type": "application/json"
-}
+# How far back meal plan and timeline history is fetched for NeglectSelection
+LOOKBACK_WEEKS = 1000
 
 def apply_rules_with_backoff(rules, plan, candidates, date, meal_type):
     """Apply rules, relaxing soft ones if needed. Returns candidates and relaxed rules."""
@@ -58,24 +51,102 @@ def apply_rules_with_backoff(rules, plan, candidates, date, meal_type):
     return filtered, [r.name for r in soft_rules]
 
 
+def build_query_filter(rules):
+    """
+    Combine the queryFilter clauses of the hard rules that can run in Mealie, so recipes they would
+    remove are never downloaded. The rules still run client-side as well; this only shrinks the fetch.
+    """
+    clauses = [clause for clause in (r.query_filter() for r in rules if r.hard) if clause]
+    return " AND ".join(clauses) or None
+
+
 # -------------------------------
 # Core planner
 # -------------------------------
 
-def fetch_recipes():
-    recipes = []
-    url = f"{API_URL}/recipes"
-    page = 1
-    while True:
-        resp = requests.get(url, headers=headers, params={"page": page, "perPage": 50})
+# The fields of each Mealie object that the rules, selection strategies, history, logging and push read, as
+# projections for decoding.decode_items. Everything else is dropped as responses are decoded.
+ORGANIZER_FIELDS = ("id", "name", "slug")
+RECIPE_FIELDS = {
+    "id": None, "slug": None, "name": None, "tags": [ORGANIZER_FIELDS], "tools": [ORGANIZER_FIELDS], "lastMade": None,
+    "prep_time_minutes": None, "cook_time_minutes": None, "steps": None,
+}
+MEAL_PLAN_FIELDS = {
+    "id": None, "date": None, "entryType": None, "title": None, "text": None, "recipeId": None, "createdAt": None,
+    "updatedAt": None, "recipe": {"id": None, "name": None, "slug": None, "tags": [ORGANIZER_FIELDS]},
+}
+TIMELINE_EVENT_FIELDS = ("id", "recipeId", "eventType", "subject", "timestamp", "createdAt")
+
+def compact_recipe(recipe):
+    """A copy of a Mealie recipe holding only RECIPE_FIELDS, with tags and tools reduced to id/name/slug."""
+    return project(recipe, RECIPE_FIELDS)
+
+def iter_pages(url, params=None, per_page=50, prefetch=False, fields=None):
+    """
+    Yield the items of each page of a paginated Mealie endpoint until an empty page comes back.
+
+    :param prefetch: Request the next page in the background while the caller processes this one
+    :param fields: Project each item to these fields as it is decoded, e.g. RECIPE_FIELDS
+    """
+    headers = config.mealie_headers()
+    # Prefetched pages are fetched on another thread, which must still count into the caller's run.
+    run = metrics.current()
+
+    def get(page):
+        resp = requests.get(url, headers=headers, params={**(params or {}), "page": page, "perPage": per_page})
+        run.record_response(resp)
         resp.raise_for_status()
-        data = resp.json()
-        recipes.extend(data["items"])
-        if not data["items"]:
-            break
-        page += 1
+        return decode_items(resp.content, fields)
+
+    if not prefetch:
+        page = 1
+        while True:
+            items = get(page)
+            if not items:
+                break
+            yield items
+            page += 1
+        return
+
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        page = 1
+        pending = pool.submit(get, page)
+        while True:
+            items = pending.result()
+            if not items:
+                break
+            page += 1
+            pending = pool.submit(get, page)
+            yield items
+
+def fetch_recipes(query_filter=None):
+    """
+    Fetch every recipe, holding only RECIPE_FIELDS.
+
+    :param query_filter: Optional Mealie queryFilter, e.g. 'updatedAt > "2025-09-01T00:00:00"'
+    """
+    recipes = []
+    params = {"queryFilter": query_filter} if query_filter else None
+    for items in iter_pages(f"{config.mealie_api_url()}/recipes", params, fields=RECIPE_FIELDS):
+        recipes.extend(items)
     return recipes
 
+def stream_recipes(rules=None, query_filter=None):
+    """
+    Yield compact recipes that survive the hard, plan-independent rules, page by page as they arrive.
+
+    Only the survivors are kept (as compact_recipe copies), so memory is bounded by the candidate pool rather
+    than the raw library, and filtering a page overlaps with downloading the next one. Projecting after the
+    prefilter rather than while decoding skips copying the recipes the prefilter drops.
+    """
+    prefilters = [r for r in rules or [] if r.hard and r.plan_independent]
+    params = {"queryFilter": query_filter} if query_filter else None
+    for items in iter_pages(f"{config.mealie_api_url()}/recipes", params, prefetch=True):
+        for rule in prefilters:
+            items = rule.apply([], items)
+        for recipe in items:
+            yield compact_recipe(recipe)
+
 def fetch_meal_plans_for_recipes(recipes, lookback_weeks=8):
     """
     Fetch meal plans for all recipes.
@@ -83,7 +154,8 @@ def fetch_meal_plans_for_recipes(recipes, lookback_weeks=8):
     """
     meal_plans_by_recipe = {}
     cutoff_date = datetime.datetime.now(timezone.utc) - timedelta(weeks=lookback_weeks)
-    url = f"{API_URL}/households/mealplans"
+    url = f"{config.mealie_api_url()}/households/mealplans"
+    headers = config.mealie_headers()
     
     for recipe in recipes:
         recipe_name = recipe["name"]
@@ -97,8 +169,9 @@ def fetch_meal_plans_for_recipes(recipes, lookback_weeks=8):
         }
         
         resp = requests.get(url, headers=headers, params=params)
+        metrics.record_response(resp)
         resp.raise_for_status()
-        planned_events = resp.json().get("items", [])
+        planned_events = decode_items(resp.content, MEAL_PLAN_FIELDS)
         meal_plans_by_recipe[recipe_name] = planned_events
     
     return meal_plans_by_recipe
@@ -110,7 +183,8 @@ def fetch_timeline_events_for_recipes(recipes, lookback_weeks=8):
     """
     timeline_events_by_recipe = {}
     cutoff_date = datetime.datetime.now(timezone.utc) - timedelta(weeks=lookback_weeks)
-    url = f"{API_URL}/recipes/timeline/events"
+    url = f"{config.mealie_api_url()}/recipes/timeline/events"
+    headers = config.mealie_headers()
     
     for recipe in recipes:
         recipe_name = recipe["name"]
@@ -123,49 +197,141 @@ def fetch_timeline_events_for_recipes(recipes, lookback_weeks=8):
         }
         
         resp = requests.get(url, headers=headers, params=params)
+        metrics.record_response(resp)
         resp.raise_for_status()
-        events = resp.json().get("items", [])
+        events = decode_items(resp.content, TIMELINE_EVENT_FIELDS)
 
         timeline_events_by_recipe[recipe_name] = events
     
     return timeline_events_by_recipe
 
-def generate_meal_plan(recipes, post_selection_rules, start_date=datetime.date.today(), days=7, rules=None, meal_types=None,
-                       selection_strategy:SelectionStrategy=RandomSelection,
+def fetch_meal_plans_since(since):
+    """
+    Fetch meal plan entries created after `since` (an aware datetime) across all recipes.
+    Returns a dict mapping recipe names to lists of meal plan events, like fetch_meal_plans_for_recipes.
+    """
+    meal_plans_by_recipe = {}
+    params = {"orderDirection": "asc", "queryFilter": f'createdAt > "{since.isoformat()}"'}
+    for items in iter_pages(f"{config.mealie_api_url()}/households/mealplans", params, fields=MEAL_PLAN_FIELDS):
+        for entry in items:
+            recipe = entry.get("recipe")
+            if recipe:
+                meal_plans_by_recipe.setdefault(recipe["name"], []).append(entry)
+    return meal_plans_by_recipe
+
+def fetch_timeline_events_since(since, recipe_names_by_id):
+    """
+    Fetch "made" timeline events created after `since` across all recipes.
+    Returns a dict mapping recipe names to lists of timeline events, like fetch_timeline_events_for_recipes.
+    """
+    timeline_events_by_recipe = {}
+    params = {"orderDirection": "asc",
+              "queryFilter": f'eventType = "comment" AND createdAt > "{since.isoformat()}"'}
+    for items in iter_pages(f"{config.mealie_api_url()}/recipes/timeline/events", params,
+                            fields=TIMELINE_EVENT_FIELDS):
+        for event in items:
+            recipe_name = recipe_names_by_id.get(event.get("recipeId"))
+            if recipe_name:
+                timeline_events_by_recipe.setdefault(recipe_name, []).append(event)
+    return timeline_events_by_recipe
+
+def generate_meal_plan(recipes, post_selection_rules, start_date=None, days=7, rules=None, meal_types=None,
+                       selection_strategy:SelectionStrategy=RandomSelection, calendar=None, rules_by_meal_type=None
                        ):
+    """
+    Each slot chooses only from the recipes tagged with its meal time (or with no meal time tag), see CandidatePools.
+
+    :param calendar: Plan into this SlotCalendar instead of one built from start_date/days/meal_types;
+        afterwards its slots hold each entry and the rules relaxed for it
+    :param rules_by_meal_type: Meal type -> rule set, for meal types that need other rules than `rules`
+    """
+    if start_date is None:
+        start_date = datetime.date.today()
     if meal_types is None:
         meal_types = ["breakfast", "lunch", "dinner"]
 
-    plan = []
-
     rules = rules or []
 
-    skip_day_rules = [rule.get_day_index() for rule in post_selection_rules if rule.__class__ == SkipDay]
+    if calendar is None:
+        calendar = SlotCalendar(start_date, days, meal_types)
+    calendar.declare(post_selection_rules)
 
-    for i in range(days):
-        if skip_day_rules.__contains__(i):
-            logger.info(f"Skipping day because of PostSelection SkipDay rule")
-            continue
+    with metrics.stage("candidate_pools"):
+        pools = CandidatePools(recipes, rules, rules_by_meal_type, meal_times=Classifications.MEALTIME)
+        for meal_type in calendar.meal_types:
+            pools.candidates(meal_type)
+    logger.debug(f"Candidate pools: {pools.sizes()}")
 
-        date = start_date + datetime.timedelta(days=i)
+    for _ in _fill_slots(calendar.slots, pools, selection_strategy):
+        pass
 
-        for meal_type in meal_types:
-            candidates, relaxed = apply_rules_with_backoff(rules, plan, recipes, date, meal_type)
-            recipe = selection_strategy.select(candidates)
-            plan.append({
-                "date": date.isoformat(),
-                "entryType": meal_type,
-                "recipeId": recipe["id"],
-                "tags": recipe.get("tags", []),
-                "name": recipe["name"],
-            })
+    plan = calendar.to_plan()
+    with metrics.stage("post_selection"):
+        for post_selection_rule in post_selection_rules:
+            plan = post_selection_rule.apply(plan)
 
-            log_chosen_recipe(recipe, relaxed, date, meal_type)
+    return plan
 
-    for post_selection_rule in post_selection_rules:
-        plan = post_selection_rule.apply(plan)
+def iter_meal_plan(recipes, post_selection_rules, start_date=None, days=None, rules=None, meal_types=None,
+                   selection_strategy:SelectionStrategy=RandomSelection, rules_by_meal_type=None):
+    """
+    Like generate_meal_plan, but yields each plan entry as soon as its slot is filled, for `days` days or without
+    end if days is None.
 
-    return plan
+    Only the latest entries the rules look back over are kept, so memory stays constant over any horizon, and a
+    caller that stops early (e.g. with itertools.islice) never pays for the slots after it. Post-selection rules
+    declare each slot as it comes up and are applied to each entry on its own.
+    """
+    if start_date is None:
+        start_date = datetime.date.today()
+    if meal_types is None:
+        meal_types = ["breakfast", "lunch", "dinner"]
+
+    pools = CandidatePools(recipes, rules or [], rules_by_meal_type, meal_times=Classifications.MEALTIME)
+
+    def declared(slots):
+        for slot in slots:
+            for rule in post_selection_rules:
+                rule.declare(slot)
+            yield slot
+
+    for slot in _fill_slots(declared(iter_slots(start_date, days, meal_types)), pools, selection_strategy):
+        entries = [slot.to_entry()]
+        with metrics.stage("post_selection"):
+            for post_selection_rule in post_selection_rules:
+                entries = post_selection_rule.apply(entries)
+        yield from entries
+
+def _fill_slots(slots, pools, selection_strategy):
+    """Select a recipe for each open slot in turn, yielding every slot (skipped ones too) once it is done."""
+    rule_sets = [pools.rules, *pools.rules_by_meal_type.values()]
+    # What rules see: the latest recipes selected, in order, as many as the rules look back over (all of them
+    # if some rule may read the whole plan). Skipped slots never enter it.
+    recent = collections.deque(maxlen=max_lookback([rule for rule_set in rule_sets for rule in rule_set]))
+
+    for slot in slots:
+        if slot.skipped:
+            logger.info(f"{slot.date} {slot.meal_type}: skipped ({slot.title})")
+            yield slot
+            continue
+
+        with metrics.stage("rule_filtering"):
+            candidates, relaxed = apply_rules_with_backoff(pools.slot_rules(slot.meal_type), list(recent),
+                                                           pools.candidates(slot.meal_type), slot.date, slot.meal_type)
+        with metrics.stage("selection"):
+            recipe = selection_strategy.select(candidates)
+        slot.entry = {
+            "date": slot.date.isoformat(),
+            "entryType": slot.meal_type,
+            "recipeId": recipe["id"],
+            "tags": recipe.get("tags", []),
+            "name": recipe["name"],
+        }
+        slot.relaxed = relaxed
+        recent.append(slot.entry)
+
+        log_chosen_recipe(recipe, relaxed, slot.date, slot.meal_type)
+        yield slot
 
 def log_chosen_recipe(recipe, relaxed=None, date=None, meal_type=None):
     recipe_name = recipe.get("name", recipe["id"])
@@ -179,16 +345,23 @@ def log_chosen_recipe(recipe, relaxed=None, date=None, meal_type=None):
     else:
         logger.info(log)
 
+def create_meal_plan_entry(entry):
+    """POST one plan entry to Mealie. Returns the response; a 200 or 201 means it was stored."""
+    payload = {
+        k: entry[k]
+        for k in ("date", "entryType", "recipeId", "title", "text")
+        if k in entry and (k != "recipeId" or entry[k] is not None)
+    }
+    resp = requests.post(f"{config.mealie_api_url()}/households/mealplans", headers=config.mealie_headers(),
+                         json=payload)
+    metrics.record_response(resp)
+    return resp
+
 def push_meal_plan(plan):
     for entry in plan:
-        payload =  {
-            k: entry[k]
-            for k in ("date", "entryType", "recipeId", "title", "text")
-            if k in entry and (k != "recipeId" or entry[k] is not None)
-        }
-        resp = requests.post(f"{API_URL}/households/mealplans", headers=headers, json=payload)
+        resp = create_meal_plan_entry(entry)
         if resp.status_code not in (200, 201):
-            logger.info("Failed:", resp.text)
+            logger.info(f"Failed: {resp.text}")
 
 
 def next_monday():
@@ -199,48 +372,142 @@ def next_monday():
 
     return today + datetime.timedelta(days=days_ahead)
 
-def plan_meals(dry_run=os.getenv("DRY_RUN", True)):
-    recipes = fetch_recipes()
-    logger.info(f"Fetched {len(recipes)} recipes")
+def build_rules(last_made=None, as_of=None, no_duplicate_days=7, recently_made_days=14, max_chicken=2, max_indian=1):
+    """
+    The rule set used by plan_meals. The numeric settings are exposed for backtesting.
 
-    rules = [
+    :param last_made: Optional recipe id -> last made timestamp for RecentlyMadeRule (see load_history)
+    :param as_of: Evaluate recency as of this datetime instead of now
+    """
+    return [
         # Hard rules
         ExcludeTag("allergen-nuts", hard=True, name="No Nuts"),
         IncludeTag("dinner", hard=True, priority=2, name="Only Pick Dinners"),
 
         # Soft rules with priorities
         WeekdayEasyRule(),
-        RecentlyMadeRule(),
-        NoDuplicatesWithinDays(7, hard=False, priority=1, name="No Duplicates (7d)"),
-        MaxTagPerWeek("chicken", max_count=2, hard=False, priority=3, name="Max 2 Chicken/Week"),
-        MaxTagPerWeek("indian", max_count=1, hard=False, priority=3, name="Max 1 Indian/Week")
+        RecentlyMadeRule(days=recently_made_days, last_made=last_made, as_of=as_of,
+                         name=f"No Recently Made Meals in the last {recently_made_days} days"),
+        NoDuplicatesWithinDays(no_duplicate_days, hard=False, priority=1,
+                               name=f"No Duplicates ({no_duplicate_days}d)"),
+        MaxTagPerWeek("chicken", max_count=max_chicken, hard=False, priority=3,
+                      name=f"Max {max_chicken} Chicken/Week"),
+        MaxTagPerWeek("indian", max_count=max_indian, hard=False, priority=3, name=f"Max {max_indian} Indian/Week")
     ]
 
-    post_selection_rules = [
+def build_post_selection_rules():
+    """The post-selection rules used by plan_meals."""
+    return [
         SkipDay(day="Wednesday", reason="Eating at Perez's"),
     ]
 
+def plan_meals(dry_run=None, metrics_file=None, metrics_format=None, profile_file=None, days=7, stream=False):
+    """
+    :param dry_run: Don't push unless this is False (or "False"); defaults to DRY_RUN, which defaults to True
+    :param days: How many days to plan, starting next Monday
+    :param stream: Push each entry as soon as it is planned rather than the whole plan at the end
+    :param metrics_file: Write per-stage timings and request counts here at the end of the run; defaults to METRICS_FILE
+    :param metrics_format: "json" or "prometheus" (default: prometheus for *.prom, otherwise json)
+    :param profile_file: Dump cProfile stats for the whole run here; defaults to PROFILE_FILE
+    """
+    dry_run = config.dry_run(dry_run)
+    return metrics.instrumented_run(lambda: _plan_meals(dry_run, days, stream), metrics_file, metrics_format,
+                                    profile_file)
+
+def _plan_meals(dry_run, days=7, stream=False):
+    rules = build_rules()
+    query_filter = build_query_filter(rules)
+    with metrics.stage("fetch_recipes"):
+        recipes = list(stream_recipes(rules, query_filter))
+    logger.info(f"Fetched {len(recipes)} recipes" + (f" matching {query_filter}" if query_filter else ""))
+
     # Fetch data for NeglectSelection
-    lookback_weeks = 1000
     logger.info("Fetching meal plans and timeline events for neglect selection...")
-    meal_plans_by_recipe = fetch_meal_plans_for_recipes(recipes, lookback_weeks)
-    timeline_events_by_recipe = fetch_timeline_events_for_recipes(recipes, lookback_weeks)
+    stats_by_recipe, last_made = load_history(recipes)
     logger.info("Finished fetching meal plans and timeline events")
 
-    plan = generate_meal_plan(recipes, start_date=next_monday(), days=7, rules=rules, meal_types=["dinner"],
-                              selection_strategy=NeglectSelection(
-                                  meal_plans_by_recipe=meal_plans_by_recipe,
-                                  timeline_events_by_recipe=timeline_events_by_recipe,
-                                  lookback_weeks=lookback_weeks
-                              ),
-                              post_selection_rules = post_selection_rules)
+    return plan_from_data(recipes, None, None, dry_run, build_rules(last_made) if last_made else rules,
+                          stats_by_recipe=stats_by_recipe, days=days, stream=stream)
+
+def load_history(recipes, half_life_weeks=None):
+    """
+    Per-recipe NeglectStats for recipes.
+
+    With HISTORY_DB set, the local HistoryStore there is synced with what changed in Mealie since the last
+    run and aggregated in SQL; otherwise history is fetched from Mealie per recipe and aggregated here.
+
+    :param half_life_weeks: Time decay for the stats; defaults to NEGLECT_HALF_LIFE_WEEKS
+    :return: (stats_by_recipe, last_made) where last_made maps recipe id to the latest "made" timestamp,
+        or is None without a store
+    """
+    if half_life_weeks is None:
+        half_life_weeks = config.neglect_half_life_weeks()
+    path = config.get("HISTORY_DB")
+    if not path:
+        with metrics.stage("fetch_meal_plans"):
+            meal_plans_by_recipe = fetch_meal_plans_for_recipes(recipes, LOOKBACK_WEEKS)
+        with metrics.stage("fetch_timeline_events"):
+            timeline_events_by_recipe = fetch_timeline_events_for_recipes(recipes, LOOKBACK_WEEKS)
+        with metrics.stage("aggregate_history"):
+            stats_by_recipe = neglect_stats_by_recipe(meal_plans_by_recipe, timeline_events_by_recipe, half_life_weeks)
+        return stats_by_recipe, None
+
+    store = HistoryStore(path)
+    try:
+        now = datetime.datetime.now(timezone.utc)
+        since = now - timedelta(weeks=LOOKBACK_WEEKS)
+        with metrics.stage("sync_history"):
+            store.sync(iter_pages, config.mealie_api_url())
+        with metrics.stage("aggregate_history"):
+            weight = (lambda ts: decay_weight(ts, half_life_weeks, now)) if half_life_weeks else None
+            rows = store.neglect_stats(recipes, since=since, weight=weight)
+            return {name: NeglectStats(*row) for name, row in rows.items()}, store.last_made()
+    finally:
+        store.close()
+
+def plan_from_data(recipes, meal_plans_by_recipe, timeline_events_by_recipe, dry_run, rules=None,
+                   stats_by_recipe=None, days=7, stream=False):
+    """
+    Generate a plan from next Monday from already fetched data and push it unless this is a dry run.
+
+    The whole horizon is planned before anything is pushed, so a plan that fails part way (no candidates left
+    for a slot) leaves Mealie untouched. With stream=True, meant for long horizons, each entry is pushed as
+    soon as it is planned and then dropped, so memory stays flat however many days are planned; a failure
+    then leaves the entries before it in Mealie.
+
+    History is either the raw per-recipe event lists or, when given, stats_by_recipe (see load_history).
+
+    :return: The plan entries, or with stream=True just how many were planned
+    """
+    kwargs = dict(start_date=next_monday(), days=days, rules=rules or build_rules(), meal_types=["dinner"],
+                  selection_strategy=NeglectSelection(
+                      meal_plans_by_recipe=meal_plans_by_recipe,
+                      timeline_events_by_recipe=timeline_events_by_recipe,
+                      lookback_weeks=LOOKBACK_WEEKS,
+                      stats_by_recipe=stats_by_recipe,
+                      half_life_weeks=config.neglect_half_life_weeks()
+                  ))
+    if stream:
+        planned = 0
+        for entry in iter_meal_plan(recipes, build_post_selection_rules(), **kwargs):
+            planned += 1
+            if not dry_run:
+                with metrics.stage("push_meal_plan"):
+                    push_meal_plan([entry])
+        logger.info("Dry Run. Not Pushing" if dry_run else f"Pushed {planned} entries")
+        logger.info("Meal plan created.")
+        return planned
+
+    plan = generate_meal_plan(recipes, build_post_selection_rules(), **kwargs)
     logger.info(plan)
-    if not dry_run == "True":
-        push_meal_plan(plan)
+    if not dry_run:
+        with metrics.stage("push_meal_plan"):
+            push_meal_plan(plan)
     else:
         logger.info("Dry Run. Not Pushing")
     logger.info("Meal plan created.")
     return plan
 
 if __name__ == "__main__":
+    config.configure_logging()
     plan_meals()
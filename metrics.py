@@ -0,0 +1,227 @@
+"""
+Per-run timings and counters for plan_meals.
+
+Stages are timed with `with metrics.stage("fetch_recipes"):`; a stage entered
+more than once (e.g. rule filtering for each slot) accumulates. HTTP calls are
+recorded with `metrics.record_response(resp)` and caches with
+`metrics.record_cache(name, hit)`. At the end of a run the collected numbers
+can be written as JSON or as a Prometheus textfile.
+
+The run being recorded is per thread, so the daemon's refreshes and the plans
+triggered over HTTP never count into each other. Work handed to another thread
+records into the run it was started from by calling that RunMetrics directly.
+"""
+import cProfile
+import collections
+import contextlib
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class RunMetrics:
+    def __init__(self):
+        self.started_at = time.time()
+        self.stages = collections.OrderedDict()
+        self.stage_calls = collections.Counter()
+        self.requests = collections.Counter()
+        self.bytes_received = 0
+        self.bytes_sent = 0
+        self.cache_hits = collections.Counter()
+        self.cache_misses = collections.Counter()
+
+    @contextlib.contextmanager
+    def stage(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stages[name] = self.stages.get(name, 0.0) + time.perf_counter() - start
+            self.stage_calls[name] += 1
+
+    def record_response(self, resp):
+        """Count one HTTP round trip and the bytes it moved."""
+        request = resp.request
+        path = request.path_url.split("?", 1)[0] if request is not None else resp.url
+        self.requests[f"{request.method if request is not None else 'GET'} {path}"] += 1
+        self.bytes_received += len(resp.content or b"")
+        body = request.body if request is not None else None
+        if body:
+            self.bytes_sent += len(body)
+
+    def record_cache(self, name, hit):
+        if hit:
+            self.cache_hits[name] += 1
+        else:
+            self.cache_misses[name] += 1
+
+    def cache_hit_rate(self, name):
+        total = self.cache_hits[name] + self.cache_misses[name]
+        return self.cache_hits[name] / total if total else None
+
+    def as_dict(self):
+        caches = sorted(set(self.cache_hits) | set(self.cache_misses))
+        return {
+            "started_at": self.started_at,
+            "duration_seconds": time.time() - self.started_at,
+            "stages": {name: {"seconds": seconds, "calls": self.stage_calls[name]}
+                       for name, seconds in self.stages.items()},
+            "requests": dict(self.requests),
+            "total_requests": sum(self.requests.values()),
+            "bytes_received": self.bytes_received,
+            "bytes_sent": self.bytes_sent,
+            "caches": {name: {"hits": self.cache_hits[name], "misses": self.cache_misses[name],
+                              "hit_rate": self.cache_hit_rate(name)} for name in caches},
+        }
+
+    def to_json(self):
+        return json.dumps(self.as_dict(), indent=2)
+
+    def to_prometheus(self):
+        data = self.as_dict()
+        lines = [
+            "# HELP mealplan_last_run_timestamp_seconds Unix time the last planner run started.",
+            "# TYPE mealplan_last_run_timestamp_seconds gauge",
+            f"mealplan_last_run_timestamp_seconds {data['started_at']:.3f}",
+            "# HELP mealplan_run_duration_seconds Wall time of the last planner run.",
+            "# TYPE mealplan_run_duration_seconds gauge",
+            f"mealplan_run_duration_seconds {data['duration_seconds']:.6f}",
+            "# HELP mealplan_stage_seconds Time spent in each stage of the last run.",
+            "# TYPE mealplan_stage_seconds gauge",
+        ]
+        lines += [f'mealplan_stage_seconds{{stage="{name}"}} {s["seconds"]:.6f}' for name, s in data["stages"].items()]
+        lines += [
+            "# HELP mealplan_http_requests Mealie API requests made in the last run.",
+            "# TYPE mealplan_http_requests gauge",
+        ]
+        lines += [f'mealplan_http_requests{{endpoint="{endpoint}"}} {count}'
+                  for endpoint, count in sorted(data["requests"].items())]
+        lines += [
+            "# HELP mealplan_http_bytes Bytes moved to and from Mealie in the last run.",
+            "# TYPE mealplan_http_bytes gauge",
+            f'mealplan_http_bytes{{direction="received"}} {data["bytes_received"]}',
+            f'mealplan_http_bytes{{direction="sent"}} {data["bytes_sent"]}',
+        ]
+        if data["caches"]:
+            lines += [
+                "# HELP mealplan_cache_lookups Cache lookups in the last run.",
+                "# TYPE mealplan_cache_lookups gauge",
+            ]
+            for name, c in data["caches"].items():
+                lines.append(f'mealplan_cache_lookups{{cache="{name}",result="hit"}} {c["hits"]}')
+                lines.append(f'mealplan_cache_lookups{{cache="{name}",result="miss"}} {c["misses"]}')
+        return "\n".join(lines) + "\n"
+
+    def write(self, path, fmt=None):
+        """
+        Write the metrics to `path`, atomically so a textfile collector never sees half a file.
+
+        :param fmt: "json" or "prometheus"; guessed from the extension (.prom) when not given
+        """
+        fmt = fmt or ("prometheus" if path.endswith(".prom") else "json")
+        content = self.to_prometheus() if fmt == "prometheus" else self.to_json()
+        directory = os.path.dirname(os.path.abspath(path))
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".metrics-")
+        # mkstemp makes the file 0600, and a textfile collector usually runs as another user.
+        os.fchmod(fd, 0o644 & ~_umask())
+        with os.fdopen(fd, "w") as f:
+            f.write(content)
+        os.replace(tmp_path, path)
+        logger.info(f"Wrote {fmt} metrics to {path}")
+
+    def summary(self):
+        stages = ", ".join(f"{name}={seconds:.2f}s" for name, seconds in self.stages.items())
+        return (f"stages: [{stages}] requests: {sum(self.requests.values())} "
+                f"received: {self.bytes_received / 1024:.1f}KiB sent: {self.bytes_sent / 1024:.1f}KiB")
+
+
+_umask_lock = threading.Lock()
+
+
+def _umask():
+    # The only way to read the umask is to set it, so put it straight back.
+    with _umask_lock:
+        mask = os.umask(0o022)
+        os.umask(mask)
+    return mask
+
+
+# What is recorded outside of any run, e.g. by library use without instrumented_run.
+_default = RunMetrics()
+_local = threading.local()
+
+
+def current():
+    """The metrics of the run in progress on this thread."""
+    return getattr(_local, "run", None) or _default
+
+
+def start_run():
+    """Start a new run on this thread and return its metrics."""
+    _local.run = RunMetrics()
+    return _local.run
+
+
+@contextlib.contextmanager
+def recording(run):
+    """Record into `run` on this thread for the duration of the block."""
+    previous = getattr(_local, "run", None)
+    _local.run = run
+    try:
+        yield run
+    finally:
+        _local.run = previous
+
+
+def stage(name):
+    return current().stage(name)
+
+
+def record_response(resp):
+    current().record_response(resp)
+
+
+def record_cache(name, hit):
+    current().record_cache(name, hit)
+
+
+@contextlib.contextmanager
+def profiled(path=None):
+    """Run the block under cProfile and dump the stats to `path`. A no-op when path is empty."""
+    if not path:
+        yield
+        return
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield
+    finally:
+        profiler.disable()
+        profiler.dump_stats(path)
+        logger.info(f"Wrote cProfile stats to {path} (inspect with: python -m pstats {path})")
+
+
+def instrumented_run(fn, metrics_file=None, metrics_format=None, profile_file=None):
+    """
+    Call fn() as a fresh run: reset the metrics, optionally profile it, log a summary and
+    write the metrics file. File settings default to METRICS_FILE, METRICS_FORMAT and PROFILE_FILE.
+    """
+    from . import config
+
+    metrics_file = metrics_file or config.get("METRICS_FILE")
+    metrics_format = metrics_format or config.get("METRICS_FORMAT")
+    profile_file = profile_file or config.get("PROFILE_FILE")
+
+    run_metrics = RunMetrics()
+    try:
+        with recording(run_metrics), profiled(profile_file):
+            return fn()
+    finally:
+        logger.info(f"Run metrics: {run_metrics.summary()}")
+        if metrics_file:
+            run_metrics.write(metrics_file, metrics_format)
@@ -1,38 +1,39 @@
 import logging
-import os
 from datetime import datetime
 
 import requests
-from openai import OpenAI
-from dotenv import load_dotenv
+from . import config, metrics
+from .checkpoint import Checkpoint, DONE
 from .classifications import Classifications
+from .decoding import decode_items
+from .keyword_classifier import KeywordClassifier, recipe_texts
 
 # ==============================
 # CONFIGURATION
 # ==============================
 
-load_dotenv()
-
 logger = logging.getLogger(__name__)
 
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
-
-MEALIE_URL = os.getenv("MEALIE_SERVER") + "/api"
-MEALIE_TOKEN = os.getenv("MEALIE_TOKEN")
-OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
-
 # Which model to use
 OPENAI_MODEL = "gpt-4o-mini"
 
+# Recipes the keyword classifier is at least this confident about are not sent to the LLM.
+# Override with CLASSIFIER_MIN_CONFIDENCE; 1 sends everything to the LLM.
+DEFAULT_MIN_CONFIDENCE = 0.65
+
 # ==============================
 # INITIALIZE CLIENTS
 # ==============================
 
-client = OpenAI(api_key=OPENAI_API_KEY)
-headers = {"Authorization": f"Bearer {MEALIE_TOKEN}"}
+_client = None
+
+def get_client():
+    """Build the OpenAI client on first use; importing openai is slow and needs OPENAI_API_KEY."""
+    global _client
+    if _client is None:
+        from openai import OpenAI
+        _client = OpenAI(api_key=config.require("OPENAI_API_KEY"))
+    return _client
 
 
 PROMPT_SYSTEM = f"""
@@ -56,16 +57,20 @@ Always return JSON in this format:
 # FUNCTIONS
 # ==============================
 
+# What bulk-actions/tag needs of each tag; the rest of the organizer is dropped on decode.
+TAG_FIELDS = ("id", "name", "slug")
+
 def fetch_tags():
     """Fetch all tags from Mealie and return a lookup by lowercase name."""
-    url = f"{MEALIE_URL}/organizers/tags"
+    url = f"{config.mealie_api_url()}/organizers/tags"
+    headers = config.mealie_headers()
     tags = {}
     page = 1
     while True:
         r = requests.get(f"{url}?page={page}&perPage=100", headers=headers)
+        metrics.record_response(r)
         r.raise_for_status()
-        data = r.json()
-        items = data.get("items", [])
+        items = decode_items(r.content, TAG_FIELDS)
         if not items:
             break
         for t in items:
@@ -73,20 +78,118 @@ def fetch_tags():
         page += 1
     return tags
 
+# Default for tag_recipes(since=...): recipes created this month.
+FIRST_OF_MONTH = "first_of_month"
+
+def first_of_month():
+    return datetime.today().date().replace(day=1)
+
+def build_tagging_filter(since=None, untagged=False):
+    """
+    The recipes queryFilter selecting what a tagging run works on.
+
+    :param since: Only recipes created on or after this date; None for the whole library
+    :param untagged: Only recipes without a cuisine tag, i.e. never classified
+    """
+    clauses = []
+    if since:
+        clauses.append(f'createdAt >= "{since.isoformat()}"')
+    if untagged:
+        names = ", ".join(f'"{name}"' for name in Classifications.CUISINES)
+        clauses.append(f"tags.name NOT IN [{names}]")
+    return " AND ".join(clauses) or None
+
+def is_untagged(recipe):
+    cuisines = {name.lower() for name in Classifications.CUISINES}
+    return not any(tag["name"].lower() in cuisines for tag in recipe.get("tags") or [])
+
+def iter_recipe_pages(query_filter=None, shrinking=False, per_page=50):
+    """
+    Yield recipes matching query_filter a page at a time, oldest first, each recipe once.
+
+    :param shrinking: Recipes leave the filter once processed (tagging the untagged), so a page is
+        re-read until it holds nothing new rather than moving on and skipping what moved up into it
+    """
+    url = f"{config.mealie_api_url()}/recipes"
+    headers = config.mealie_headers()
+    params = {"orderBy": "createdAt", "orderDirection": "asc", "perPage": per_page}
+    if query_filter:
+        params["queryFilter"] = query_filter
+
+    seen = set()
+    page = 1
+    while True:
+        resp = requests.get(url, headers=headers, params={**params, "page": page})
+        metrics.record_response(resp)
+        resp.raise_for_status()
+        items = resp.json()["items"]
+        if not items:
+            return
+        fresh = [r for r in items if r["slug"] not in seen]
+        seen.update(r["slug"] for r in fresh)
+        if fresh:
+            yield fresh
+        if not (shrinking and fresh):
+            page += 1
+
 def fetch_recipes_since_first_of_month():
-    url = f"{MEALIE_URL}/recipes?queryFilter=createdAt>=\"{datetime.today().replace(day=1)}\""
-    response = requests.get(url, headers=headers)
-    response.raise_for_status()
-    return response.json()["items"]  # Mealie paginates results
+    return [recipe for page in iter_recipe_pages(build_tagging_filter(first_of_month())) for recipe in page]
 
-def classify_recipe(recipe):
+_local_classifier = None
+
+def get_local_classifier():
+    global _local_classifier
+    if _local_classifier is None:
+        _local_classifier = KeywordClassifier(Classifications)
+    return _local_classifier
+
+def fetch_recipe(slug):
+    """The full recipe, including the ingredients and instructions that list summaries leave out."""
+    resp = requests.get(f"{config.mealie_api_url()}/recipes/{slug}", headers=config.mealie_headers())
+    metrics.record_response(resp)
+    resp.raise_for_status()
+    return resp.json()
+
+def is_summary(recipe):
+    return "recipeIngredient" not in recipe and "ingredients" not in recipe
+
+def classify_recipe(recipe, min_confidence=None):
+    """
+    Classify with the offline keyword classifier, escalating to the LLM only when it isn't confident enough.
+
+    `recipe` may be a summary from the recipe list. Without ingredients the classifier can't be sure of the
+    fields nothing matched, so a summary it isn't confident about is fetched in full and classified again.
+    """
+    if min_confidence is None:
+        min_confidence = float(config.get("CLASSIFIER_MIN_CONFIDENCE", DEFAULT_MIN_CONFIDENCE))
+    classification, confidence = get_local_classifier().classify(recipe)
+    if confidence < min_confidence and is_summary(recipe) and recipe.get("slug"):
+        try:
+            recipe = fetch_recipe(recipe["slug"])
+        except requests.RequestException as e:
+            logger.info(f"Could not fetch {recipe['slug']} in full, classifying the summary: {e}")
+        else:
+            classification, confidence = get_local_classifier().classify(recipe)
+    local = confidence >= min_confidence
+    metrics.record_cache("local_classifier", local)
+    if local:
+        logger.info(f"Classified {recipe['name']} locally (confidence {confidence:.2f})")
+        return classification
+    logger.info(f"Local confidence {confidence:.2f} for {recipe['name']} is below {min_confidence}, "
+                f"asking {OPENAI_MODEL}")
+    return classify_recipe_with_llm(recipe)
+
+def classify_recipe_with_llm(recipe):
+    # Read like the keyword classifier does, so a full Mealie recipe (recipeIngredient, recipeInstructions)
+    # reaches the model with its ingredients and instructions.
+    texts, _ = recipe_texts(recipe)
     recipe_text = f"""
-    Name: {recipe.get('name')}
-    Ingredients: {', '.join(recipe.get('ingredients', []))}
-    Instructions: {recipe.get('instructions')}
+    Name: {texts['name']}
+    Ingredients: {', '.join(texts['ingredients'].splitlines())}
+    Instructions: {texts['instructions']}
     """
 
-    response = client.chat.completions.create(
+    response = get_client().chat.completions.create(
         model=OPENAI_MODEL,
         messages=[
             {"role": "system", "content": PROMPT_SYSTEM},
@@ -117,18 +220,20 @@ def bulk_update_recipe_tags(recipe_slug, new_tag_names, tag_lookup):
 
     if not tag_objects:
         logger.info("⚠️ No valid tags to apply")
-        return
+        return False
 
-    url = f"{MEALIE_URL}/recipes/bulk-actions/tag"
+    url = f"{config.mealie_api_url()}/recipes/bulk-actions/tag"
     payload = {
         "recipes": [recipe_slug],
         "tags": tag_objects
     }
-    r = requests.post(url, headers=headers, json=payload)
+    r = requests.post(url, headers=config.mealie_headers(), json=payload)
+    metrics.record_response(r)
     if r.status_code == 200:
         logger.info(f"✅ Updated recipe '{recipe_slug}' with tags {[t['name'] for t in tag_objects]}")
-    else:
-        logger.info(f"❌ Failed to update recipe '{recipe_slug}': {r.text}")
+        return True
+    logger.info(f"❌ Failed to update recipe '{recipe_slug}': {r.text}")
+    return False
 
 def flatten(lst):
     for item in lst:
@@ -139,31 +244,71 @@ def flatten(lst):
 # ==============================
 # MAIN WORKFLOW
 # ==============================
-def tag_recipes(dry_run=os.getenv("DRY_RUN", True)):
+def tag_recipe(recipe, tag_lookup, dry_run, min_confidence=None, checkpoint=None):
+    """Classify one recipe and apply its tags, recording the outcome in the checkpoint if there is one."""
+    logger.info(f"Classifying recipe: {recipe['name']} (slug {recipe['slug']})")
+    classification = classify_recipe(recipe, min_confidence)
+    if not classification:
+        logger.info("Classification failed.")
+        if checkpoint:
+            checkpoint.record(recipe["slug"], "failed")
+        return
+
+    tags = [classification["cuisine"], classification["main_carb"],
+            *flatten(classification["main_protein"]), classification["meal_time"]]
+    logger.info(f"Suggested tags: {tags}")
+    if dry_run:
+        logger.info("Dry Run. Not Pushing Tags")
+        return
+    updated = bulk_update_recipe_tags(recipe["slug"], tags, tag_lookup)
+    if checkpoint:
+        checkpoint.record(recipe["slug"], DONE if updated else "failed", tags=tags)
+
+def tag_recipes(dry_run=None, min_confidence=None, since=FIRST_OF_MONTH, untagged=False, checkpoint_file=None):
+    """
+    Classify and tag recipes page by page.
+
+    :param min_confidence: Keyword classifier confidence needed to skip the LLM; defaults to
+        CLASSIFIER_MIN_CONFIDENCE or DEFAULT_MIN_CONFIDENCE
+    :param since: Only recipes created on or after this date (default: the first of this month); None for all
+    :param untagged: Only recipes that have no cuisine tag yet
+    :param checkpoint_file: Record each tagged recipe here and skip the ones already recorded, so an
+        interrupted run can be started again to resume; defaults to TAG_CHECKPOINT. Dry runs don't use it.
+    """
+    dry_run = config.dry_run(dry_run)
+    if since == FIRST_OF_MONTH:
+        since = first_of_month()
+    if checkpoint_file is None:
+        checkpoint_file = config.get("TAG_CHECKPOINT")
+    pushing = not dry_run
+
     logger.info("🔍 Fetching tag list from Mealie...")
     tag_lookup = fetch_tags()
 
-    recipes = fetch_recipes_since_first_of_month()
-    for recipe in recipes:
-        if not recipe:
-            logger.info("No recipes found in Mealie.")
-            return
-
-        logger.info(f"Classifying recipe: {recipe['name']} (slug {recipe['slug']})")
-        classification = classify_recipe(recipe)
-        if classification:
-            tags = [classification["cuisine"], classification["main_carb"],
-                    *flatten(classification["main_protein"]), classification["meal_time"]]
-            logger.info(f"AI suggests tags: {tags}")
-            if not dry_run == "True":
-                bulk_update_recipe_tags(recipe["slug"], tags, tag_lookup)
-            else:
-                logger.info("Dry Run. Not Pushing Tags")
-        else:
-            logger.info("Classification failed.")
+    query_filter = build_tagging_filter(since, untagged)
+    logger.info(f"Tagging recipes matching {query_filter}" if query_filter else "Tagging all recipes")
+    checkpoint = Checkpoint(checkpoint_file) if checkpoint_file and pushing else None
+    found = 0
+    try:
+        for recipes in iter_recipe_pages(query_filter, shrinking=untagged and pushing):
+            for recipe in recipes:
+                found += 1
+                if untagged and not is_untagged(recipe):
+                    continue
+                if checkpoint and checkpoint.is_done(recipe["slug"]):
+                    logger.debug(f"Skipping {recipe['slug']}, already tagged according to {checkpoint_file}")
+                    continue
+                tag_recipe(recipe, tag_lookup, dry_run, min_confidence, checkpoint)
+    finally:
+        if checkpoint:
+            logger.info(f"Checkpoint {checkpoint_file}: {checkpoint.counts()}")
+            checkpoint.close()
+    if not found:
+        logger.info("No recipes found in Mealie.")
 
 def main():
     tag_recipes()
 
 if __name__ == "__main__":
+    config.configure_logging()
     main()
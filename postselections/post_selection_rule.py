@@ -16,4 +16,11 @@ class PostSelectionRule:
 
     def _apply(self, plan):
         """Apply the rule to the plan."""
-        return NotImplemented
\ No newline at end of file
+        return NotImplemented
+
+    def declare(self, slot):
+        """
+        Called for every slot before selection starts. Rules that replace slots (e.g. with a note)
+        should mark them here with slot.skip(...) so no recipe is selected for them.
+        """
+        pass
\ No newline at end of file
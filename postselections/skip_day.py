@@ -1,3 +1,4 @@
+import datetime
 
 from .post_selection_rule import PostSelectionRule
 
@@ -24,15 +25,23 @@ class SkipDay(PostSelectionRule):
         self.day = day
         self.reason = reason
 
+    def declare(self, slot):
+        if slot.date.weekday() == self.get_day_index():
+            slot.skip(self.reason)
+
     def _apply(self, plan):
-        day_index = day_name_to_index(self.day)
-        plan[day_index] = {
-                "date": plan[day_index]["date"],
-                "entryType": plan[day_index]["entryType"],
+        """Replace every entry on this weekday with a note. Entries from skipped slots are already notes."""
+        day_index = self.get_day_index()
+        return [
+            {
+                "date": entry["date"],
+                "entryType": entry["entryType"],
                 "title": self.reason,
                 "text": "",
             }
-        return plan
+            if datetime.date.fromisoformat(entry["date"]).weekday() == day_index else entry
+            for entry in plan
+        ]
 
     def get_day_index(self):
-        return DAY_NAME_TO_INDEX[self.day.strip().lower()]
\ No newline at end of file
+        return day_name_to_index(self.day)
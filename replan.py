@@ -0,0 +1,191 @@
+"""
+Incremental replanning: swap out individual slots of an existing plan.
+
+Only the slots asked for are reselected. The rolling rule state for each one is
+rebuilt from the entries before it, history is fetched only for the recipes
+that can actually fill those slots, and only the changed entries are written
+back to Mealie.
+"""
+import datetime
+import logging
+
+import requests
+
+from . import config, metrics
+from .candidate_pools import CandidatePools
+from .classifications import Classifications
+from .meal_plan import (LOOKBACK_WEEKS, MEAL_PLAN_FIELDS, apply_rules_with_backoff, build_rules, build_query_filter,
+                        iter_pages, stream_recipes, fetch_meal_plans_for_recipes, fetch_timeline_events_for_recipes,
+                        load_history, log_chosen_recipe, create_meal_plan_entry)
+from .selections import NeglectSelection
+
+logger = logging.getLogger(__name__)
+
+MEAL_ORDER = ["breakfast", "lunch", "dinner", "side"]
+
+# Entries this many days either side of a replanned slot are loaded, which covers every rule's lookback.
+CONTEXT_DAYS = 7
+
+
+def _sort_key(entry):
+    entry_type = entry.get("entryType")
+    return entry["date"], MEAL_ORDER.index(entry_type) if entry_type in MEAL_ORDER else len(MEAL_ORDER)
+
+
+def entry_from_mealie(item):
+    """Turn a Mealie meal plan item into a plan entry like generate_meal_plan produces, keeping its id."""
+    entry = {"id": item.get("id"), "date": item["date"], "entryType": item.get("entryType", "dinner")}
+    recipe = item.get("recipe")
+    if item.get("recipeId") and recipe:
+        entry.update({"recipeId": item["recipeId"], "tags": recipe.get("tags", []), "name": recipe.get("name")})
+    else:
+        entry.update({"title": item.get("title", ""), "text": item.get("text", "")})
+    return entry
+
+
+def fetch_plan(start_date, end_date):
+    """The plan entries stored in Mealie between two dates (inclusive), in slot order."""
+    params = {"start_date": start_date.isoformat(), "end_date": end_date.isoformat()}
+    entries = []
+    for items in iter_pages(f"{config.mealie_api_url()}/households/mealplans", params, fields=MEAL_PLAN_FIELDS):
+        entries.extend(entry_from_mealie(item) for item in items)
+    return sorted(entries, key=_sort_key)
+
+
+def replan_slots(plan, slots, recipes, rules, selection_strategy):
+    """
+    Reselect the given slots of a plan, leaving every other entry untouched.
+
+    :param plan: Existing plan entries, in any order. Entries may carry a Mealie "id".
+    :param slots: (date, meal_type) pairs to reselect; dates are datetime.date
+    :param recipes: Candidate recipes
+    :param selection_strategy: A SelectionStrategy, or a callable candidates -> SelectionStrategy
+    :return: (new_plan, changes) where changes is a list of (old_entry or None, new_entry)
+    """
+    wanted = {(d.isoformat(), meal_type) for d, meal_type in slots}
+    new_plan = sorted(plan, key=_sort_key)
+    present = {(e["date"], e["entryType"]) for e in new_plan}
+    new_plan += [{"date": d, "entryType": meal_type} for d, meal_type in wanted - present]
+    new_plan.sort(key=_sort_key)
+
+    pools = CandidatePools(recipes, rules, meal_times=Classifications.MEALTIME)
+    changes = []
+    for i, old in enumerate(new_plan):
+        if (old["date"], old["entryType"]) not in wanted:
+            continue
+        date = datetime.date.fromisoformat(old["date"])
+
+        # Rules only ever look back, so their state is the recipes planned before this slot. Like
+        # generate_meal_plan, which plans a week from Monday, that starts at the slot's Monday.
+        week_start = (date - datetime.timedelta(days=date.weekday())).isoformat()
+        before = [e for e in new_plan[:i] if e.get("recipeId") and e["date"] >= week_start]
+        with metrics.stage("rule_filtering"):
+            candidates, relaxed = apply_rules_with_backoff(pools.slot_rules(old["entryType"]), before,
+                                                           pools.candidates(old["entryType"]), date, old["entryType"])
+
+        # A swap should change the meal, and not duplicate anything planned later in the week either.
+        elsewhere = {e.get("recipeId") for j, e in enumerate(new_plan) if j != i}
+        fresh = [c for c in candidates if c["id"] != old.get("recipeId") and c["id"] not in elsewhere]
+        candidates = fresh or candidates
+
+        strategy = selection_strategy(candidates) if callable(selection_strategy) else selection_strategy
+        with metrics.stage("selection"):
+            recipe = strategy.select(candidates)
+        new = {
+            "date": old["date"],
+            "entryType": old["entryType"],
+            "recipeId": recipe["id"],
+            "tags": recipe.get("tags", []),
+            "name": recipe["name"],
+        }
+        log_chosen_recipe(recipe, relaxed, date, old["entryType"])
+        new_plan[i] = new
+        changes.append((old if old.get("id") or old.get("recipeId") or old.get("title") else None, new))
+
+    return new_plan, changes
+
+
+class PushError(RuntimeError):
+    """Some changes could not be written to Mealie. `failed` holds (old, new, detail) for each."""
+
+    def __init__(self, failed, total):
+        self.failed = failed
+        super().__init__(f"{len(failed)} of {total} slots could not be replaced in Mealie: "
+                         + "; ".join(f"{new['date']} {new['entryType']}: {detail}" for _, new, detail in failed))
+
+
+def push_changes(changes):
+    """
+    Replace each changed entry in Mealie: create the new one, and only once that worked delete the old one
+    (if it was stored), so a failed request never leaves a slot empty.
+
+    :return: (old, new, detail) for each change that failed; empty if everything was written
+    """
+    url = f"{config.mealie_api_url()}/households/mealplans"
+    failed = []
+    for old, new in changes:
+        resp = create_meal_plan_entry(new)
+        if resp.status_code not in (200, 201):
+            failed.append((old, new, f"creating the new entry failed ({resp.status_code}): {resp.text}"))
+            continue
+        if old and old.get("id") is not None:
+            resp = requests.delete(f"{url}/{old['id']}", headers=config.mealie_headers())
+            metrics.record_response(resp)
+            if resp.status_code not in (200, 204):
+                failed.append((old, new, f"removing the old entry failed ({resp.status_code}): {resp.text}"))
+    return failed
+
+
+def replan(slots, dry_run=None):
+    """
+    Reselect `slots` ((date, meal_type) pairs) of the plan stored in Mealie and push just the changes.
+
+    :return: The changes as (old_entry or None, new_entry) pairs
+    """
+    dry_run = config.dry_run(dry_run)
+    rules = build_rules()
+
+    start = min(d for d, _ in slots) - datetime.timedelta(days=CONTEXT_DAYS)
+    end = max(d for d, _ in slots) + datetime.timedelta(days=CONTEXT_DAYS)
+    with metrics.stage("fetch_plan"):
+        plan = fetch_plan(start, end)
+    with metrics.stage("fetch_recipes"):
+        recipes = list(stream_recipes(rules, build_query_filter(rules)))
+
+    if config.get("HISTORY_DB"):
+        # The local store answers for every recipe at once, so there is nothing to save by narrowing.
+        stats_by_recipe, last_made = load_history(recipes)
+        rules = build_rules(last_made)
+        _, changes = replan_slots(plan, slots, recipes, rules,
+                                  NeglectSelection(lookback_weeks=LOOKBACK_WEEKS, stats_by_recipe=stats_by_recipe))
+        return _apply_changes(changes, dry_run)
+
+    history = ({}, {})
+
+    def neglect_for(candidates):
+        # Only the recipes that can fill these slots need history, not the whole library.
+        missing = [c for c in candidates if c["name"] not in history[0]]
+        if missing:
+            with metrics.stage("fetch_meal_plans"):
+                history[0].update(fetch_meal_plans_for_recipes(missing, LOOKBACK_WEEKS))
+            with metrics.stage("fetch_timeline_events"):
+                history[1].update(fetch_timeline_events_for_recipes(missing, LOOKBACK_WEEKS))
+        return NeglectSelection(history[0], history[1], lookback_weeks=LOOKBACK_WEEKS,
+                                half_life_weeks=config.neglect_half_life_weeks())
+
+    _, changes = replan_slots(plan, slots, recipes, rules, neglect_for)
+    return _apply_changes(changes, dry_run)
+
+
+def _apply_changes(changes, dry_run):
+    for old, new in changes:
+        was = (old or {}).get("name") or (old or {}).get("title") or "nothing"
+        logger.info(f"{new['date']} {new['entryType']}: {was} -> {new['name']}")
+    if not dry_run:
+        with metrics.stage("push_meal_plan"):
+            failed = push_changes(changes)
+        if failed:
+            raise PushError(failed, len(changes))
+    else:
+        logger.info("Dry Run. Not Pushing")
+    return changes
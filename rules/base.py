@@ -1,8 +1,30 @@
 import logging
+import re
 
 logger = logging.getLogger(__name__)
 
+
+def tag_slug(tag):
+    """
+    Mealie's slug for a tag name, or None if we can't be sure of it.
+
+    Mealie slugifies with python-slugify, which also transliterates unicode ("Crème" -> "creme"), drops
+    apostrophes and decodes HTML entities. Plain ASCII without ' or & comes out the same as lowercasing and
+    turning runs of other characters into '-', so only those names get a slug; a rule that pushed down a
+    wrong one would match nothing (or exclude nothing) in Mealie.
+    """
+    if not tag.isascii() or "'" in tag or "&" in tag:
+        return None
+    return re.sub(r"[^a-z0-9]+", "-", tag.casefold()).strip("-")
+
 class Rule:
+    # True when the result never depends on the plan so far, so the rule can run once up front
+    # (e.g. while recipes stream in) instead of for every slot.
+    plan_independent = False
+
+    # How many of the latest plan entries _apply reads, or None if it may read the whole plan. Planners only
+    # keep the longest lookback of their rules, so a plan over any horizon needs bounded state.
+    lookback = None
 
     def __init__(self, hard=False, priority=5, name=None):
         """
@@ -34,3 +56,18 @@ class Rule:
         Subclasses should override this method instead of apply().
         """
         raise NotImplementedError
+
+    def query_filter(self):
+        """
+        A Mealie queryFilter clause that pre-selects the recipes this rule keeps, or None if the rule
+        can only run client-side. Only used for hard rules, since soft rules may be relaxed.
+        """
+        return None
+
+
+def max_lookback(rules):
+    """The number of latest plan entries that is enough for all these rules, or None if they need the whole plan."""
+    lookbacks = [r.lookback for r in rules]
+    if any(lookback is None for lookback in lookbacks):
+        return None
+    return max(lookbacks, default=0)
@@ -1,6 +1,9 @@
-from .base import Rule
+from .base import Rule, tag_slug
 
 class IncludeTag(Rule):
+    plan_independent = True
+    lookback = 0
+
     def __init__(self, tag, **kwargs):
         super().__init__(**kwargs)
         self.tag = tag.casefold()
@@ -9,4 +12,8 @@ class IncludeTag(Rule):
         return [
             c for c in candidates
             if any(t.get("name").casefold() == self.tag for t in c.get("tags", []))
-        ]
\ No newline at end of file
+        ]
+
+    def query_filter(self):
+        slug = tag_slug(self.tag)
+        return f'tags.slug IN ["{slug}"]' if slug else None
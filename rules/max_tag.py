@@ -1,6 +1,8 @@
 from .base import Rule
 
 class MaxTagPerWeek(Rule):
+    lookback = 7
+
     def __init__(self, tag, max_count=1, **kwargs):
         super().__init__(**kwargs)
         self.tag = tag.casefold()
@@ -4,6 +4,7 @@ class NoDuplicatesWithinDays(Rule):
     def __init__(self, days=7, **kwargs):
         super().__init__(**kwargs)
         self.days = days
+        self.lookback = days
 
     def _apply(self, plan, candidates):
         recent_ids = {e["recipeId"] for e in plan[-self.days:]}
@@ -6,21 +6,35 @@ class RecentlyMadeRule(Rule):
     Excludes recipes that have been made within the last X days.
     """
 
-    def __init__(self, days=14, hard=False, priority=1, name="No Recently Made Meals in the last 2 weeks"):
+    # Reads recipe history, never the plan.
+    lookback = 0
+
+    def __init__(self, days=14, hard=False, priority=1, name="No Recently Made Meals in the last 2 weeks",
+                 last_made=None, as_of=None):
+        """
+        :param last_made: Optional dict of recipe id -> ISO timestamp it was last made (e.g. from a
+            HistoryStore). Used when newer than, or in place of, the recipe's own lastMade.
+        :param as_of: Judge "recent" relative to this naive datetime instead of now (for backtests)
+        """
         name = name or f"No repeats within {days} days"
         super().__init__(hard=hard, priority=priority, name=name)
         self.days = days
+        self.last_made = last_made or {}
+        self.as_of = as_of
 
     def _apply(self, plan, candidates):
-        cutoff = datetime.now() - timedelta(days=self.days)
+        cutoff = (self.as_of or datetime.now()) - timedelta(days=self.days)
         filtered = []
 
         for recipe in candidates:
-            last_made = recipe.get("lastMade")
+            last_made = max(filter(None, (recipe.get("lastMade"), self.last_made.get(recipe.get("id")))),
+                            default=None)
             if last_made:
                 try:
                     # Mealie lastMade is an ISO date string like "2025-09-01T00:00:00Z"
                     last_made_dt = datetime.fromisoformat(last_made.replace("Z", "+00:00"))
+                    if last_made_dt.tzinfo:
+                        last_made_dt = last_made_dt.astimezone().replace(tzinfo=None)
                     if last_made_dt >= cutoff:
                         continue  # exclude if too recent
                 except Exception:
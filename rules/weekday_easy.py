@@ -19,6 +19,9 @@ def compute_effort(recipe):
 
 
 class WeekdayEasyRule(Rule):
+    # Only len(plan) < 5 matters, which five entries answer as well as the whole plan.
+    lookback = 5
+
     def __init__(self, max_effort=5, hard=False, priority=5, name="No Difficult Meals on weekdays"):
         super().__init__(hard=hard, priority=priority, name=name)
         self.max_effort = max_effort
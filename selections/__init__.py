@@ -1,5 +1,6 @@
 from .selection_strategy import SelectionStrategy
 from .random_selection import RandomSelection
 from .neglect_selection import NeglectSelection
+from .neglect_stats import NeglectStats, neglect_stats_by_recipe
 
-__all__ = ["SelectionStrategy", "RandomSelection", "NeglectSelection"]
\ No newline at end of file
+__all__ = ["SelectionStrategy", "RandomSelection", "NeglectSelection", "NeglectStats", "neglect_stats_by_recipe"]
\ No newline at end of file
@@ -2,6 +2,7 @@ import random
 import logging
 
 from .selection_strategy import SelectionStrategy
+from .neglect_stats import NeglectStats
 
 logger = logging.getLogger(__name__)
 
@@ -11,35 +12,49 @@ class NeglectSelection(SelectionStrategy):
     have been frequently planned but not made recently.
     """
 
-    def __init__(self, meal_plans_by_recipe, timeline_events_by_recipe, lookback_weeks=8, min_weight=0.1):
+    def __init__(self, meal_plans_by_recipe=None, timeline_events_by_recipe=None, lookback_weeks=8, min_weight=0.1,
+                 stats_by_recipe=None, half_life_weeks=None):
         """
         :param meal_plans_by_recipe: Dict mapping recipe names to lists of meal plan events
         :param timeline_events_by_recipe: Dict mapping recipe names to lists of timeline events with "made" field
         :param lookback_weeks: Lookback window for neglect calculation (for reference, data should already be filtered)
         :param min_weight: Minimum weight for heavily neglected recipes
+        :param stats_by_recipe: Dict mapping recipe names to NeglectStats, used instead of the event lists
+        :param half_life_weeks: Decay events from the lists with this half-life, so old neglect fades
         """
-        self.meal_plans_by_recipe = meal_plans_by_recipe
-        self.timeline_events_by_recipe = timeline_events_by_recipe
+        self.meal_plans_by_recipe = meal_plans_by_recipe or {}
+        self.timeline_events_by_recipe = timeline_events_by_recipe or {}
         self.lookback_weeks = lookback_weeks
         self.min_weight = min_weight
+        self.half_life_weeks = half_life_weeks
+        # Event lists are reduced to NeglectStats the first time a recipe is weighed.
+        self.stats_by_recipe = dict(stats_by_recipe or {})
+        self._from_events = stats_by_recipe is None
+
+    def stats_for(self, recipe_name):
+        stats = self.stats_by_recipe.get(recipe_name)
+        if stats is None:
+            if not self._from_events:
+                return NeglectStats()
+            stats = NeglectStats.from_events(self.meal_plans_by_recipe.get(recipe_name),
+                                             self.timeline_events_by_recipe.get(recipe_name), self.half_life_weeks)
+            self.stats_by_recipe[recipe_name] = stats
+        return stats
 
     def calculate_weight(self, recipe):
         """
         Compute weight based on neglect: planned-but-not-made events
         reduce weight toward min_weight.
         """
-        recipe_name = recipe["name"]
-        times_made = self.timeline_events_by_recipe.get(recipe_name, [])
-        planned_events = self.meal_plans_by_recipe.get(recipe_name, [])
+        stats = self.stats_for(recipe["name"])
+        planned_count = stats.planned
+        made_count = stats.made
 
-        if not planned_events:
+        if not planned_count:
             return 1.0  # never planned → full weight
 
-        made_count = len(times_made)
-        planned_count = len(planned_events)
-
         neglect_count = planned_count - made_count
-        if planned_count == 0 or neglect_count <= 0:
+        if neglect_count <= 0:
             return 1.0  # no neglect → full weight
 
         # Linear scaling: heavily neglected recipes get min_weight
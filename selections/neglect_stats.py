@@ -0,0 +1,85 @@
+import datetime
+
+# Timestamps without an offset (Mealie meal plan dates, for one) are taken as UTC.
+_UTC = datetime.timezone.utc
+
+
+def parse_timestamp(value):
+    """Parse a Mealie date or ISO timestamp into an aware datetime, or None if it can't be read."""
+    if not value:
+        return None
+    try:
+        parsed = datetime.datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=_UTC)
+
+
+def decay_weight(timestamp, half_life_weeks, now):
+    """
+    How much an event counts: 1.0 now, 0.5 one half-life ago, and so on.
+    Undated events and events in the future count fully.
+    """
+    when = parse_timestamp(timestamp)
+    if when is None:
+        return 1.0
+    age_weeks = (now - when).total_seconds() / (7 * 24 * 3600)
+    return 0.5 ** (max(age_weeks, 0.0) / half_life_weeks)
+
+
+class NeglectStats:
+    """
+    What NeglectSelection needs to know about one recipe's history.
+
+    planned and made are counts, or decayed sums of event weights when a half-life is used.
+    last_planned and last_made are the latest ISO timestamps seen, or None.
+    """
+
+    __slots__ = ("planned", "made", "last_planned", "last_made")
+
+    def __init__(self, planned=0, made=0, last_planned=None, last_made=None):
+        self.planned = planned
+        self.made = made
+        self.last_planned = last_planned
+        self.last_made = last_made
+
+    @classmethod
+    def from_events(cls, meal_plans, timeline_events, half_life_weeks=None, now=None):
+        """
+        Aggregate raw meal plan entries ("date") and made events ("timestamp") for one recipe.
+
+        :param half_life_weeks: Weight each event by its age with this half-life; None counts every event as 1
+        """
+        meal_plans = meal_plans or []
+        timeline_events = timeline_events or []
+        plan_dates = [e.get("date") for e in meal_plans]
+        made_times = [e.get("timestamp") or e.get("createdAt") for e in timeline_events]
+
+        if half_life_weeks:
+            now = now or datetime.datetime.now(_UTC)
+            planned = sum(decay_weight(d, half_life_weeks, now) for d in plan_dates)
+            made = sum(decay_weight(t, half_life_weeks, now) for t in made_times)
+        else:
+            planned, made = len(plan_dates), len(made_times)
+
+        return cls(planned, made,
+                   max(filter(None, plan_dates), default=None),
+                   max(filter(None, made_times), default=None))
+
+    def __eq__(self, other):
+        return isinstance(other, NeglectStats) and all(
+            getattr(self, name) == getattr(other, name) for name in self.__slots__)
+
+    def __repr__(self):
+        return (f"NeglectStats(planned={self.planned}, made={self.made}, "
+                f"last_planned={self.last_planned!r}, last_made={self.last_made!r})")
+
+
+def neglect_stats_by_recipe(meal_plans_by_recipe, timeline_events_by_recipe, half_life_weeks=None, now=None):
+    """Recipe name -> NeglectStats for every recipe in either mapping."""
+    names = set(meal_plans_by_recipe or {}) | set(timeline_events_by_recipe or {})
+    return {
+        name: NeglectStats.from_events((meal_plans_by_recipe or {}).get(name),
+                                       (timeline_events_by_recipe or {}).get(name), half_life_weeks, now)
+        for name in names
+    }
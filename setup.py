@@ -1,14 +1,21 @@
 from setuptools import setup, find_packages
 
+PACKAGE = "mealie_meal_planner"
+
 setup(
     name="mealie_meal_planner",     # package name
     version="0.1.0",
-    packages=find_packages(),       # automatically find __init__.py packages
-    install_requires=[],            # list dependencies here if any
+    # The repository root is the package itself, so map it and its sub-packages under one name.
+    packages=[PACKAGE] + [f"{PACKAGE}.{p}" for p in find_packages(exclude=["tests", "tests.*"])],
+    package_dir={PACKAGE: "."},
+    install_requires=["requests", "python-dotenv"],
+    extras_require={
+        "tagging": ["openai"],
+        "fast": ["orjson"],
+    },
     entry_points={
         "console_scripts": [
-            # optional: make it runnable from command line
-            # "mealplan=mealie_meal_planner.meal_plan:plan_meals"
+            "mealplan=mealie_meal_planner.cli:main",
         ],
     },
 )
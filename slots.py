@@ -0,0 +1,82 @@
+"""
+The (date, meal_type) slots a plan is made of.
+
+Post-selection rules get to look at every slot before selection starts and can
+mark it skipped (with a note to show in Mealie instead of a recipe), so rule
+filtering and selection never run for slots that would be thrown away.
+"""
+import datetime
+import itertools
+
+
+class Slot:
+    def __init__(self, date, meal_type):
+        self.date = date
+        self.meal_type = meal_type
+        self.skipped = False
+        self.title = None
+        self.text = ""
+        self.entry = None
+        self.relaxed = []
+
+    def skip(self, title, text=""):
+        """Mark the slot as not needing a recipe; a note with this title goes in its place."""
+        self.skipped = True
+        self.title = title
+        self.text = text
+
+    def to_entry(self):
+        """The plan entry for this slot: a note if skipped, otherwise the selected recipe entry (or None)."""
+        if self.skipped:
+            return {
+                "date": self.date.isoformat(),
+                "entryType": self.meal_type,
+                "title": self.title,
+                "text": self.text,
+            }
+        return self.entry
+
+    def __repr__(self):
+        state = f"skipped: {self.title}" if self.skipped else (self.entry or {}).get("name", "open")
+        return f"Slot({self.date.isoformat()} {self.meal_type}, {state})"
+
+
+def iter_slots(start_date, days=None, meal_types=None):
+    """Yield new slots from start_date in plan order, for `days` days or without end if days is None."""
+    meal_types = meal_types or ["dinner"]
+    day_offsets = range(days) if days is not None else itertools.count()
+    for i in day_offsets:
+        date = start_date + datetime.timedelta(days=i)
+        for meal_type in meal_types:
+            yield Slot(date, meal_type)
+
+
+class SlotCalendar:
+    """
+    Every slot from start_date for `days` days, in plan order (by date, then meal_types order).
+    """
+
+    def __init__(self, start_date, days=7, meal_types=None):
+        self.start_date = start_date
+        self.days = days
+        self.meal_types = meal_types or ["dinner"]
+        self.slots = list(iter_slots(start_date, days, self.meal_types))
+
+    def declare(self, post_selection_rules):
+        """Let each post-selection rule mark the slots it will take over."""
+        for rule in post_selection_rules:
+            for slot in self.slots:
+                rule.declare(slot)
+
+    def open_slots(self):
+        return [s for s in self.slots if not s.skipped]
+
+    def find(self, date, meal_type):
+        for slot in self.slots:
+            if slot.date == date and slot.meal_type == meal_type:
+                return slot
+        return None
+
+    def to_plan(self):
+        """Plan entries for every filled or skipped slot, in slot order."""
+        return [entry for entry in (s.to_entry() for s in self.slots) if entry is not None]
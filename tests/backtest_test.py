@@ -0,0 +1,88 @@
+import datetime
+
+import pytest
+
+from benchmarks.synthetic import ANCHOR_DATE, generate_history, generate_library
+from mealie_meal_planner.backtest import History, parse_grid, past_week_starts, run_backtest, summarize
+
+
+@pytest.fixture(scope="module")
+def library():
+    recipes = generate_library(60, seed=3)
+    meal_plans, timeline_events = generate_history(recipes, weeks=10, seed=3)
+    return recipes, meal_plans, timeline_events
+
+
+def test_as_of_only_sees_history_before_the_cutoff(library):
+    recipes, meal_plans, timeline_events = library
+    history = History.from_events(meal_plans, timeline_events)
+    when = datetime.datetime.combine(ANCHOR_DATE - datetime.timedelta(weeks=4), datetime.time(),
+                                     datetime.timezone.utc)
+
+    stats_by_recipe, last_made = history.as_of(recipes, when)
+
+    for recipe in recipes:
+        planned = [m["date"] for m in meal_plans
+                   if m["recipeId"] == recipe["id"] and m["date"] < when.date().isoformat()]
+        made = [e["timestamp"] for e in timeline_events
+                if e["recipeId"] == recipe["id"] and e["timestamp"] < when.isoformat()]
+        stats = stats_by_recipe[recipe["name"]]
+        assert (stats.planned, stats.made) == (len(planned), len(made))
+        assert stats.last_planned == max(planned, default=None)
+        assert last_made.get(recipe["id"]) == max(made, default=None)
+    assert sum(s.planned for s in stats_by_recipe.values()) == 6 * 7
+    assert all(t < when.isoformat() for t in last_made.values())
+
+    decayed, _ = history.as_of(recipes, when, half_life_weeks=2)
+    assert all(decayed[name].planned < stats.planned for name, stats in stats_by_recipe.items() if stats.planned)
+
+
+def test_parse_grid():
+    assert parse_grid(None) == [{}]
+    assert parse_grid(["max_chicken=1,2", "min_weight=0.1,0.3"]) == [
+        {"max_chicken": 1, "min_weight": 0.1},
+        {"max_chicken": 1, "min_weight": 0.3},
+        {"max_chicken": 2, "min_weight": 0.1},
+        {"max_chicken": 2, "min_weight": 0.3},
+    ]
+    for spec in ("colour=red", "max_chicken", "max_chicken="):
+        with pytest.raises(ValueError):
+            parse_grid([spec])
+
+
+def test_summarize():
+    weeks = [
+        {"week": "2025-01-06", "failed": False, "seconds": 0.001, "slots": 7, "relaxed_slots": 1,
+         "relaxed_rules": ["Max 2 chicken"], "distinct_recipes": 7, "distinct_tags": 10},
+        {"week": "2025-01-13", "failed": False, "seconds": 0.003, "slots": 7, "relaxed_slots": 2,
+         "relaxed_rules": ["Max 2 chicken", "No duplicates"], "distinct_recipes": 6, "distinct_tags": 8},
+        {"week": "2025-01-20", "failed": True, "seconds": 0.002},
+    ]
+
+    summary = summarize({"max_chicken": 2}, weeks)
+
+    assert summary["config"] == {"max_chicken": 2}
+    assert (summary["weeks"], summary["hard_failures"]) == (3, 1)
+    assert summary["relaxed_slot_rate"] == pytest.approx(3 / 14)
+    assert summary["relaxed_by_rule"] == {"Max 2 chicken": 2, "No duplicates": 1}
+    assert summary["distinct_recipe_rate"] == pytest.approx(13 / 14)
+    assert summary["distinct_tags_per_week"] == 9
+    assert summary["ms_per_plan"] == pytest.approx(2)
+    assert summary["p95_ms_per_plan"] == pytest.approx(2)
+    assert summarize({}, [weeks[2]])["relaxed_slot_rate"] is None
+
+
+def test_run_backtest_is_repeatable(library):
+    recipes, meal_plans, timeline_events = library
+    history = History.from_events(meal_plans, timeline_events)
+    recipes = [dict(r, lastMade=None) for r in recipes]
+    configurations = parse_grid(["max_chicken=1,3"])
+
+    def run():
+        summaries = run_backtest(recipes, history, configurations, past_week_starts(3, ANCHOR_DATE), workers=1, seed=5)
+        return [{k: v for k, v in s.items() if "ms" not in k} for s in summaries]
+
+    first = run()
+    assert [s["config"] for s in first] == configurations
+    assert all(s["weeks"] == 3 for s in first)
+    assert run() == first
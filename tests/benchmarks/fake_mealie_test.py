@@ -0,0 +1,88 @@
+import pytest
+import requests
+from benchmarks.fake_mealie import FakeMealie
+from benchmarks.query_filter import compile_filter
+from benchmarks.synthetic import generate_library
+
+
+@pytest.fixture
+def server():
+    recipes = [
+        {"id": "r1", "slug": "pizza", "name": "Pizza", "tags": [{"name": "Italian"}, {"name": "Dinner"}]},
+        {"id": "r2", "slug": "salad", "name": "Salad", "tags": [{"name": "Vegetarian"}]},
+        {"id": "r3", "slug": "soup", "name": "Soup", "tags": []},
+    ]
+    with FakeMealie(recipes) as s:
+        yield s
+
+
+def test_query_filter():
+    recipe = {"name": "Pizza", "createdAt": "2025-09-02T10:00:00Z",
+              "tags": [{"name": "Italian"}, {"name": "Dinner"}], "recipe": {"name": "Pizza"}}
+
+    assert compile_filter('name="Pizza"')(recipe)
+    assert compile_filter('recipe.name = "Pizza" AND createdAt > "2025-09-01"')(recipe)
+    assert compile_filter('tags.name IN ["Dinner", "Lunch"]')(recipe)
+    assert compile_filter('tags.name CONTAINS ALL ["Dinner", "Italian"]')(recipe)
+    assert not compile_filter('tags.name NOT IN ["Italian"]')(recipe)
+    assert compile_filter('(name = "Soup" OR name LIKE "%izz%") AND tags IS NOT NULL')(recipe)
+    assert compile_filter("")(recipe)
+
+
+def test_pagination_and_filter(server):
+    url = f"{server.url}/api/recipes"
+
+    first = requests.get(url, params={"page": 1, "perPage": 2}).json()
+    second = requests.get(url, params={"page": 2, "perPage": 2}).json()
+    third = requests.get(url, params={"page": 3, "perPage": 2}).json()
+
+    assert first["total"] == 3 and first["total_pages"] == 2
+    assert [r["name"] for r in first["items"] + second["items"]] == ["Pizza", "Salad", "Soup"]
+    assert third["items"] == []
+
+    filtered = requests.get(url, params={"queryFilter": 'tags.name IN ["Dinner"]'}).json()
+    assert [r["name"] for r in filtered["items"]] == ["Pizza"]
+
+    bad = requests.get(url, params={"queryFilter": 'name IN'})
+    assert bad.status_code == 400
+
+
+def test_mealplans_tags_and_counters(server):
+    resp = requests.post(f"{server.url}/api/households/mealplans",
+                         json={"date": "2025-09-01", "entryType": "dinner", "recipeId": "r1"})
+    assert resp.status_code == 201
+    plans = requests.get(f"{server.url}/api/households/mealplans",
+                         params={"queryFilter": 'recipe.name="Pizza"', "start_date": "2025-08-01"}).json()
+    assert len(plans["items"]) == 1
+
+    assert requests.post(f"{server.url}/api/organizers/tags", json={"name": "Dinner"}).status_code == 409
+    assert requests.post(f"{server.url}/api/organizers/tags", json={"name": "Lunch"}).status_code == 201
+    requests.post(f"{server.url}/api/recipes/bulk-actions/tag",
+                  json={"recipes": ["soup"], "tags": [{"name": "Lunch"}]})
+    assert [t["name"] for t in server.recipes[2]["tags"]] == ["Lunch"]
+
+    stats = server.stats()
+    assert stats["requests"]["POST /api/households/mealplans"] == 1
+    assert stats["total_requests"] == 5
+    assert stats["bytes_sent"] > 0
+
+
+def test_error_injection():
+    with FakeMealie(generate_library(5), error_rate=1.0) as s:
+        resp = requests.get(f"{s.url}/api/recipes")
+        assert resp.status_code == 503
+        assert s.stats()["errors"] == 1
+
+
+def test_pushed_down_tag_rules_match_client_side():
+    from rules import ExcludeTag, IncludeTag
+
+    recipes = generate_library(500, seed=3)
+    rules = [IncludeTag("dinner", hard=True), ExcludeTag("allergen-nuts", hard=True)]
+    predicate = compile_filter(" AND ".join(r.query_filter() for r in rules))
+
+    client_side = recipes
+    for rule in rules:
+        client_side = rule.apply([], client_side)
+
+    assert [r["id"] for r in recipes if predicate(r)] == [r["id"] for r in client_side]
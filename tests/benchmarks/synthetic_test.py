@@ -0,0 +1,15 @@
+from benchmarks.synthetic import generate_history, generate_library
+
+
+def test_same_seed_same_data():
+    recipes = generate_library(50, seed=3)
+
+    assert generate_library(50, seed=3) == recipes
+    assert generate_history(recipes, weeks=8, seed=3) == generate_history(recipes, weeks=8, seed=3)
+
+
+def test_different_seed_different_data():
+    recipes = generate_library(50, seed=3)
+
+    assert generate_library(50, seed=4) != recipes
+    assert generate_history(recipes, weeks=8, seed=3) != generate_history(recipes, weeks=8, seed=4)
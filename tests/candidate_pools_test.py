@@ -0,0 +1,42 @@
+from candidate_pools import CandidatePools
+from classifications import Classifications
+from rules.exclude_tag import ExcludeTag
+from rules.no_duplicates import NoDuplicatesWithinDays
+
+RECIPES = [
+    {"id": "1", "name": "Porridge", "tags": [{"name": "Breakfast"}]},
+    {"id": "2", "name": "Curry", "tags": [{"name": "Dinner"}, {"name": "allergen-nuts"}]},
+    {"id": "3", "name": "Soup", "tags": [{"name": "Lunch"}, {"name": "Dinner"}]},
+    {"id": "4", "name": "Toast", "tags": []},
+    {"id": "5", "name": "Lasagne", "tags": [{"name": "dinner"}]},
+]
+
+
+def names(recipes):
+    return [r["name"] for r in recipes]
+
+
+def test_pools_by_meal_time():
+    pools = CandidatePools(RECIPES, meal_times=Classifications.MEALTIME)
+
+    # Untagged recipes fit anywhere; library order is kept.
+    assert names(pools.candidates("breakfast")) == ["Porridge", "Toast"]
+    assert names(pools.candidates("lunch")) == ["Soup", "Toast"]
+    assert names(pools.candidates("dinner")) == ["Curry", "Soup", "Toast", "Lasagne"]
+    # Not a meal time, so nothing is ruled out.
+    assert names(pools.candidates("brunch")) == names(RECIPES)
+    assert pools.sizes() == {"breakfast": 2, "lunch": 2, "dinner": 4, "brunch": 5}
+
+
+def test_hard_tag_rules_run_once_per_pool():
+    no_nuts = ExcludeTag("allergen-nuts", hard=True)
+    no_duplicates = NoDuplicatesWithinDays(7, hard=False, priority=1)
+    pools = CandidatePools(RECIPES, rules=[no_duplicates], rules_by_meal_type={"dinner": [no_nuts, no_duplicates]},
+                           meal_times=Classifications.MEALTIME)
+
+    assert names(pools.candidates("dinner")) == ["Soup", "Toast", "Lasagne"]
+    assert pools.slot_rules("dinner") == [no_duplicates]
+    assert names(pools.candidates("breakfast")) == ["Porridge", "Toast"]
+    assert pools.slot_rules("breakfast") == [no_duplicates]
+    # Built once.
+    assert pools.candidates("dinner") is pools.candidates("dinner")
@@ -0,0 +1,20 @@
+from checkpoint import Checkpoint, DONE
+
+
+def test_resume_skips_done_and_retries_failed(tmp_path):
+    path = str(tmp_path / "runs" / "tag.log")
+    with Checkpoint(path) as checkpoint:
+        checkpoint.record("pizza", tags=["Italian"])
+        checkpoint.record("salad", "failed")
+
+    with open(path, "a") as f:
+        f.write('{"key": "soup", "sta')  # cut short by a crash
+
+    with Checkpoint(path) as resumed:
+        assert resumed.is_done("pizza")
+        assert not resumed.is_done("salad")
+        assert not resumed.is_done("soup")
+        resumed.record("salad")
+        assert resumed.counts() == {DONE: 2}
+
+    assert Checkpoint(path).is_done("salad")
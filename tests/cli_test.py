@@ -0,0 +1,45 @@
+import pytest
+
+from benchmarks.fake_mealie import FakeMealie
+from benchmarks.synthetic import generate_library
+from mealie_meal_planner import cli
+
+
+@pytest.fixture
+def server(settings):
+    with FakeMealie(generate_library(100)) as s:
+        settings.override(MEALIE_SERVER=s.url)
+        yield s
+
+
+def posts(server):
+    return server.stats()["requests"].get("POST /api/households/mealplans", 0)
+
+
+def test_plan_is_a_dry_run_by_default(server):
+    assert cli.main([]) == 0
+    assert posts(server) == 0
+
+
+def test_push_writes_the_plan(server):
+    assert cli.main(["plan", "--push"]) == 0
+    assert posts(server) == 7
+
+
+def test_dry_run_setting(server, settings):
+    settings.override(DRY_RUN="false")
+    cli.main(["plan"])
+    assert posts(server) == 7
+
+    server.reset_stats()
+    settings.override(DRY_RUN="False")
+    cli.main(["plan", "--dry-run"])
+    assert posts(server) == 0
+
+
+def test_dry_run_values(settings):
+    assert settings.dry_run() is True
+    assert settings.dry_run("False") is False
+    assert settings.dry_run(True) is True
+    with pytest.raises(settings.ConfigError):
+        settings.dry_run("maybe")
@@ -0,0 +1,32 @@
+"""
+Make the repository importable as mealie_meal_planner, the way setup.py's package_dir maps it, so modules that
+use relative imports (meal_plan, daemon, replan, cli, ...) can be tested without installing the package.
+"""
+import importlib.util
+import os
+import sys
+
+import pytest
+
+PACKAGE = "mealie_meal_planner"
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+try:
+    import mealie_meal_planner  # noqa: F401
+except ImportError:
+    spec = importlib.util.spec_from_file_location(PACKAGE, os.path.join(ROOT, "__init__.py"),
+                                                  submodule_search_locations=[ROOT])
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[PACKAGE] = module
+    spec.loader.exec_module(module)
+
+
+@pytest.fixture
+def settings(monkeypatch):
+    """Isolated package configuration: no .env file and no DRY_RUN from the environment."""
+    from mealie_meal_planner import config
+    monkeypatch.setattr(config, "_overrides", {})
+    monkeypatch.setattr(config, "_loaded", True)
+    monkeypatch.delenv("DRY_RUN", raising=False)
+    monkeypatch.delenv("HISTORY_DB", raising=False)
+    return config
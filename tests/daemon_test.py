@@ -0,0 +1,157 @@
+import datetime
+
+import pytest
+import requests
+
+from benchmarks.fake_mealie import FakeMealie
+from benchmarks.synthetic import generate_history, generate_library
+from mealie_meal_planner.daemon import PlannerDaemon, WarmCache, next_scheduled, parse_schedule
+from mealie_meal_planner.meal_plan import build_rules
+from mealie_meal_planner.selections import neglect_stats_by_recipe
+
+
+def now():
+    return datetime.datetime.now(datetime.timezone.utc).isoformat()
+
+
+def tag_names(recipe):
+    return {t["name"].casefold() for t in recipe["tags"]}
+
+
+@pytest.fixture
+def server(settings):
+    recipes = generate_library(120, seed=1)
+    meal_plans, timeline_events = generate_history(recipes, weeks=8, seed=1)
+    with FakeMealie(recipes, meal_plans, timeline_events) as s:
+        settings.override(MEALIE_SERVER=s.url)
+        yield s
+
+
+@pytest.fixture
+def cache(server):
+    cache = WarmCache(rules=build_rules())
+    cache.warm_up()
+    return cache
+
+
+def test_parse_schedule_and_next_scheduled():
+    schedule = parse_schedule("Sun 18:00")
+    assert schedule == (6, datetime.time(18, 0))
+
+    # 2025-09-03 is a Wednesday
+    assert next_scheduled(schedule, datetime.datetime(2025, 9, 3, 12)) == datetime.datetime(2025, 9, 7, 18)
+    assert next_scheduled(schedule, datetime.datetime(2025, 9, 7, 18)) == datetime.datetime(2025, 9, 14, 18)
+    with pytest.raises(ValueError):
+        parse_schedule("someday")
+
+
+def test_warm_up_and_candidates(server, cache):
+    rules = build_rules()
+    expected = {r["id"] for r in server.recipes if "dinner" in tag_names(r) and "allergen-nuts" not in tag_names(r)}
+
+    assert set(cache.recipes_by_id) == expected
+    candidates = cache.candidates(rules)
+    assert {r["id"] for r in candidates} == expected
+    assert cache.candidates(build_rules()) is candidates
+    assert cache.status()["meal_plans"] > 0
+
+
+def test_refresh_adds_new_history_and_recipes(server, cache):
+    planned = cache.status()["meal_plans"]
+    recipe_id = next(iter(cache.recipes_by_id))
+    requests.post(f"{server.url}/api/households/mealplans", json={"date": "2025-09-01", "recipeId": recipe_id})
+    lunch = next(r for r in server.recipes if "lunch" in tag_names(r) and "dinner" not in tag_names(r))
+    lunch["tags"] = lunch["tags"] + [{"id": "d", "name": "Dinner", "slug": "dinner"}]
+    lunch["updatedAt"] = now()
+
+    cache.refresh()
+
+    assert cache.status()["meal_plans"] == planned + 1
+    assert lunch["id"] in {r["id"] for r in cache.candidates(build_rules())}
+
+
+def history_by_name(server):
+    """The server's meal plans and made events as recipe name -> events, the shape the fetchers return."""
+    names_by_id = {r["id"]: r["name"] for r in server.recipes}
+    plans, events = {}, {}
+    for m in server.meal_plans:
+        if m.get("recipeId") in names_by_id:
+            plans.setdefault(names_by_id[m["recipeId"]], []).append(m)
+    for e in server.timeline_events:
+        if e.get("eventType") == "comment" and e.get("recipeId") in names_by_id:
+            events.setdefault(names_by_id[e["recipeId"]], []).append(e)
+    return plans, events
+
+
+@pytest.mark.parametrize("half_life_weeks", [None, 4])
+def test_refresh_folds_new_events_into_the_stats(server, half_life_weeks):
+    cache = WarmCache(rules=build_rules(), lookback_weeks=520, half_life_weeks=half_life_weeks)
+    cache.warm_up()
+    recipe_id = next(iter(cache.recipes_by_id))
+    requests.post(f"{server.url}/api/households/mealplans", json={"date": "2025-09-01", "recipeId": recipe_id})
+
+    cache.refresh()
+    # The refresh windows overlap; events fetched twice must only count once.
+    cache.last_refresh -= datetime.timedelta(minutes=1)
+    cache.refresh()
+
+    now = datetime.datetime.now(datetime.timezone.utc)
+    expected = neglect_stats_by_recipe(*history_by_name(server), half_life_weeks=half_life_weeks, now=now)
+    stats = cache.neglect_stats(now)
+    name = cache.recipes_by_id[recipe_id]["name"]
+    assert stats[name].last_planned == "2025-09-01"
+    for name, want in expected.items():
+        if name in stats:
+            assert stats[name].planned == pytest.approx(want.planned)
+            assert stats[name].made == pytest.approx(want.made)
+            assert (stats[name].last_planned, stats[name].last_made) == (want.last_planned, want.last_made)
+
+
+def test_refresh_evicts_recipes_that_gain_an_excluded_tag(server, cache):
+    recipe = next(r for r in server.recipes if r["id"] in cache.recipes_by_id)
+    recipe["tags"] = recipe["tags"] + [{"id": "n", "name": "allergen-nuts", "slug": "allergen-nuts"}]
+    recipe["updatedAt"] = now()
+    assert recipe["id"] in {r["id"] for r in cache.candidates(build_rules())}
+
+    cache.refresh()
+
+    assert recipe["id"] not in cache.recipes_by_id
+    assert recipe["id"] not in {r["id"] for r in cache.candidates(build_rules())}
+
+
+def test_plan_trigger(server, cache):
+    daemon = PlannerDaemon(cache, port=0, dry_run=True)
+    host, port = daemon.start_http()
+    url = f"http://{host}:{port}"
+    try:
+        resp = requests.post(f"{url}/plan")
+        assert resp.status_code == 200
+        assert len(resp.json()["plan"]) == 7
+        assert requests.post(f"{url}/plan", json={"dry_run": True}).status_code == 200
+        assert "POST /api/households/mealplans" not in server.stats()["requests"]
+
+        resp = requests.post(f"{url}/plan", json={"dry_run": "maybe"})
+        assert resp.status_code == 400
+
+        assert requests.post(f"{url}/plan", json={"dry_run": False}).status_code == 200
+        assert server.stats()["requests"]["POST /api/households/mealplans"] == 7
+
+        assert requests.get(f"{url}/status").json()["recipes"] == len(cache.recipes_by_id)
+    finally:
+        daemon.stop()
+
+
+def test_plan_trigger_reports_unexpected_errors(server, cache, monkeypatch):
+    daemon = PlannerDaemon(cache, port=0, dry_run=True)
+
+    def broken(dry_run=None):
+        raise requests.ConnectionError("Mealie is down")
+
+    monkeypatch.setattr(daemon, "plan", broken)
+    host, port = daemon.start_http()
+    try:
+        resp = requests.post(f"http://{host}:{port}/plan")
+        assert resp.status_code == 500
+        assert "Mealie is down" in resp.json()["detail"]
+    finally:
+        daemon.stop()
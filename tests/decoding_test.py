@@ -0,0 +1,49 @@
+import json
+
+import pytest
+
+import decoding
+from decoding import decode_items, project
+
+TAG_FIELDS = ("id", "name", "slug")
+RECIPE_FIELDS = {"id": None, "name": None, "tags": [TAG_FIELDS], "tools": [TAG_FIELDS]}
+MEAL_PLAN_FIELDS = {"id": None, "date": None, "recipe": {"name": None, "tags": [TAG_FIELDS]}}
+
+PAGE = json.dumps({
+    "page": 1,
+    "items": [
+        {
+            "id": "r1", "name": "Curry", "description": "A long description", "image": "abc",
+            "nutrition": {"calories": "500"},
+            "tags": [{"id": "t1", "name": "Indian", "slug": "indian", "groupId": "g"}],
+            "tools": None,
+        },
+        {"id": "r2", "name": "Toast"},
+    ],
+}).encode()
+
+
+@pytest.fixture(params=["orjson", "json"])
+def parser(request, monkeypatch):
+    if request.param == "json":
+        monkeypatch.setattr(decoding, "orjson", None)
+    elif decoding.orjson is None:
+        pytest.skip("orjson not installed")
+    return request.param
+
+
+def test_decode_items_projects_each_item(parser):
+    assert decode_items(PAGE, RECIPE_FIELDS) == [
+        {"id": "r1", "name": "Curry", "tags": [{"id": "t1", "name": "Indian", "slug": "indian"}], "tools": []},
+        {"id": "r2", "name": "Toast"},
+    ]
+    assert decode_items(PAGE)[0]["description"] == "A long description"
+    assert decode_items(b'{"items": []}', RECIPE_FIELDS) == []
+
+
+def test_project_nested_objects():
+    entry = {"id": 1, "date": "2025-09-01", "title": "", "recipe": {"name": "Curry", "slug": "curry", "tags": []}}
+    note = {"id": 2, "date": "2025-09-02", "recipe": None}
+
+    assert project(entry, MEAL_PLAN_FIELDS) == {"id": 1, "date": "2025-09-01", "recipe": {"name": "Curry", "tags": []}}
+    assert project(note, MEAL_PLAN_FIELDS) == {"id": 2, "date": "2025-09-02", "recipe": None}
@@ -0,0 +1,148 @@
+import datetime
+
+from benchmarks.fake_mealie import FakeMealie
+from benchmarks.synthetic import generate_history, generate_library
+from history_store import HistoryStore
+from mealie_meal_planner.meal_plan import iter_pages
+
+RECIPES = [{"id": "r1", "name": "Pizza"}, {"id": "r2", "name": "Salad"}]
+
+
+def pages_from(data):
+    """An iter_pages stand-in that honours the updatedAt/createdAt >= filter and start_date the store sends."""
+    calls = []
+
+    def iter_pages(url, params=None, fields=None):
+        calls.append((url, dict(params or {})))
+        field = params.get("orderBy", "date")
+        items = sorted(data[url.rsplit("/api", 1)[-1]], key=lambda i: i[field])
+        since = params.get("queryFilter", "").partition('"')[2].rstrip('"')
+        items = [i for i in items if i[field] >= since and i.get("date", "") >= params.get("start_date", "")]
+        if fields:
+            items = [{k: i[k] for k in fields} for i in items]
+        for start in range(0, len(items), 2):
+            yield items[start:start + 2]
+
+    return iter_pages, calls
+
+
+def test_sync_is_incremental_and_queries_by_recipe():
+    data = {
+        "/households/mealplans": [
+            {"id": 1, "date": "2025-01-01", "entryType": "dinner", "recipeId": "r1", "updatedAt": "2025-01-01T10:00"},
+            {"id": 2, "date": "2025-01-02", "entryType": "dinner", "recipeId": "r2", "updatedAt": "2025-01-02T10:00"},
+            {"id": 3, "date": "2025-01-03", "entryType": "dinner", "title": "Out", "updatedAt": "2025-01-03T10:00"},
+        ],
+        "/recipes/timeline/events": [
+            {"id": "e1", "recipeId": "r1", "eventType": "comment", "timestamp": "2025-01-01T20:00",
+             "createdAt": "2025-01-01T20:00"},
+            {"id": "e2", "recipeId": "r1", "eventType": "info", "timestamp": "2025-01-05T20:00",
+             "createdAt": "2025-01-05T20:00"},
+        ],
+    }
+    iter_pages, calls = pages_from(data)
+    store = HistoryStore(":memory:")
+
+    assert store.sync(iter_pages, "http://mealie/api") == (3, 2)
+    assert store.meal_plans_by_recipe(RECIPES) == {
+        "Pizza": [{"id": "1", "date": "2025-01-01", "entryType": "dinner"}],
+        "Salad": [{"id": "2", "date": "2025-01-02", "entryType": "dinner"}],
+    }
+    assert store.timeline_events_by_recipe(RECIPES) == {
+        "Pizza": [{"id": "e1", "timestamp": "2025-01-01T20:00"}],
+        "Salad": [],
+    }
+    assert store.meal_plans_by_recipe(RECIPES, since=datetime.date(2025, 1, 2))["Pizza"] == []
+
+    # Only what changed since the high-water marks comes back on the next sync.
+    data["/households/mealplans"].append(
+        {"id": 4, "date": "2025-01-08", "entryType": "dinner", "recipeId": "r1", "updatedAt": "2025-01-08T10:00"})
+    data["/recipes/timeline/events"].append(
+        {"id": "e3", "recipeId": "r2", "eventType": "comment", "timestamp": "2025-01-09T20:00",
+         "createdAt": "2025-01-09T20:00"})
+    calls.clear()
+
+    assert store.sync(iter_pages, "http://mealie/api") == (1, 1)
+    assert calls[0][1]["queryFilter"] == 'updatedAt >= "2025-01-03T10:00"'
+    assert len(store.meal_plans_by_recipe(RECIPES)["Pizza"]) == 2
+    assert store.last_made() == {"r1": "2025-01-01T20:00", "r2": "2025-01-09T20:00"}
+
+    assert store.neglect_stats(RECIPES) == {
+        "Pizza": (2, 1, "2025-01-08", "2025-01-01T20:00"),
+        "Salad": (1, 1, "2025-01-02", "2025-01-09T20:00"),
+    }
+    halved = store.neglect_stats(RECIPES, since=datetime.date(2025, 1, 2), weight=lambda ts: 0.5)
+    assert halved["Pizza"] == (0.5, 0, "2025-01-08", None)
+
+
+def test_store_persists_between_runs(tmp_path):
+    path = str(tmp_path / "cache" / "history.db")
+    store = HistoryStore(path)
+    store.add_meal_plans([{"id": 1, "date": "2025-01-01", "recipeId": "r1", "updatedAt": "2025-01-01T10:00"}])
+    store.set_state("meal_plans.updatedAt", "2025-01-01T10:00")
+    store.db.commit()
+    store.close()
+
+    reopened = HistoryStore(path)
+    assert reopened.get_state("meal_plans.updatedAt") == "2025-01-01T10:00"
+    assert len(reopened.meal_plans_by_recipe(RECIPES)["Pizza"]) == 1
+
+
+def test_sync_keeps_entries_sharing_the_high_water_mark():
+    data = {
+        "/households/mealplans": [
+            {"id": i, "date": f"2025-01-0{i}", "recipeId": "r1", "updatedAt": "2025-01-01T10:00"} for i in (1, 2)
+        ],
+        "/recipes/timeline/events": [],
+    }
+    iter_pages, _ = pages_from(data)
+    store = HistoryStore(":memory:")
+    assert store.sync(iter_pages, "http://mealie/api") == (2, 0)
+
+    # Written in the same instant as the two already stored; a strict > would never fetch it.
+    data["/households/mealplans"].append(
+        {"id": 3, "date": "2025-01-03", "recipeId": "r1", "updatedAt": "2025-01-01T10:00"})
+
+    assert store.sync(iter_pages, "http://mealie/api") == (1, 0)
+    assert [e["id"] for e in store.meal_plans_by_recipe(RECIPES)["Pizza"]] == ["1", "2", "3"]
+    assert store.sync(iter_pages, "http://mealie/api") == (0, 0)
+
+
+def test_sync_drops_meal_plans_deleted_in_mealie():
+    data = {
+        "/households/mealplans": [
+            {"id": 1, "date": "2025-01-01", "recipeId": "r1", "updatedAt": "2025-01-01T10:00"},
+            {"id": 2, "date": "2025-01-08", "recipeId": "r1", "updatedAt": "2025-01-02T10:00"},
+            {"id": 3, "date": "2025-01-09", "recipeId": "r2", "updatedAt": "2025-01-03T10:00"},
+        ],
+        "/recipes/timeline/events": [],
+    }
+    iter_pages, calls = pages_from(data)
+    store = HistoryStore(":memory:")
+    store.sync(iter_pages, "http://mealie/api")
+
+    # Both Pizza entries are deleted, but only the one inside the reconciled window is looked at.
+    data["/households/mealplans"] = [m for m in data["/households/mealplans"] if m["id"] == 3]
+    store.sync(iter_pages, "http://mealie/api", reconcile_since=datetime.date(2025, 1, 5))
+
+    assert calls[-1][1] == {"start_date": "2025-01-05"}
+    assert store.meal_plans_by_recipe(RECIPES) == {
+        "Pizza": [{"id": "1", "date": "2025-01-01", "entryType": None}],
+        "Salad": [{"id": "3", "date": "2025-01-09", "entryType": None}],
+    }
+
+
+def test_incremental_sync_does_not_relist_the_history(settings):
+    recipes = generate_library(50, seed=4)
+    meal_plans, timeline_events = generate_history(recipes, weeks=104, seed=4)
+    store = HistoryStore(":memory:")
+    with FakeMealie(recipes, meal_plans, timeline_events) as server:
+        store.sync(iter_pages, f"{server.url}/api")
+        first = server.stats()
+        server.reset_stats()
+
+        assert store.sync(iter_pages, f"{server.url}/api") == (0, 0)
+        second = server.stats()
+
+    assert second["requests"]["GET /api/households/mealplans"] <= 3
+    assert second["bytes_sent"] < first["bytes_sent"] / 20
@@ -0,0 +1,48 @@
+from classifications import Classifications
+from keyword_classifier import KeywordClassifier
+
+
+def test_obvious_recipe_is_confident():
+    classifier = KeywordClassifier(Classifications)
+    recipe = {
+        "name": "Chicken Tikka Masala",
+        "recipeIngredient": [
+            {"note": "500g chicken thighs"}, {"note": "basmati rice"}, {"food": {"name": "garam masala"}},
+            {"note": "2 tbsp curry paste"},
+        ],
+    }
+
+    classification, confidence = classifier.classify(recipe)
+
+    assert classification == {"cuisine": "Indian", "main_carb": "Rice", "main_protein": ["Chicken"],
+                              "meal_time": "Dinner"}
+    assert confidence >= 0.65
+
+
+def test_unknown_recipe_has_no_confidence():
+    classification, confidence = KeywordClassifier(Classifications).classify({"name": "Grandma's Special"})
+
+    assert classification["cuisine"] is None
+    assert confidence == 0.0
+
+
+def test_multiple_proteins_and_competing_carbs():
+    classifier = KeywordClassifier(Classifications)
+    dinner = [{"name": "Dinner"}]
+    clear, clear_confidence = classifier.classify(
+        {"name": "Seafood and Chorizo Paella", "tags": dinner, "ingredients": ["prawns", "chorizo", "paella rice"]})
+    mixed, mixed_confidence = classifier.classify(
+        {"name": "Seafood and Chorizo Paella", "tags": dinner,
+         "ingredients": ["prawns", "chorizo", "paella rice", "crusty bread", "new potatoes", "garlic bread"]})
+
+    assert sorted(clear["main_protein"]) == ["Fish", "Pork"]
+    assert clear["main_carb"] == mixed["main_carb"] == "Rice"
+    assert mixed_confidence < clear_confidence
+
+
+def test_labels_outside_the_taxonomy_are_ignored():
+    classifier = KeywordClassifier(Classifications, keywords={"cuisine": {"Klingon": ["gagh"]}})
+
+    classification, _ = classifier.classify({"name": "Gagh"})
+
+    assert classification["cuisine"] is None
@@ -0,0 +1,97 @@
+import datetime
+import random
+
+import pytest
+
+from benchmarks.fake_mealie import FakeMealie
+from benchmarks.synthetic import generate_library
+from mealie_meal_planner import meal_plan, metrics
+from mealie_meal_planner.meal_plan import (RECIPE_FIELDS, build_post_selection_rules, build_query_filter,
+                                           build_rules, generate_meal_plan, iter_meal_plan, plan_from_data,
+                                           stream_recipes)
+from mealie_meal_planner.rules import ExcludeTag, IncludeTag, NoDuplicatesWithinDays
+from mealie_meal_planner.selections import NeglectSelection
+
+
+@pytest.mark.parametrize("days", [7, 23])
+def test_iter_meal_plan_matches_generate_meal_plan(days):
+    recipes = generate_library(200, seed=2)
+
+    def plan(planner, seed):
+        random.seed(seed)
+        return list(planner(recipes, build_post_selection_rules(), start_date=datetime.date(2025, 9, 1), days=days,
+                            rules=build_rules(), meal_types=["dinner"],
+                            selection_strategy=NeglectSelection(stats_by_recipe={})))
+
+    for seed in range(3):
+        planned = plan(iter_meal_plan, seed)
+        assert len(planned) == days
+        assert planned == plan(generate_meal_plan, seed)
+
+
+@pytest.fixture
+def server(settings):
+    with FakeMealie() as s:
+        settings.override(MEALIE_SERVER=s.url)
+        yield s
+
+
+def test_a_plan_that_cannot_be_finished_pushes_nothing(server):
+    # Three recipes that may never repeat run out before the week does.
+    recipes = [{"id": f"r{i}", "name": f"Recipe {i}", "tags": []} for i in range(3)]
+    rules = [NoDuplicatesWithinDays(30, hard=True)]
+
+    with pytest.raises(ValueError):
+        plan_from_data(recipes, None, None, dry_run=False, rules=rules, stats_by_recipe={})
+    assert server.meal_plans == []
+
+    with pytest.raises(ValueError):
+        plan_from_data(recipes, None, None, dry_run=False, rules=rules, stats_by_recipe={}, stream=True)
+    assert len(server.meal_plans) > 0
+
+
+def test_streaming_pushes_entries_as_they_come_without_keeping_them(server, monkeypatch):
+    recipes = generate_library(200, seed=2)
+    pushed = []
+    push = meal_plan.push_meal_plan
+    monkeypatch.setattr(meal_plan, "push_meal_plan", lambda entries: pushed.append(len(entries)) or push(entries))
+
+    planned = plan_from_data(recipes, None, None, dry_run=False, stats_by_recipe={}, days=60, stream=True)
+
+    assert planned == 60
+    assert pushed == [1] * 60
+    assert len(server.meal_plans) == 60
+
+
+def test_stream_recipes_prefilters_and_compacts_every_page(settings):
+    recipes = generate_library(130, seed=6)
+    nuts = {r["id"] for r in recipes if any(t["name"] == "allergen-nuts" for t in r["tags"])}
+    assert nuts & {r["id"] for r in recipes[50:]}  # dropped from later pages too, not just the first
+    run = metrics.RunMetrics()
+
+    with FakeMealie(recipes) as server, metrics.recording(run):
+        settings.override(MEALIE_SERVER=server.url)
+        streamed = list(stream_recipes([ExcludeTag("allergen-nuts", hard=True)]))
+
+    # Three pages and the empty one that ends the stream, the prefetched ones counted in the caller's run.
+    assert run.requests["GET /api/recipes"] == 4
+    assert [r["id"] for r in streamed] == [r["id"] for r in recipes if r["id"] not in nuts]
+    for recipe in streamed:
+        assert set(recipe) <= set(RECIPE_FIELDS)
+        assert "description" not in recipe
+        assert all(set(t) <= {"id", "name", "slug"} for t in recipe["tags"])
+
+
+def test_tags_mealie_slugs_differently_are_filtered_client_side(settings):
+    recipes = [
+        {"id": "r1", "slug": "tart", "name": "Tart", "tags": [{"id": "t1", "name": "Crème", "slug": "creme"}]},
+        {"id": "r2", "slug": "pie", "name": "Pie", "tags": [{"id": "t2", "name": "Shepherd's", "slug": "shepherds"}]},
+        {"id": "r3", "slug": "soup", "name": "Soup", "tags": []},
+    ]
+    rules = [IncludeTag("Crème", hard=True), ExcludeTag("Shepherd's", hard=True)]
+
+    with FakeMealie(recipes) as server:
+        settings.override(MEALIE_SERVER=server.url)
+        streamed = list(stream_recipes(rules, build_query_filter(rules)))
+
+    assert [r["id"] for r in streamed] == ["r1"]
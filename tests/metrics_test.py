@@ -0,0 +1,65 @@
+import json
+import os
+import stat
+import threading
+
+import metrics
+from metrics import RunMetrics
+
+
+def test_stages_accumulate_and_export(tmp_path):
+    run = RunMetrics()
+    for _ in range(3):
+        with run.stage("rule_filtering"):
+            pass
+    with run.stage("selection"):
+        pass
+    run.record_cache("recipes", hit=True)
+    run.record_cache("recipes", hit=False)
+
+    data = run.as_dict()
+    assert list(data["stages"]) == ["rule_filtering", "selection"]
+    assert data["stages"]["rule_filtering"]["calls"] == 3
+    assert data["caches"]["recipes"]["hit_rate"] == 0.5
+
+    json_path = tmp_path / "metrics.json"
+    run.write(str(json_path))
+    assert json.loads(json_path.read_text())["stages"]["selection"]["calls"] == 1
+
+    prom_path = tmp_path / "metrics.prom"
+    run.write(str(prom_path))
+    prom = prom_path.read_text()
+    assert 'mealplan_stage_seconds{stage="rule_filtering"}' in prom
+    assert 'mealplan_cache_lookups{cache="recipes",result="hit"} 1' in prom
+
+
+def test_written_file_is_readable_by_other_users(tmp_path):
+    previous = os.umask(0o022)
+    try:
+        path = tmp_path / "metrics.prom"
+        RunMetrics().write(str(path))
+        assert stat.S_IMODE(os.stat(path).st_mode) == 0o644
+
+        os.umask(0o027)
+        RunMetrics().write(str(path))
+        assert stat.S_IMODE(os.stat(path).st_mode) == 0o640
+    finally:
+        os.umask(previous)
+
+
+def test_each_thread_records_into_its_own_run():
+    plan, refresh = RunMetrics(), RunMetrics()
+
+    def refresher():
+        with metrics.recording(refresh):
+            metrics.record_cache("refresh", hit=True)
+
+    with metrics.recording(plan):
+        thread = threading.Thread(target=refresher)
+        thread.start()
+        thread.join()
+        metrics.record_cache("plan", hit=True)
+
+    assert set(plan.cache_hits) == {"plan"}
+    assert set(refresh.cache_hits) == {"refresh"}
+    assert metrics.current() is not plan
@@ -0,0 +1,139 @@
+import pytest
+
+from mealie_meal_planner.checkpoint import Checkpoint
+
+from benchmarks.fake_mealie import FakeMealie
+from mealie_meal_planner import organise_tags
+
+TAGS = [{"id": f"t{i}", "name": name, "slug": name.lower()} for i, name in enumerate(["Indian", "Rice", "Chicken",
+                                                                                      "Dinner"])]
+RECIPE = {
+    "id": "r1", "slug": "chicken-tikka-masala", "name": "Chicken Tikka Masala", "tags": [],
+    "recipeIngredient": [{"note": "500g chicken thighs"}, {"note": "basmati rice"}, {"food": {"name": "garam masala"}},
+                         {"note": "2 tbsp curry paste"}],
+}
+
+
+@pytest.fixture
+def server(settings, monkeypatch):
+    def no_llm():
+        raise AssertionError("the LLM should not be asked")
+
+    monkeypatch.setattr(organise_tags, "get_client", no_llm)
+    with FakeMealie([dict(RECIPE)], tags=TAGS) as s:
+        settings.override(MEALIE_SERVER=s.url, TAG_CHECKPOINT="")
+        yield s
+
+
+def test_summary_is_fetched_in_full_before_asking_the_llm(server):
+    summary = {k: v for k, v in RECIPE.items() if k != "recipeIngredient"}
+    assert organise_tags.get_local_classifier().classify(summary)[1] < organise_tags.DEFAULT_MIN_CONFIDENCE
+
+    classification = organise_tags.classify_recipe(summary, organise_tags.DEFAULT_MIN_CONFIDENCE)
+
+    assert classification == {"cuisine": "Indian", "main_carb": "Rice", "main_protein": ["Chicken"],
+                              "meal_time": "Dinner"}
+    assert server.stats()["requests"]["GET /api/recipes/chicken-tikka-masala"] == 1
+
+
+def test_tag_recipes_tags_list_summaries_locally(server):
+    organise_tags.tag_recipes(dry_run=False, since=None)
+
+    assert {t["name"] for t in server.recipes[0]["tags"]} == {"Indian", "Rice", "Chicken", "Dinner"}
+
+
+def library(count, failing):
+    """`count` easy curries, created in order, except the indexes in `failing`, which nothing can classify."""
+    recipes = []
+    for i in range(count):
+        recipe = dict(RECIPE, id=f"r{i}", slug=f"curry-{i}", name=f"Chicken Tikka Masala {i}", tags=[],
+                      createdAt=f"2025-01-01T{i // 60:02d}:{i % 60:02d}:00")
+        if i in failing:
+            recipe.update(name=f"Mystery {i}", recipeIngredient=[])
+        recipes.append(recipe)
+    return recipes
+
+
+@pytest.fixture
+def processed(monkeypatch):
+    """Slugs in the order tag_recipes classified them. The LLM gives up on everything."""
+    slugs = []
+    classify = organise_tags.classify_recipe
+
+    def recording(recipe, min_confidence=None):
+        slugs.append(recipe["slug"])
+        return classify(recipe, min_confidence)
+
+    monkeypatch.setattr(organise_tags, "classify_recipe", recording)
+    monkeypatch.setattr(organise_tags, "classify_recipe_with_llm", lambda recipe: None)
+    return slugs
+
+
+def test_untagged_run_reads_every_page_once_while_the_result_set_shrinks(settings, processed, tmp_path):
+    recipes = library(120, failing={0, 75})
+    with FakeMealie(recipes, tags=TAGS) as server:
+        settings.override(MEALIE_SERVER=server.url)
+        organise_tags.tag_recipes(dry_run=False, since=None, untagged=True,
+                                  checkpoint_file=str(tmp_path / "tag.log"))
+
+    # Tagged recipes leave the filter and the failed ones stay at the front of it; none is skipped or repeated.
+    assert sorted(processed) == sorted(r["slug"] for r in recipes)
+    assert [r["slug"] for r in recipes if not r["tags"]] == ["curry-0", "curry-75"]
+    assert Checkpoint(str(tmp_path / "tag.log")).counts() == {"done": 118, "failed": 2}
+
+
+def test_rerun_resumes_from_the_checkpoint(settings, processed, monkeypatch, tmp_path):
+    recipes = library(120, failing={3})
+    checkpoint_file = str(tmp_path / "tag.log")
+    tag_recipe = organise_tags.tag_recipe
+
+    def interrupted(recipe, *args):
+        if len(processed) == 70:
+            raise KeyboardInterrupt
+        tag_recipe(recipe, *args)
+
+    with FakeMealie(recipes, tags=TAGS) as server:
+        settings.override(MEALIE_SERVER=server.url)
+        monkeypatch.setattr(organise_tags, "tag_recipe", interrupted)
+        with pytest.raises(KeyboardInterrupt):
+            organise_tags.tag_recipes(dry_run=False, since=None, checkpoint_file=checkpoint_file)
+        first = list(processed)
+        processed.clear()
+
+        monkeypatch.setattr(organise_tags, "tag_recipe", tag_recipe)
+        organise_tags.tag_recipes(dry_run=False, since=None, checkpoint_file=checkpoint_file)
+
+    # Only the failed recipe is tried again; the rest carries on where the first run stopped.
+    assert len(first) == 70
+    assert processed == ["curry-3"] + [f"curry-{i}" for i in range(70, 120)]
+    assert Checkpoint(checkpoint_file).counts() == {"done": 119, "failed": 1}
+
+
+class FakeClient:
+    """Answers every chat completion with `answer` and keeps the messages it was sent."""
+
+    def __init__(self, answer):
+        self.answer = answer
+        self.messages = []
+        self.chat = self
+        self.completions = self
+
+    def create(self, model, messages, temperature):
+        self.messages.append(messages)
+        message = type("Message", (), {"content": self.answer})
+        return type("Response", (), {"choices": [type("Choice", (), {"message": message})]})
+
+
+def test_guessed_fields_and_full_recipes_go_to_the_llm(settings, monkeypatch):
+    answer = {"cuisine": "Indian", "main_carb": "Rice", "main_protein": ["Chicken"], "meal_time": "Lunch"}
+    client = FakeClient(repr(answer))
+    monkeypatch.setattr(organise_tags, "get_client", lambda: client)
+    # Everything matches a keyword except the meal time, which would only be the "Dinner" fallback.
+    recipe = dict(RECIPE, recipeIngredient=RECIPE["recipeIngredient"][:3],
+                  recipeInstructions=[{"text": "Marinate the chicken overnight."}])
+
+    assert organise_tags.classify_recipe(recipe, organise_tags.DEFAULT_MIN_CONFIDENCE) == answer
+
+    prompt = client.messages[0][1]["content"]
+    assert "500g chicken thighs, basmati rice, garam masala" in prompt
+    assert "Marinate the chicken overnight." in prompt
@@ -0,0 +1,43 @@
+import datetime
+import pytest
+from postselections.skip_day import SkipDay
+from slots import SlotCalendar
+
+
+def test_skip_day_declares_every_meal_on_that_weekday():
+    # 2025-09-01 is a Monday
+    calendar = SlotCalendar(datetime.date(2025, 9, 1), days=7, meal_types=["lunch", "dinner"])
+
+    calendar.declare([SkipDay(day="Wednesday", reason="Eating out")])
+
+    skipped = [s for s in calendar.slots if s.skipped]
+    assert [(s.date.isoformat(), s.meal_type) for s in skipped] == [("2025-09-03", "lunch"), ("2025-09-03", "dinner")]
+    assert all(s.title == "Eating out" for s in skipped)
+    assert len(calendar.open_slots()) == 12
+
+
+def test_skip_day_uses_weekday_not_position():
+    # Starting on a Thursday, Wednesday is the last day of the week
+    calendar = SlotCalendar(datetime.date(2025, 9, 4), days=7, meal_types=["dinner"])
+
+    calendar.declare([SkipDay(day="Wednesday", reason="Eating out")])
+
+    assert [s.date.isoformat() for s in calendar.slots if s.skipped] == ["2025-09-10"]
+
+
+def test_plan_keeps_skipped_slots_in_place():
+    calendar = SlotCalendar(datetime.date(2025, 9, 1), days=3, meal_types=["dinner"])
+    calendar.declare([SkipDay(day="Tuesday", reason="Eating out")])
+    for i, slot in enumerate(calendar.open_slots()):
+        slot.entry = {"date": slot.date.isoformat(), "entryType": "dinner", "recipeId": f"r{i}", "name": f"Meal{i}"}
+
+    plan = calendar.to_plan()
+
+    assert [e.get("recipeId", e.get("title")) for e in plan] == ["r0", "Eating out", "r1"]
+    # Applying the rule afterwards leaves the plan as it is
+    assert SkipDay(day="Tuesday", reason="Eating out").apply(plan) == plan
+
+
+def test_invalid_day_name():
+    with pytest.raises(ValueError):
+        SkipDay(day="Someday", reason="?").get_day_index()
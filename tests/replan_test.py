@@ -0,0 +1,78 @@
+import datetime
+
+import pytest
+
+from benchmarks.fake_mealie import FakeMealie
+from mealie_meal_planner.replan import push_changes, replan_slots
+from mealie_meal_planner.rules import NoDuplicatesWithinDays, WeekdayEasyRule
+
+EASY = {"prep_time_minutes": 5, "cook_time_minutes": 10, "steps": ["Cook"]}
+HARD = {"prep_time_minutes": 60, "cook_time_minutes": 240, "steps": ["Step"] * 12}
+
+RECIPES = [
+    {"id": "hard", "name": "Hard", "tags": [], **HARD},
+    {"id": "easy1", "name": "Easy 1", "tags": [], **EASY},
+    {"id": "easy2", "name": "Easy 2", "tags": [], **EASY},
+]
+
+
+class First:
+    def select(self, candidates):
+        return candidates[0]
+
+
+def entry(date, recipe_id, entry_id=None):
+    return {"id": entry_id, "date": date, "entryType": "dinner", "recipeId": recipe_id, "name": recipe_id, "tags": []}
+
+
+def test_rule_state_starts_at_the_plan_week():
+    # A full previous week, then Monday and Tuesday of this one (2025-09-01 is a Monday).
+    plan = [entry((datetime.date(2025, 8, 25) + datetime.timedelta(days=i)).isoformat(), f"old{i}") for i in range(7)]
+    plan += [entry("2025-09-01", "other1"), entry("2025-09-02", "other2")]
+
+    new_plan, changes = replan_slots(plan, [(datetime.date(2025, 9, 3), "dinner")], RECIPES,
+                                     [WeekdayEasyRule()], First())
+
+    # Only two entries this week, so Wednesday is still a weekday for WeekdayEasyRule.
+    assert [new["recipeId"] for _, new in changes] == ["easy1"]
+    assert changes[0][0] is None
+    assert [e["date"] for e in new_plan][-1] == "2025-09-03"
+
+
+def test_replan_avoids_the_old_recipe_and_the_rest_of_the_plan():
+    plan = [entry("2025-09-06", "easy1"), entry("2025-09-07", "hard", entry_id=5)]
+
+    _, changes = replan_slots(plan, [(datetime.date(2025, 9, 7), "dinner")], RECIPES,
+                              [NoDuplicatesWithinDays(7)], First())
+
+    (old, new), = changes
+    assert old["id"] == 5
+    assert new["recipeId"] == "easy2"
+
+
+@pytest.fixture
+def server(settings):
+    stored = [{"id": 1, "date": "2025-09-03", "entryType": "dinner", "recipeId": "hard", "title": "", "text": ""}]
+    with FakeMealie(RECIPES, stored) as s:
+        settings.override(MEALIE_SERVER=s.url)
+        yield s
+
+
+def test_push_changes_creates_then_deletes(server):
+    old = dict(server.meal_plans[0])
+
+    assert push_changes([(old, entry("2025-09-03", "easy1"))]) == []
+
+    assert [(m["id"], m["recipeId"]) for m in server.meal_plans] == [(2, "easy1")]
+
+
+def test_failed_create_keeps_the_old_entry(server):
+    old = dict(server.meal_plans[0])
+    server.error_rate = 1.0
+
+    failed = push_changes([(old, entry("2025-09-03", "easy1"))])
+
+    assert len(failed) == 1
+    assert "503" in failed[0][2]
+    assert [m["id"] for m in server.meal_plans] == [1]
+    assert "DELETE /api/households/mealplans/1" not in server.stats()["requests"]
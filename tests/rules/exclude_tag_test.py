@@ -27,3 +27,8 @@ def test_exclude_tag_rule():
 
     # Check that the filtered list length is correct
     assert len(filtered) == 2
+
+
+def test_exclude_tag_query_filter():
+    assert ExcludeTag(tag="allergen-nuts").query_filter() == 'tags.slug NOT IN ["allergen-nuts"]'
+    assert ExcludeTag(tag="Crème fraîche").query_filter() is None
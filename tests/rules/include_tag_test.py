@@ -1,4 +1,5 @@
 import pytest
+from rules.base import tag_slug
 from rules.include_tag import IncludeTag
 
 def test_include_tag_rule():
@@ -27,3 +28,31 @@ def test_include_tag_rule():
 
     # Check that the filtered list length is correct
     assert len(filtered) == 2
+
+
+def test_include_tag_query_filter():
+    assert IncludeTag(tag="Dinner").query_filter() == 'tags.slug IN ["dinner"]'
+    assert IncludeTag(tag="Middle Eastern").query_filter() == 'tags.slug IN ["middle-eastern"]'
+    assert IncludeTag(tag="Crème").query_filter() is None
+
+
+# Tag names and the slugs Mealie gives them (python-slugify).
+MEALIE_SLUGS = {
+    "Dinner": "dinner",
+    "Middle Eastern": "middle-eastern",
+    "Chips / Fries": "chips-fries",
+    "allergen-nuts": "allergen-nuts",
+    "Gluten_Free": "gluten-free",
+    "Crème Brûlée": "creme-brulee",
+    "Shepherd's Pie": "shepherds-pie",
+    "Mac & Cheese": "mac-cheese",
+    "Jalapeño": "jalapeno",
+}
+
+
+@pytest.mark.parametrize("name", MEALIE_SLUGS)
+def test_tag_slug_is_mealies_or_none(name):
+    # A wrong slug would make the pushed-down filter match nothing, so anything uncertain must give None.
+    assert tag_slug(name) in (MEALIE_SLUGS[name], None)
+    if name.isascii() and not set(name) & {"'", "&"}:
+        assert tag_slug(name) == MEALIE_SLUGS[name]
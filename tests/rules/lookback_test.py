@@ -0,0 +1,25 @@
+from rules.base import Rule, max_lookback
+from rules.exclude_tag import ExcludeTag
+from rules.max_tag import MaxTagPerWeek
+from rules.no_duplicates import NoDuplicatesWithinDays
+from rules.weekday_easy import WeekdayEasyRule
+
+
+def test_max_lookback():
+    assert max_lookback([]) == 0
+    assert max_lookback([ExcludeTag("nuts")]) == 0
+    assert max_lookback([ExcludeTag("nuts"), NoDuplicatesWithinDays(10), MaxTagPerWeek("chicken")]) == 10
+    assert max_lookback([WeekdayEasyRule(), Rule()]) is None
+
+
+def test_rules_only_need_their_lookback():
+    plan = [
+        {"recipeId": str(i), "tags": [{"name": "chicken"}] if i % 3 == 0 else []}
+        for i in range(30)
+    ]
+    candidates = [{"id": str(i), "name": str(i), "tags": [{"name": "chicken"}]} for i in range(35)]
+    rules = [NoDuplicatesWithinDays(10), MaxTagPerWeek("chicken", max_count=2), WeekdayEasyRule()]
+    window = plan[-max_lookback(rules):]
+
+    for rule in rules:
+        assert rule.apply(window, candidates) == rule.apply(plan, candidates)
@@ -27,3 +27,31 @@ def test_recently_made_rule_filters_recent():
     assert "r3" in ids, "Recipe with no lastMade should be included"
     assert "r4" in ids, "Recipe with invalid lastMade should be included"
     assert len(filtered) == 3
+
+def test_recently_made_rule_uses_last_made_mapping():
+    now = datetime.now()
+    candidates = [
+        # Recipe lastMade is stale but the history store knows it was made yesterday
+        {"id": "r1", "name": "Pizza", "lastMade": (now - timedelta(days=30)).isoformat()},
+        {"id": "r2", "name": "Salad"},
+        {"id": "r3", "name": "Soup", "lastMade": (now - timedelta(days=2)).isoformat()},
+    ]
+    last_made = {
+        "r1": (now - timedelta(days=1)).isoformat(),
+        "r3": (now - timedelta(days=40)).isoformat(),
+    }
+
+    filtered = RecentlyMadeRule(days=14, last_made=last_made).apply([], candidates)
+
+    assert [c["id"] for c in filtered] == ["r2"]
+
+
+def test_recently_made_rule_handles_utc_timestamps_and_as_of():
+    candidates = [
+        {"id": "r1", "name": "Pizza", "lastMade": "2025-01-01T19:00:00Z"},
+        {"id": "r2", "name": "Salad", "lastMade": "2024-12-01T19:00:00+00:00"},
+    ]
+
+    filtered = RecentlyMadeRule(days=14, as_of=datetime(2025, 1, 6)).apply([], candidates)
+
+    assert [c["id"] for c in filtered] == ["r2"]
@@ -0,0 +1,48 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from selections.neglect_selection import NeglectSelection
+from selections.neglect_stats import NeglectStats, neglect_stats_by_recipe
+
+
+def test_from_events_counts_and_latest():
+    stats = NeglectStats.from_events(
+        [{"date": "2025-01-01"}, {"date": "2025-03-01"}, {"date": "2025-02-01"}],
+        [{"timestamp": "2025-01-01T19:00:00Z"}],
+    )
+    assert stats == NeglectStats(3, 1, "2025-03-01", "2025-01-01T19:00:00Z")
+
+
+def test_from_events_decays_with_half_life():
+    now = datetime(2025, 3, 1, tzinfo=timezone.utc)
+    plans = [{"date": (now - timedelta(weeks=w)).date().isoformat()} for w in (0, 4, 8)]
+
+    stats = NeglectStats.from_events(plans, [], half_life_weeks=4, now=now)
+
+    assert stats.planned == pytest.approx(1 + 0.5 + 0.25)
+    assert stats.made == 0
+
+
+def test_neglect_selection_uses_stats():
+    stats_by_recipe = neglect_stats_by_recipe(
+        {"Pizza": [{"id": 1}, {"id": 2}], "Salad": [{"id": 3}]},
+        {"Salad": [{"id": 4}]},
+    )
+    strategy = NeglectSelection(stats_by_recipe=stats_by_recipe, min_weight=0.1)
+
+    assert strategy.calculate_weight({"name": "Pizza"}) == 0.1
+    assert strategy.calculate_weight({"name": "Salad"}) == 1.0
+    assert strategy.calculate_weight({"name": "Soup"}) == 1.0
+
+
+def test_recent_neglect_outweighs_old_with_half_life():
+    now = datetime.now(timezone.utc)
+    old = [{"date": (now - timedelta(weeks=52)).date().isoformat()}] * 4
+    recent = [{"date": (now - timedelta(days=1)).date().isoformat()}] * 4
+    made_recently = [{"timestamp": (now - timedelta(days=1)).isoformat()}] * 2
+
+    strategy = NeglectSelection({"Pizza": old + recent}, {"Pizza": made_recently}, half_life_weeks=8)
+
+    # Without decay 8 planned / 2 made looks heavily neglected; with it, the year-old plans barely count.
+    assert strategy.calculate_weight({"name": "Pizza"}) > NeglectSelection(
+        {"Pizza": old + recent}, {"Pizza": made_recently}).calculate_weight({"name": "Pizza"})
@@ -0,0 +1,18 @@
+import datetime
+import itertools
+
+from slots import SlotCalendar, iter_slots
+
+
+def test_iter_slots_matches_calendar():
+    calendar = SlotCalendar(datetime.date(2025, 9, 1), days=3, meal_types=["lunch", "dinner"])
+
+    slots = list(iter_slots(datetime.date(2025, 9, 1), days=3, meal_types=["lunch", "dinner"]))
+
+    assert [(s.date, s.meal_type) for s in slots] == [(s.date, s.meal_type) for s in calendar.slots]
+
+
+def test_iter_slots_without_end():
+    slots = itertools.islice(iter_slots(datetime.date(2025, 9, 1)), 400)
+
+    assert [s.date for s in slots][-1] == datetime.date(2025, 9, 1) + datetime.timedelta(days=399)